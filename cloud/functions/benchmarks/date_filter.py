@@ -0,0 +1,67 @@
+"""
+Benchmark: search_market(date=...) with the date pushed into marketStartTime vs filtering afterwards.
+
+Seeds N markets spread over several days in the local exchange simulator, then runs
+the same one-day search twice: once the old way (fetch and price every market, keep
+the day's events in Python) and once with the date sent to Betfair as a
+marketStartTime range. Prints API calls per method, markets priced and wall time.
+Run from cloud/functions:
+
+    python benchmarks/date_filter.py --markets 5000 --days 7 --latency 0.02
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+
+
+def run(simulator, search):
+    client = BetfairExchange(username="bench", password="bench", app_key="bench", certs_path="/tmp")
+    simulator.attach(client.client)
+    client.login()
+    simulator.calls.clear()
+    started = time.perf_counter()
+    events = search(client)
+    return events, time.perf_counter() - started, dict(simulator.calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every API call")
+    args = parser.parse_args()
+    logging.getLogger("core.logger").setLevel(logging.ERROR)
+
+    start = datetime.now(timezone.utc).replace(hour=0)
+    date = (start + timedelta(days=1)).date().isoformat()
+    simulator = LocalExchangeSimulator(
+        seed_markets(args.markets, start=start, days=args.days), latency=args.latency,
+    ).start()
+    try:
+        before, before_seconds, before_calls = run(
+            simulator,
+            lambda c: c._filter_events_by_date(c.search_market("Soccer", max_results=args.markets), date),
+        )
+        after, after_seconds, after_calls = run(
+            simulator,
+            lambda c: c.search_market("Soccer", date=date, max_results=args.markets),
+        )
+    finally:
+        simulator.stop()
+
+    assert sorted(e["provider_event_id"] for e in before) == sorted(e["provider_event_id"] for e in after)
+    print(f"{args.markets} markets over {args.days} days, searching {date} ({len(after)} events)")
+    for name, seconds, calls in (("post-filter", before_seconds, before_calls), ("pushdown", after_seconds, after_calls)):
+        print(f"{name:>12}: {seconds:6.2f}s  {sum(calls.values()):4d} calls  {calls}")
+
+
+if __name__ == "__main__":
+    main()
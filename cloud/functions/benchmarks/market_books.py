@@ -0,0 +1,99 @@
+"""
+Benchmark: parsing listMarketBook responses into betfairlightweight resources vs compact books.
+
+Builds a synthetic response body for N markets (EX_BEST_OFFERS, 3 levels a side),
+then times decode + parse + best-back-price extraction for both paths and reports
+peak memory. Run from cloud/functions:
+
+    python benchmarks/market_books.py --markets 5000 --runners 3 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from betfairlightweight.compat import json
+from betfairlightweight.resources import MarketBook as ResourceMarketBook
+
+from third_party.betting_platforms.betfair_exchange.books import parse_market_books
+
+
+def build_payload(markets: int, runners: int) -> bytes:
+    rng = random.Random(7)
+
+    def ladder(start: float, step: float):
+        return [{"price": round(start + i * step, 2), "size": round(rng.uniform(2, 500), 2)} for i in range(3)]
+
+    books = []
+    for m in range(markets):
+        book_runners = []
+        for r in range(runners):
+            best = round(rng.uniform(1.2, 15), 2)
+            book_runners.append({
+                "selectionId": 1000 + r, "handicap": 0.0, "status": "ACTIVE",
+                "lastPriceTraded": best, "totalMatched": round(rng.uniform(0, 1e5), 2),
+                "ex": {"availableToBack": ladder(best, -0.02), "availableToLay": ladder(best + 0.02, 0.02), "tradedVolume": []},
+            })
+        books.append({
+            "marketId": f"1.{200000000 + m}", "isMarketDataDelayed": False, "status": "OPEN", "betDelay": 0,
+            "bspReconciled": False, "complete": True, "inplay": False, "numberOfWinners": 1,
+            "numberOfRunners": runners, "numberOfActiveRunners": runners, "lastMatchTime": "2025-01-01T12:00:00.000Z",
+            "totalMatched": round(rng.uniform(0, 1e6), 2), "totalAvailable": round(rng.uniform(0, 1e5), 2),
+            "crossMatching": True, "runnersVoidable": False, "version": 1, "runners": book_runners,
+        })
+    body = json.dumps(books)
+    return body if isinstance(body, bytes) else body.encode("utf-8")
+
+
+def resource_path(payload: bytes) -> int:
+    books = [ResourceMarketBook(elapsed_time=0.0, **raw) for raw in json.loads(payload)]
+    return sum(
+        1 for book in books for r in book.runners
+        if (r.ex.available_to_back[0].price if r.ex.available_to_back else None) is not None
+    )
+
+
+def compact_path(payload: bytes) -> int:
+    books = parse_market_books(json.loads(payload))
+    return sum(
+        1 for book in books for r in book.runners
+        if (r.ex.available_to_back[0].price if r.ex.available_to_back else None) is not None
+    )
+
+
+def measure(fn, payload: bytes, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(payload)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=5000)
+    parser.add_argument("--runners", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = build_payload(args.markets, args.runners)
+    print(f"{args.markets} markets x {args.runners} runners, {len(payload) / 1e6:.1f} MB, decoder: {json.__name__}")
+
+    results = {name: measure(fn, payload, args.repeat) for name, fn in (("resources", resource_path), ("compact", compact_path))}
+    for name, (best, peak) in results.items():
+        print(f"{name:>10}: {best * 1000:8.1f} ms  peak {peak / 1e6:7.1f} MB")
+    print(f"   speedup: {results['resources'][0] / results['compact'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
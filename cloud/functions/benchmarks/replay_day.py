@@ -0,0 +1,63 @@
+"""
+Re-run a scheduled job with its outbound traffic recorded to, or replayed from, disk.
+
+Record a real day once, then replay it as often as needed to time an optimization
+against identical Betfair, Brave Search and LLM responses. Firestore is not part of the
+capture, so point FIRESTORE_EMULATOR_HOST at an emulator when replaying. Run from
+cloud/functions:
+
+    python benchmarks/replay_day.py record  --traffic traffic/2026-10-17 --job fixtures --date 2026-10-17
+    python benchmarks/replay_day.py replay  --traffic traffic/2026-10-17 --job fixtures --date 2026-10-17 --latency-scale 0
+    python benchmarks/replay_day.py replay  --traffic traffic/2026-10-17 --job analyze --date 2026-10-17 --game 34523450
+    python benchmarks/replay_day.py replay  --traffic traffic/2026-10-17 --job hourly
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=("record", "replay"))
+    parser.add_argument("--traffic", required=True, help="capture directory")
+    parser.add_argument("--job", choices=("fixtures", "analyze", "hourly"), required=True)
+    parser.add_argument("--date", help="fixture date (YYYY-MM-DD) for the fixtures and analyze jobs")
+    parser.add_argument("--game", help="daily fixture game ID for the analyze job")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="replayed latency = recorded latency * scale")
+    args = parser.parse_args()
+
+    # constants reads the traffic configuration at import time.
+    os.environ["TRAFFIC_MODE"] = args.mode
+    os.environ["TRAFFIC_DIR"] = args.traffic
+    os.environ["TRAFFIC_LATENCY_SCALE"] = str(args.latency_scale)
+    import main as functions
+    from core import traffic
+
+    started = time.perf_counter()
+    if args.job == "fixtures":
+        result = functions._make_betting_manager().fetch_and_store_daily_fixtures(target_date=args.date)
+    elif args.job == "analyze":
+        if not (args.date and args.game):
+            parser.error("--job analyze needs --date and --game")
+        fixture = functions._make_betting_manager()._daily_fixtures_repo_instance.get_fixture(args.date, args.game)
+        if not fixture:
+            parser.error(f"No daily fixture {args.game} on {args.date}")
+        event = SimpleNamespace(
+            data=SimpleNamespace(to_dict=lambda: {**fixture, "analysis_status": "pending"}),
+            params={"dateId": args.date, "gameId": args.game},
+        )
+        result = functions.analyze_daily_fixture.__wrapped__(event)
+    else:
+        result = functions.hourly_automated_betting.__wrapped__(None)
+    elapsed = time.perf_counter() - started
+    traffic.get_recorder().close()
+
+    print(f"{args.job} ({args.mode}, latency x{args.latency_scale}): {elapsed:.2f}s -> {result}")
+
+
+if __name__ == "__main__":
+    main()
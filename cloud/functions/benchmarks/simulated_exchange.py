@@ -0,0 +1,68 @@
+"""
+Load test: BetfairExchange.search_market and place_bets against the local exchange simulator.
+
+Seeds N synthetic markets, serves them with a per-call latency, then times a full
+search and a multi-market placement, printing wall time and API calls per method.
+Run from cloud/functions:
+
+    python benchmarks/simulated_exchange.py --markets 10000 --latency 0.05 --slip 3
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+os.environ["FUNCTIONS_EMULATOR"] = "false"
+
+from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=10000)
+    parser.add_argument("--competitions", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every API call")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slip", type=int, default=3, help="markets in the placed slip")
+    args = parser.parse_args()
+    logging.getLogger("core.logger").setLevel(logging.ERROR)
+
+    simulator = LocalExchangeSimulator(
+        seed_markets(args.markets, competitions=args.competitions),
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        error_codes=("SERVICE_BUSY",),
+    ).start()
+    try:
+        client = BetfairExchange(username="bench", password="bench", app_key="bench", certs_path="/tmp")
+        simulator.attach(client.client)
+        client.login()
+
+        started = time.perf_counter()
+        events = client.search_market("Soccer", max_results=args.markets)
+        search_seconds = time.perf_counter() - started
+        search_calls = dict(simulator.calls)
+        simulator.calls.clear()
+
+        markets = [event["options"][0] for event in events[:args.slip]]
+        bets = [
+            {"market_id": m["market_id"], "selection_id": m["options"][0]["selection_id"], "stake": 2.0, "odds": m["options"][0]["odds"]}
+            for m in markets
+        ]
+        started = time.perf_counter()
+        placed = client.place_bets(bets)
+        place_seconds = time.perf_counter() - started
+
+        print(f"{args.markets} markets, {args.latency * 1000:.0f} ms latency per call")
+        print(f"search_market: {len(events)} events in {search_seconds:.2f}s, calls {search_calls}")
+        print(f"place_bets:    {len(bets)} markets in {place_seconds * 1000:.0f} ms ({placed['status']}), "
+              f"latency per market {placed.get('market_latency_ms')}")
+    finally:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,11 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 OPEN_AI_API_KEY = os.getenv('OPEN_AI_API_KEY')
 FOOTBALL_DATA_API_KEY = os.getenv('FOOTBALL_DATA_API_KEY')
 
+# Record/replay of outbound HTTP traffic (core/traffic.py)
+TRAFFIC_MODE = os.getenv('TRAFFIC_MODE', 'off').lower()  # "record", "replay" or unset/"off"
+TRAFFIC_DIR = os.getenv('TRAFFIC_DIR', 'traffic')  # Directory holding bodies.bin and index.jsonl
+TRAFFIC_LATENCY_SCALE = float(os.getenv('TRAFFIC_LATENCY_SCALE', '1.0'))  # Replayed latency = recorded latency * scale
+
 # Automated betting configuration
 AUTOMATED_BETTING_OPTIONS = {
     "BANKROLL_PERCENT": 50,  # Percentage of balance to use for betting
@@ -14,10 +19,22 @@ AUTOMATED_BETTING_OPTIONS = {
     "MIN_STAKE": 0,         # Minimum stake per bet (Betfair requirement)
     "MIN_PROFIT": 0,        # Minimum profit per bet
     "MIN_MATCHED_LIQUIDITY": 0, # Minimum volume required on a market to participate
+    "MAX_SLIPPAGE_TICKS": 3,  # Ticks a price may move against a slip before its selection is dropped at placement
+    "MAX_PLACEMENT_ATTEMPTS": 3,  # Retried placement trigger runs per slip before it is marked rejected
     "DEFAULT_BUDGET": 100,
     "AUTOMATION_ENABLED": True # Toggle for all scheduled automated bets
 }
 
+# Follow-up of unmatched LAPSE orders after placement (core/modules/betting/orders)
+ORDER_MONITOR_OPTIONS = {
+    "LOOKBACK_HOURS": 24,         # Only slips placed this recently are monitored
+    "MAX_SLIPS": 200,             # Placed slips read per run
+    "REPRICE_AFTER_MINUTES": 10,  # Unmatched orders older than this move to the best available price
+    "FINAL_CALL_MINUTES": 15,     # Inside this window before kickoff, unmatched orders are re-priced at once
+    "MAX_REPLACES": 3,            # Re-prices per selection before its remainder is left to lapse
+    "MIN_TOP_UP_STAKE": 1.0,      # Smallest lapsed remainder worth placing again (Betfair minimum stake)
+}
+
 # Reliable teams by competition (competitions derived from keys at runtime)
 RELIABLE_TEAMS = {
     "English Premier League": [
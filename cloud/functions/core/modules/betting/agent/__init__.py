@@ -1,10 +1,12 @@
 import os
 from pathlib import Path
 from dataclasses import dataclass
+from typing import List
 from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.openai import OpenAIModel
 
-from ..models import BettingAgentResponse
+from core.traffic import openai_provider
+from ..models import BettingAgentResponse, SelectionRef
 from core.modules.wallet.service import WalletService
 from core.modules.betting.repository import BetRepository
 from core.modules.betting.betfair_service import BetfairService
@@ -17,7 +19,7 @@ class AgentDeps:
     betfair_service: BetfairService
 
 
-model = OpenAIModel(model_name="gpt-5-mini")
+model = OpenAIModel(model_name="gpt-5-mini", provider=openai_provider())
 
 # Get the absolute path to the prompt file
 prompt_path = Path(__file__).parent / "prompt.md"
@@ -61,3 +63,19 @@ def get_recent_bet_results_main(ctx: RunContext[AgentDeps], limit: int = 5) -> s
 def get_available_bet_size_main(ctx: RunContext[AgentDeps], market_id: str, selection_id: int) -> float:
     """Returns the available liquidity (size in GBP) currently waiting to be matched at the best available odds for a specific selection. You must not stake more than this amount."""
     return ctx.deps.betfair_service.get_market_liquidity(market_id, selection_id)
+
+
+@betting_agent.tool
+def get_available_bet_sizes_main(ctx: RunContext[AgentDeps], selections: List[SelectionRef]) -> List[dict]:
+    """Returns the available liquidity (size in GBP) currently waiting to be matched at the best available odds for every requested selection in one lookup. You must not stake more than the returned amount on a selection."""
+    liquidity = ctx.deps.betfair_service.get_market_liquidities(
+        [(s.market_id, s.selection_id) for s in selections]
+    )
+    return [
+        {
+            "market_id": s.market_id,
+            "selection_id": s.selection_id,
+            "available_size": liquidity.get((s.market_id, s.selection_id), 0.0),
+        }
+        for s in selections
+    ]
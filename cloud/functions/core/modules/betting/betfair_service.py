@@ -1,7 +1,12 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Type
 
 from core import logger
+from core.modules.betting.betfair_state_repository import BetfairStateRepository
 from third_party.betting_platforms.betfair_exchange import BetfairExchange
+from third_party.betting_platforms.betfair_exchange.governor import RequestGovernor, TransactionLedger
+from third_party.betting_platforms.betfair_exchange.resilience import Resilience
+from third_party.betting_platforms.betfair_exchange.reference_data import ReferenceDataCache
+from third_party.betting_platforms.betfair_exchange.session import SessionBroker
 
 
 class BetfairService:
@@ -11,25 +16,54 @@ class BetfairService:
     Function invocation (including read-only ones) triggered a Betfair API
     call. This service initialises the client lazily — only when a method
     that actually needs it is first called.
+
+    Pass `client_class=AsyncBetfairExchange` to serve the *_async methods over
+    HTTP/2; with the default client they run the blocking calls in a thread.
+
+    The reference-data cache, session broker, request governor and resilience
+    policy are meant to be built once per instance (see main.py) and passed to
+    every service, so warm invocations share them; any left out are created for
+    this service alone, backed by the same Firestore snapshots.
     """
 
-    def __init__(self):
+    def __init__(self, reference_data: Optional[ReferenceDataCache] = None, session_broker: Optional[SessionBroker] = None, client_class: Type[BetfairExchange] = BetfairExchange, governor: Optional[RequestGovernor] = None, resilience: Optional[Resilience] = None):
         self._client: Optional[BetfairExchange] = None
+        self._client_class = client_class
+        self._reference_data = reference_data
+        self._session_broker = session_broker
+        self._governor = governor
+        self._resilience = resilience
 
     @property
     def client(self) -> BetfairExchange:
         if self._client is None:
-            self._client = BetfairExchange()
+            reference_data = self._reference_data or ReferenceDataCache(store=BetfairStateRepository("reference_data"))
+            reference_data.warm_up()
+            self._client = self._client_class(
+                reference_data=reference_data,
+                session_broker=self._session_broker or SessionBroker(store=BetfairStateRepository("session")),
+                governor=self._governor or RequestGovernor(ledger=TransactionLedger(store=BetfairStateRepository("transactions"))),
+                resilience=self._resilience or Resilience(),
+            )
             self._client.login()
-            logger.info("Betfair client initialised and logged in")
+            logger.info("Betfair client initialised with a brokered session")
         return self._client
 
     def search_market(self, *args, **kwargs) -> List[Dict[str, Any]]:
         return self.client.search_market(*args, **kwargs)
 
+    def search_market_iter(self, *args, **kwargs) -> Iterator[List[Dict[str, Any]]]:
+        return self.client.search_market_iter(*args, **kwargs)
+
+    def open_market_stream(self, *args, **kwargs):
+        return self.client.open_market_stream(*args, **kwargs)
+
     def get_event_markets(self, *args, **kwargs) -> List[Dict[str, Any]]:
         return self.client.get_event_markets(*args, **kwargs)
 
+    def get_markets_for_events(self, *args, **kwargs) -> Dict[str, List[Dict[str, Any]]]:
+        return self.client.get_markets_for_events(*args, **kwargs)
+
     def place_bets(self, bets: List[Dict[str, Any]]) -> Dict[str, Any]:
         return self.client.place_bets(bets)
 
@@ -39,5 +73,44 @@ class BetfairService:
     def get_market_liquidity(self, market_id: str, selection_id: int) -> float:
         return self.client.get_market_liquidity(market_id, selection_id)
 
+    def get_market_liquidities(self, selections: List[Tuple[str, int]]) -> Dict[Tuple[str, int], float]:
+        return self.client.get_market_liquidities(selections)
+
+    def get_best_prices(self, selections: List[Tuple[str, int]]) -> Dict[Tuple[str, int], Dict[str, Optional[float]]]:
+        return self.client.get_best_prices(selections)
+
+    def estimate_fill_prices(self, market_ids: List[str], stake: float, side: str = 'BACK') -> Dict[Tuple[str, int], Dict[str, Any]]:
+        return self.client.estimate_fill_prices(market_ids, stake, side)
+
+    def get_order_states(self, bet_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return self.client.get_order_states(bet_ids)
+
+    def list_current_orders(self, bet_ids: Optional[List[str]] = None, customer_order_refs: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        return self.client.list_current_orders(bet_ids, customer_order_refs)
+
+    def cancel_orders(self, market_id: str, bet_ids: List[str]) -> Dict[str, float]:
+        return self.client.cancel_orders(market_id, bet_ids)
+
+    def replace_orders(self, market_id: str, new_prices: Dict[str, float]) -> Dict[str, Dict[str, Any]]:
+        return self.client.replace_orders(market_id, new_prices)
+
     def list_cleared_orders(self, *args, **kwargs) -> List[Dict[str, Any]]:
         return self.client.list_cleared_orders(*args, **kwargs)
+
+    async def search_market_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return await self.client.search_market_async(*args, **kwargs)
+
+    async def get_event_markets_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return await self.client.get_event_markets_async(*args, **kwargs)
+
+    async def get_markets_for_events_async(self, *args, **kwargs) -> Dict[str, List[Dict[str, Any]]]:
+        return await self.client.get_markets_for_events_async(*args, **kwargs)
+
+    async def place_bets_async(self, bets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self.client.place_bets_async(bets)
+
+    async def list_cleared_orders_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return await self.client.list_cleared_orders_async(*args, **kwargs)
+
+    async def get_balance_async(self) -> Dict[str, Any]:
+        return await self.client.get_balance_async()
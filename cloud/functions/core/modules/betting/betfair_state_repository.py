@@ -0,0 +1,29 @@
+from typing import Any, Dict, Optional
+
+from core.modules.shared.repository import BaseRepository
+
+
+class BetfairStateRepository(BaseRepository):
+    """
+    Repository for small pieces of Betfair client state shared across function instances.
+
+    Each instance wraps a single document in the 'betfair_state' collection and exposes
+    the load/save pair expected by the exchange client's snapshot stores.
+    """
+
+    COLLECTION_NAME = "betfair_state"
+
+    def __init__(self, doc_id: str):
+        super().__init__(self.COLLECTION_NAME)
+        self.doc_id = doc_id
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Return the stored snapshot, or None if it has never been saved."""
+        data = self.get(self.doc_id)
+        if data:
+            data.pop("id", None)
+        return data
+
+    def save(self, data: Dict[str, Any]) -> None:
+        """Replace the stored snapshot."""
+        self.set(self.doc_id, data, merge=False)
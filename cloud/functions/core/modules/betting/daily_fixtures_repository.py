@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterable, List, Dict, Any, Optional, Tuple
 
 from core import logger
 from core.firestore import get_db
@@ -28,6 +28,18 @@ class DailyFixturesRepository:
         if not games:
             return 0
 
+        return self.batch_save_fixture_chunks(date_str, [games])
+
+    def batch_save_fixture_chunks(self, date_str: str, chunks: Iterable[List[Dict[str, Any]]], on_chunk_saved: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Streaming counterpart of batch_save_fixtures: persists each chunk of games as it arrives.
+
+        Existing analysis statuses are loaded once up front and every chunk is committed
+        before the next one is pulled, so a generator such as search_market_iter can feed
+        writes while later pages are still being fetched from Betfair. `on_chunk_saved`
+        is called with each committed chunk's saved count, so callers still know what
+        was stored if `chunks` raises partway through.
+        """
         games_col = self._get_games_collection(date_str)
 
         # Load analysis_status for all existing docs in one pass.
@@ -36,6 +48,20 @@ class DailyFixturesRepository:
         for doc in games_col.select(['analysis_status']).stream():
             existing_statuses[doc.id] = (doc.to_dict() or {}).get('analysis_status', '')
 
+        added_count = 0
+        skipped_count = 0
+        for games in chunks:
+            added, skipped = self._write_games(games_col, games, existing_statuses)
+            added_count += added
+            skipped_count += skipped
+            if on_chunk_saved:
+                on_chunk_saved(added)
+
+        logger.info(f"Saved/Updated {added_count} fixtures for {date_str} (skipped {skipped_count} completed/failed)")
+        return added_count
+
+    def _write_games(self, games_col, games: List[Dict[str, Any]], existing_statuses: Dict[str, str]) -> Tuple[int, int]:
+        """Write one chunk of games in Firestore batches. Returns (added_count, skipped_count)."""
         TERMINAL_STATUSES = {'completed', 'failed'}
 
         batch = self.db.batch()
@@ -91,6 +117,7 @@ class DailyFixturesRepository:
             # Only set analysis_status on brand-new documents
             if event_id not in existing_statuses:
                 game_doc["analysis_status"] = "pending"
+                existing_statuses[event_id] = "pending"
 
             batch.set(doc_ref, game_doc, merge=True)
             batch_size += 1
@@ -104,10 +131,8 @@ class DailyFixturesRepository:
         if batch_size > 0:
             batch.commit()
 
-        logger.info(f"Saved/Updated {added_count} fixtures for {date_str} (skipped {skipped_count} completed/failed)")
-        return added_count
+        return added_count, skipped_count
 
-        
     def get_fixtures_for_date(self, date_str: str) -> List[Dict[str, Any]]:
         """Retrieves all fixtures for a specific date."""
         games_col = self._get_games_collection(date_str)
@@ -9,6 +9,7 @@ Domain service locations:
   analysis    → core/modules/betting/analysis/service.py
   automation  → core/modules/betting/automation/service.py
   placement   → core/modules/betting/placement/service.py
+  orders      → core/modules/betting/orders/service.py
   settlement  → core/modules/betting/settlement/service.py
 """
 
@@ -20,6 +21,7 @@ from core.timestamps import server_timestamp
 from core.modules.betting.analysis.service import BettingAnalysisService
 from core.modules.betting.automation.service import AutomatedBettingService
 from core.modules.betting.placement.service import BetPlacementService
+from core.modules.betting.orders.service import OrderMonitorService
 from core.modules.betting.settlement.service import BetSettlementService
 from core.modules.betting.models import (
     AnalyzeBetsRequest,
@@ -51,6 +53,7 @@ class BettingManager:
         daily_fixtures_repo=None,
         learnings_manager=None,
         wallet_service=None,
+        placement_ledger=None,
     ):
         betfair = betfair_service or BetfairService()
         repo = bet_repo or BetRepository()
@@ -71,6 +74,13 @@ class BettingManager:
             bet_repo=repo,
             settings_manager=settings,
             wallet_service=wallet,
+            placement_ledger=placement_ledger,
+        )
+        self._orders = OrderMonitorService(
+            betfair_service=betfair,
+            bet_repo=repo,
+            settings_manager=settings,
+            placement_service=self._placement,
         )
         self._settlement = BetSettlementService(
             betfair_service=betfair,
@@ -161,10 +171,28 @@ class BettingManager:
         """
         date_str = target_date or datetime.now(timezone.utc).date().isoformat()
 
-        games = self.get_all_upcoming_games(date=date_str, competitions=[], max_results=10000)
+        logger.info(f"Streaming upcoming games for competitions: ALL on date: {date_str}")
+        saved_counts: List[int] = []
+        try:
+            chunks = (
+                self._annotate_games(games)
+                for games in self.betfair.search_market_iter(
+                    sport=None, competitions=[], date=date_str, max_results=10000
+                )
+            )
+            count = self._daily_fixtures_repo_instance.batch_save_fixture_chunks(
+                date_str, chunks, on_chunk_saved=saved_counts.append
+            )
+        except Exception as e:
+            # Chunks committed before the failure stay stored; report them.
+            count = sum(saved_counts)
+            logger.error(
+                f"Error streaming daily fixtures for {date_str} after storing {count} fixtures: {e}",
+                exc_info=True,
+            )
+            return {"status": "partial", "count": count, "date": date_str, "error": str(e)}
 
-        if games:
-            count = self._daily_fixtures_repo_instance.batch_save_fixtures(date_str, games)
+        if count:
             logger.info(f"Successfully stored {count} daily fixtures for {date_str}.")
             return {"status": "success", "count": count, "date": date_str}
 
@@ -221,6 +249,13 @@ class BettingManager:
     def mark_bet_rejected(self, bet_id: str, error: str) -> None:
         return self._placement.mark_bet_rejected(bet_id, error)
 
+    # ------------------------------------------------------------------
+    # Order monitoring
+    # ------------------------------------------------------------------
+
+    def monitor_orders(self) -> Dict[str, Any]:
+        return self._orders.monitor_orders()
+
     # ------------------------------------------------------------------
     # Settlement
     # ------------------------------------------------------------------
@@ -239,7 +274,6 @@ class BettingManager:
         competitions: Optional[List[str]] = None,
         max_results: int = 200,
     ) -> List[Dict[str, Any]]:
-        from constants import RELIABLE_ALL_TEAMS
         # competitions=None means "all competitions" (no filter).
         # Callers that want to restrict pass an explicit list.
         logger.info(
@@ -251,24 +285,29 @@ class BettingManager:
                 sport=sport, competitions=competitions, date=date, max_results=max_results
             )
             games.sort(key=lambda x: x["time"])
-
-            reliable_set = {t.lower() for t in RELIABLE_ALL_TEAMS}
-            for game in games:
-                name: str = game.get("name", "")
-                # Events are formatted as "Home v Away"
-                parts = [p.strip().lower() for p in name.replace(" vs ", " v ").split(" v ")]
-                game["has_reliable_team"] = any(p in reliable_set for p in parts)
-                
-                # Check if the competition is reliable
-                comp = game.get("competition", {})
-                comp_name = comp.get("name") if isinstance(comp, dict) else comp
-                game["is_reliable_competition"] = comp_name in RELIABLE_COMPETITIONS if comp_name else False
-
-            return games
+            return self._annotate_games(games)
         except Exception as e:
             logger.error(f"Error fetching upcoming games: {e}", exc_info=True)
             return []
 
+    @staticmethod
+    def _annotate_games(games: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Flag games that involve a reliable team or belong to a reliable competition."""
+        from constants import RELIABLE_ALL_TEAMS
+        reliable_set = {t.lower() for t in RELIABLE_ALL_TEAMS}
+        for game in games:
+            name: str = game.get("name", "")
+            # Events are formatted as "Home v Away"
+            parts = [p.strip().lower() for p in name.replace(" vs ", " v ").split(" v ")]
+            game["has_reliable_team"] = any(p in reliable_set for p in parts)
+            
+            # Check if the competition is reliable
+            comp = game.get("competition", {})
+            comp_name = comp.get("name") if isinstance(comp, dict) else comp
+            game["is_reliable_competition"] = comp_name in RELIABLE_COMPETITIONS if comp_name else False
+
+        return games
+
 
     def get_odds(self, request: GetOddsRequest) -> Dict[str, Any]:
         return self.betfair.search_market(
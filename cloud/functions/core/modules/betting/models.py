@@ -53,6 +53,12 @@ class MatchIntelligenceReport(BaseModel):
 
 
 
+class SelectionRef(BaseModel):
+    """A market selection the betting agent asks about (e.g. for liquidity)."""
+    market_id: str = Field(..., description="Exact market_id string from the input data")
+    selection_id: int = Field(..., description="Exact selection_id integer from the input data")
+
+
 class BettingAgentResponse(BaseModel):
     class BetRecommendation(BaseModel):
         class Pick(BaseModel):
@@ -104,5 +110,6 @@ class PlaceBetRequest(BaseModel):
         market_name: Optional[str] = Field(None, description="Name of the market (e.g. Over 2.5 Goals)")
         selection_name: Optional[str] = Field(None, description="Name of the selection (e.g. Under 4.5)")
         event: Optional[dict] = Field(None, description="Event information {name, time, competition: {name}}")
+        customer_order_ref: Optional[str] = Field(None, max_length=32, description="Idempotency reference sent to Betfair with the order")
     
     bets: List[BetOrder] = Field(..., min_length=1, description="List of bets to place")
@@ -0,0 +1,353 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from constants import ORDER_MONITOR_OPTIONS
+from core import logger
+from core.modules.betting.repository import BetRepository
+from core.modules.betting.betfair_service import BetfairService
+from core.modules.betting.placement.service import BetPlacementService, customer_order_ref
+from core.modules.settings.manager import SettingsManager
+from third_party.betting_platforms.betfair_exchange.ticks import snap_price, ticks_between
+
+
+# Fields of a current order copied onto its placement_results entry on every run.
+ORDER_STATE_FIELDS = ("size_matched", "size_remaining", "size_lapsed", "size_cancelled", "average_price_matched")
+
+
+class OrderMonitorService:
+    """
+    Follows up LAPSE orders after placement, so unmatched stakes do not wait for someone to notice.
+
+    Each run reads the current state of every live order on recently placed slips in one
+    batched list_current_orders lookup, prices the selections that still have stake to
+    fill in one packed book fetch, and applies the policy in `decide`:
+
+    - a remainder whose price has moved more than the slippage tolerance
+      (settings.max_slippage_ticks) away from the slip's odds is cancelled;
+    - a remainder left unmatched for REPRICE_AFTER_MINUTES, or still unmatched inside
+      FINAL_CALL_MINUTES of kickoff, is replaced at the best available price
+      (at most MAX_REPLACES times per selection);
+    - stake the exchange lapsed before kickoff is topped up with a new order at the
+      best available price.
+
+    Top-ups go through the placement service's idempotent path, keyed by the lapsed
+    bet ID, so a run whose slip write was lost recovers the earlier top-up from the
+    placement ledger (or Betfair's current orders) instead of placing it again.
+    Order state goes back into placement_results (replacements and top-ups are appended,
+    so settlement still sees every bet ID) and fill progress into each slip item's `fill`.
+    """
+
+    def __init__(
+        self,
+        betfair_service: BetfairService,
+        bet_repo: BetRepository,
+        settings_manager: SettingsManager,
+        placement_service: BetPlacementService,
+    ):
+        self.betfair = betfair_service
+        self.repo = bet_repo
+        self.settings_manager = settings_manager
+        self.placement = placement_service
+
+    def monitor_orders(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Sync, cancel, re-price or top up the live orders of recently placed slips."""
+        now = now or datetime.now(timezone.utc)
+        slips = self._recent_slips(now)
+        tracked = {
+            order["bet_id"]: (slip, order)
+            for slip in slips
+            for order in slip.get("placement_results", {}).get("bets", [])
+            if self._is_tracked(order)
+        }
+        if not tracked:
+            logger.info("No live orders to monitor.")
+            return {"status": "no_live_orders"}
+
+        states = self.betfair.list_current_orders(list(tracked))
+        open_orders = [
+            bet_id for bet_id, state in states.items()
+            if state["size_remaining"] > 0 or (state["size_lapsed"] > 0 and not tracked[bet_id][1].get("topped_up_by"))
+        ]
+        prices = self.betfair.get_best_prices(list(dict.fromkeys(
+            (states[bet_id]["market_id"], states[bet_id]["selection_id"]) for bet_id in open_orders
+        ))) if open_orders else {}
+
+        max_slippage_ticks = self.settings_manager.get_betting_settings().max_slippage_ticks
+        actions: Dict[str, List[Tuple[str, Optional[float]]]] = defaultdict(list)
+        decisions = {}
+        for bet_id, state in states.items():
+            slip, order = tracked[bet_id]
+            item = self._slip_item(slip, state["market_id"], state["selection_id"])
+            side_prices = prices.get((state["market_id"], state["selection_id"]), {})
+            current = side_prices.get("back" if state["side"] == "BACK" else "lay")
+            action, price = self.decide(state, order, item, self._kickoff(slip, item), current, max_slippage_ticks, now)
+            decisions[bet_id] = (action, price)
+            actions[action].append((bet_id, price))
+
+        results = self._apply(actions, states, {bet_id: slip["id"] for bet_id, (slip, _) in tracked.items()})
+        summary = {"status": "success", "orders": len(states), "slips_updated": 0}
+        summary.update({action: len(bet_ids) for action, bet_ids in actions.items() if action != "hold"})
+
+        for slip in slips:
+            if self._update_slip(slip, states, decisions, results, now):
+                summary["slips_updated"] += 1
+        logger.info(f"Order monitor run complete: {summary}")
+        return summary
+
+    def decide(
+        self,
+        state: Dict[str, Any],
+        order: Dict[str, Any],
+        item: Optional[dict],
+        kickoff: Optional[datetime],
+        current_price: Optional[float],
+        max_slippage_ticks: int,
+        now: datetime,
+    ) -> Tuple[str, Optional[float]]:
+        """Return ('hold' | 'cancel' | 'replace' | 'top_up', price) for one order's current `state`."""
+        if kickoff and now >= kickoff:
+            # LAPSE orders lapse at the off; nothing is worth re-pricing in play.
+            return "hold", None
+        lapsed_to_top_up = state["size_remaining"] <= 0 and state["size_lapsed"] > 0 and not order.get("topped_up_by")
+        if current_price is None or (state["size_remaining"] <= 0 and not lapsed_to_top_up):
+            return "hold", None
+
+        current_price = snap_price(current_price, "down" if state["side"] == "BACK" else "up")
+        requested = ((item or {}).get("price_refresh") or {}).get("requested_odds") or (item or {}).get("odds") or state["price"]
+        # Ticks the market has moved against the slip's odds: shorter for a back, longer for a lay.
+        if state["side"] == "BACK":
+            slippage = ticks_between(current_price, requested)
+        else:
+            slippage = ticks_between(requested, current_price)
+        within_tolerance = slippage <= max_slippage_ticks
+
+        if lapsed_to_top_up:
+            if within_tolerance and state["size_lapsed"] >= ORDER_MONITOR_OPTIONS["MIN_TOP_UP_STAKE"]:
+                return "top_up", current_price
+            return "hold", None
+        if not within_tolerance:
+            return "cancel", None
+        if current_price == state["price"] or order.get("replace_count", 0) >= ORDER_MONITOR_OPTIONS["MAX_REPLACES"]:
+            return "hold", None
+
+        placed = self._parse_time(state.get("placed_date"))
+        stale = placed is not None and now - placed >= timedelta(minutes=ORDER_MONITOR_OPTIONS["REPRICE_AFTER_MINUTES"])
+        final_call = kickoff is not None and kickoff - now <= timedelta(minutes=ORDER_MONITOR_OPTIONS["FINAL_CALL_MINUTES"])
+        return ("replace", current_price) if stale or final_call else ("hold", None)
+
+    def _apply(
+        self,
+        actions: Dict[str, List[Tuple[str, Optional[float]]]],
+        states: Dict[str, Dict[str, Any]],
+        slip_ids: Dict[str, str],
+    ) -> Dict[str, Dict[str, Any]]:
+        """Send the cancels and replaces (one call per market) and the top-ups (one placement per slip); returns results per bet ID."""
+        results: Dict[str, Dict[str, Any]] = {}
+
+        cancels = defaultdict(list)
+        for bet_id, _ in actions.get("cancel", []):
+            cancels[states[bet_id]["market_id"]].append(bet_id)
+        for market_id, bet_ids in cancels.items():
+            try:
+                for bet_id, size in self.betfair.cancel_orders(market_id, bet_ids).items():
+                    results[bet_id] = {"cancelled": size}
+            except Exception as e:
+                logger.error(f"Failed to cancel {len(bet_ids)} orders on {market_id}: {e}")
+
+        replaces = defaultdict(dict)
+        for bet_id, price in actions.get("replace", []):
+            replaces[states[bet_id]["market_id"]][bet_id] = price
+        for market_id, new_prices in replaces.items():
+            try:
+                for bet_id, new_order in self.betfair.replace_orders(market_id, new_prices).items():
+                    results[bet_id] = {"replaced_by": new_order}
+            except Exception as e:
+                logger.error(f"Failed to re-price {len(new_prices)} orders on {market_id}: {e}")
+
+        top_ups = defaultdict(list)
+        for bet_id, price in actions.get("top_up", []):
+            bet = {
+                "market_id": states[bet_id]["market_id"],
+                "selection_id": states[bet_id]["selection_id"],
+                "stake": states[bet_id]["size_lapsed"],
+                "odds": price,
+                "side": states[bet_id]["side"],
+            }
+            # A lapsed order is topped up at most once, so its bet ID keys the new order's ref.
+            bet["customer_order_ref"] = customer_order_ref(bet_id, 0, bet)
+            top_ups[slip_ids[bet_id]].append((bet_id, bet))
+        for slip_id, slip_top_ups in top_ups.items():
+            try:
+                placed = self.placement.place_idempotent(slip_id, [bet for _, bet in slip_top_ups])
+                reports = {report.get("customer_order_ref"): report for report in placed.get("bets", [])}
+                for bet_id, bet in slip_top_ups:
+                    report = reports.get(bet["customer_order_ref"]) or {}
+                    if report.get("bet_id"):
+                        results[bet_id] = {"topped_up_by": {
+                            "bet_id": report["bet_id"],
+                            "price": bet["odds"],
+                            "size": bet["stake"],
+                            "size_matched": report.get("size_matched") or 0.0,
+                            "average_price_matched": report.get("average_price_matched") or 0.0,
+                            "customer_order_ref": bet["customer_order_ref"],
+                        }}
+            except Exception as e:
+                logger.error(f"Failed to top up {len(slip_top_ups)} lapsed orders on {slip_id}: {e}")
+        return results
+
+    def _update_slip(
+        self,
+        slip: Dict[str, Any],
+        states: Dict[str, Dict[str, Any]],
+        decisions: Dict[str, Tuple[str, Optional[float]]],
+        results: Dict[str, Dict[str, Any]],
+        now: datetime,
+    ) -> bool:
+        """
+        Write order state and fill progress back to one slip; returns False when nothing changed.
+
+        The merge runs in a transaction against the slip as stored, so replacement and
+        top-up orders are never lost to a concurrent settlement write.
+        """
+        if not any(order.get("bet_id") in states for order in slip.get("placement_results", {}).get("bets", [])):
+            return False
+        return bool(self.repo.update_bet_transactionally(
+            slip["id"], lambda current: self._slip_update(current, states, decisions, results, now)
+        ))
+
+    def _slip_update(
+        self,
+        slip: Dict[str, Any],
+        states: Dict[str, Dict[str, Any]],
+        decisions: Dict[str, Tuple[str, Optional[float]]],
+        results: Dict[str, Dict[str, Any]],
+        now: datetime,
+    ) -> Optional[Dict[str, Any]]:
+        """The placement_results and selections update for one slip, or None when nothing changed."""
+        placement_results = slip.get("placement_results", {})
+        orders = []
+        changed = False
+        for order in placement_results.get("bets", []):
+            state = states.get(order.get("bet_id"))
+            if state is None:
+                orders.append(order)
+                continue
+            synced = {**order, **{field: state[field] for field in ORDER_STATE_FIELDS}, "order_status": state["status"]}
+            result = results.get(order["bet_id"], {})
+            new_order = None
+            if "cancelled" in result:
+                synced["size_remaining"] = 0.0
+                synced["size_cancelled"] = round(state["size_cancelled"] + result["cancelled"], 2)
+                synced["order_status"] = "EXECUTION_COMPLETE"
+                synced["monitor_action"] = "cancelled"
+            elif "replaced_by" in result:
+                new_order = result["replaced_by"]
+                synced.update(size_remaining=0.0, order_status="EXECUTION_COMPLETE", replaced_by=new_order["bet_id"], monitor_action="replaced")
+                new_order = {**new_order, "replaces": order["bet_id"], "replace_count": order.get("replace_count", 0) + 1}
+            elif "topped_up_by" in result:
+                new_order = result["topped_up_by"]
+                synced.update(topped_up_by=new_order["bet_id"], monitor_action="topped_up")
+                new_order = {**new_order, "top_up_of": order["bet_id"], "replace_count": order.get("replace_count", 0)}
+            elif decisions.get(order["bet_id"], ("hold",))[0] != "hold":
+                synced["monitor_action"] = f"{decisions[order['bet_id']][0]}_failed"
+            if synced != order:
+                changed = True
+            orders.append(synced)
+            if new_order:
+                remaining = round(new_order["size"] - new_order["size_matched"], 2)
+                new_order.pop("status", None)
+                orders.append({
+                    "market_id": state["market_id"],
+                    "selection_id": state["selection_id"],
+                    "status": "SUCCESS",
+                    "order_status": "EXECUTABLE" if remaining > 0 else "EXECUTION_COMPLETE",
+                    "size_remaining": max(remaining, 0.0),
+                    "placed_at": now,
+                    **new_order,
+                })
+
+        if not changed:
+            return None
+
+        selections_data = slip.get("selections", [])
+        items = selections_data.get("items", []) if isinstance(selections_data, dict) else selections_data
+        for item in items:
+            self._record_fill(item, orders, now)
+        return {
+            "placement_results": {**placement_results, "bets": orders},
+            "selections": {"items": items} if isinstance(selections_data, dict) else items,
+        }
+
+    @staticmethod
+    def _record_fill(item: dict, orders: List[Dict[str, Any]], now: datetime) -> None:
+        """Sum the matched and live stake of every order placed for `item` into item['fill']."""
+        key = (str(item.get("market_id")), str(item.get("selection_id")))
+        item_orders = [o for o in orders if (str(o.get("market_id")), str(o.get("selection_id"))) == key and o.get("bet_id")]
+        if not item_orders:
+            return
+        matched = round(sum(o.get("size_matched") or 0.0 for o in item_orders), 2)
+        notional = sum((o.get("size_matched") or 0.0) * (o.get("average_price_matched") or 0.0) for o in item_orders)
+        stake = item.get("stake") or 0.0
+        actions = [o["monitor_action"] for o in item_orders if o.get("monitor_action")]
+        item["fill"] = {
+            "size_matched": matched,
+            "size_remaining": round(sum(
+                o.get("size_remaining", 0.0) for o in item_orders if o.get("order_status") != "EXECUTION_COMPLETE"
+            ), 2),
+            "average_price_matched": round(notional / matched, 2) if matched else None,
+            "fill_rate": round(matched / stake, 4) if stake else None,
+            "orders": len(item_orders),
+            "last_action": actions[-1] if actions else None,
+            "updated_at": now,
+        }
+
+    def _recent_slips(self, now: datetime) -> List[Dict[str, Any]]:
+        since = now - timedelta(hours=ORDER_MONITOR_OPTIONS["LOOKBACK_HOURS"])
+        slips = self.repo.get_placed_bets(limit=ORDER_MONITOR_OPTIONS["MAX_SLIPS"])
+        return [
+            slip for slip in slips
+            if not isinstance(slip.get("placed_at"), datetime) or self._as_utc(slip["placed_at"]) >= since
+        ]
+
+    @staticmethod
+    def _is_tracked(order: Dict[str, Any]) -> bool:
+        """Orders the exchange may still act on, or whose lapsed stake has not been topped up yet."""
+        bet_id = order.get("bet_id")
+        if not bet_id or str(bet_id).startswith("mock_") or order.get("replaced_by") or order.get("monitor_action") == "cancelled":
+            return False
+        if order.get("order_status") != "EXECUTION_COMPLETE":
+            return True
+        return bool(order.get("size_lapsed")) and not order.get("topped_up_by")
+
+    @staticmethod
+    def _slip_item(slip: Dict[str, Any], market_id: str, selection_id: int) -> Optional[dict]:
+        selections_data = slip.get("selections", [])
+        items = selections_data.get("items", []) if isinstance(selections_data, dict) else selections_data
+        return next((
+            item for item in items
+            if str(item.get("market_id")) == str(market_id) and str(item.get("selection_id")) == str(selection_id)
+        ), None)
+
+    def _kickoff(self, slip: Dict[str, Any], item: Optional[dict]) -> Optional[datetime]:
+        """Start time of the item's event, or of the slip's only event."""
+        event_time = ((item or {}).get("event") or {}).get("time")
+        events = slip.get("events") or []
+        if not event_time and len(events) == 1:
+            event_time = (events[0] or {}).get("time")
+        return self._parse_time(event_time)
+
+    @classmethod
+    def _parse_time(cls, value: Any) -> Optional[datetime]:
+        if isinstance(value, datetime):
+            return cls._as_utc(value)
+        if not value:
+            return None
+        try:
+            return cls._as_utc(datetime.fromisoformat(str(value).replace("Z", "+00:00")))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
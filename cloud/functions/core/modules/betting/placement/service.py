@@ -1,3 +1,4 @@
+import hashlib
 import os
 import uuid
 from datetime import datetime, timezone
@@ -7,9 +8,17 @@ from core import logger
 from core.timestamps import server_timestamp
 from core.modules.betting.models import PlaceBetRequest
 from core.modules.betting.repository import BetRepository
+from core.modules.betting.placement_ledger_repository import PlacementLedgerRepository
 from core.modules.settings.manager import SettingsManager
 from core.modules.wallet.service import WalletService
 from core.modules.betting.betfair_service import BetfairService
+from third_party.betting_platforms.betfair_exchange.ticks import snap_price, ticks_between
+
+
+def customer_order_ref(slip_id: str, index: int, bet: dict) -> str:
+    """Deterministic Betfair customerOrderRef (32 hex chars) for the slip item at `index`."""
+    key = f"{slip_id}|{index}|{bet['market_id']}|{bet['selection_id']}|{bet.get('side') or 'BACK'}"
+    return hashlib.sha1(key.encode()).hexdigest()[:32]
 
 
 class BetPlacementService:
@@ -21,17 +30,65 @@ class BetPlacementService:
         bet_repo: BetRepository,
         settings_manager: SettingsManager,
         wallet_service: WalletService,
+        placement_ledger: Optional[PlacementLedgerRepository] = None,
     ):
         self.betfair = betfair_service
         self.repo = bet_repo
         self.settings_manager = settings_manager
         self.wallet_service = wallet_service
+        self.ledger = placement_ledger or PlacementLedgerRepository()
 
     def _is_valid_bet(self, stake: float, odds: float) -> bool:
         """Return True if a bet meets the minimum stake and profit requirements."""
         settings = self.settings_manager.get_betting_settings()
         return stake >= settings.min_stake and stake * (odds - 1) >= settings.min_profit
 
+    def refresh_prices(self, items: List[dict], max_slippage_ticks: int) -> List[dict]:
+        """
+        Re-price slip items against the current books before placement.
+
+        Current prices for every selection come from one packed book fetch. Each item is
+        moved to the best price now on offer (best back for BACK, best lay for LAY) when
+        that is at most `max_slippage_ticks` ticks worse than the slip's odds, and dropped
+        otherwise or when its runner has no price. The outcome is recorded on each item
+        under `price_refresh`; returns the items that are still to be placed.
+        """
+        prices = self.betfair.get_best_prices([
+            (item.get("market_id"), int(item.get("selection_id"))) for item in items
+        ])
+
+        kept = []
+        for item in items:
+            odds = item["odds"]
+            side = item.get("side", "BACK")
+            current = prices.get((item.get("market_id"), int(item.get("selection_id"))), {}).get(
+                "back" if side == "BACK" else "lay"
+            )
+            if current is None:
+                item["price_refresh"] = {"requested_odds": odds, "current_odds": None, "status": "dropped"}
+                logger.warning(f"Dropping selection {item.get('selection_id')} on {item.get('market_id')}: no current price")
+                continue
+
+            current = snap_price(current, "down" if side == "BACK" else "up")
+            # Positive when the price moved against us: shorter for a back, longer for a lay.
+            slippage = ticks_between(current, odds) if side == "BACK" else ticks_between(odds, current)
+            status = "dropped" if slippage > max_slippage_ticks else "unchanged" if current == odds else "repriced"
+            item["price_refresh"] = {
+                "requested_odds": odds,
+                "current_odds": current,
+                "delta": round(current - odds, 2),
+                "delta_ticks": ticks_between(odds, current),
+                "status": status,
+            }
+            if status == "dropped":
+                logger.warning(
+                    f"Dropping selection {item.get('selection_id')} on {item.get('market_id')}: "
+                    f"{odds} moved to {current} ({slippage} ticks against, tolerance {max_slippage_ticks})"
+                )
+                continue
+            kept.append({**item, "odds": current})
+        return kept
+
     def place_bet(self, request: PlaceBetRequest) -> Dict[str, Any]:
         """
         Submit bets to Betfair Exchange.
@@ -50,6 +107,7 @@ class BetPlacementService:
                         "bet_id": f"mock_local_{uuid.uuid4()}",
                         "average_price_matched": bet.odds,
                         "size_matched": bet.stake,
+                        **({"customer_order_ref": bet.customer_order_ref} if bet.customer_order_ref else {}),
                     }
                     for bet in request.bets
                 ],
@@ -60,6 +118,85 @@ class BetPlacementService:
         logger.info(f"Bet placement response: {result}")
         return result
 
+    def place_idempotent(self, slip_id: str, bets: List[dict], entries: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Place a slip's bets so that re-running the placement never doubles an order.
+
+        Every bet carries a deterministic customer_order_ref (derived from its position
+        in `bets` when missing) and a placement ledger entry keyed by it, written as
+        'pending' before the order is sent and as 'placed' or 'failed' once Betfair
+        answers. On a retry, bets already 'placed' reuse their ledger result; bets left
+        'pending' (the previous attempt died mid-flight) are looked up in Betfair's
+        current orders by ref and only re-sent if Betfair never received them.
+        Recovered results are flagged `reconciled`. `entries` are the ledger entries
+        when the caller has already read them.
+        """
+        bets = [
+            {**bet, "customer_order_ref": bet.get("customer_order_ref") or customer_order_ref(slip_id, index, bet)}
+            for index, bet in enumerate(bets)
+        ]
+        if entries is None:
+            entries = self.ledger.get_entries([bet["customer_order_ref"] for bet in bets])
+
+        recovered = {
+            ref: {**entry["result"], "reconciled": True}
+            for ref, entry in entries.items()
+            if entry.get("status") == "placed" and entry.get("result")
+        }
+        pending = [ref for ref, entry in entries.items() if entry.get("status") == "pending"]
+        if pending and os.environ.get("FUNCTIONS_EMULATOR") != "true":
+            for order in self.betfair.list_current_orders(customer_order_refs=pending).values():
+                ref = order.get("customer_order_ref")
+                if ref not in pending or ref in recovered:
+                    continue
+                result = {
+                    "market_id": order["market_id"],
+                    "selection_id": order["selection_id"],
+                    "status": "SUCCESS",
+                    "bet_id": order["bet_id"],
+                    "average_price_matched": order.get("average_price_matched"),
+                    "size_matched": order.get("size_matched"),
+                    "customer_order_ref": ref,
+                }
+                self.ledger.record(ref, {"status": "placed", "bet_id": order["bet_id"], "result": result})
+                recovered[ref] = {**result, "reconciled": True}
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} already placed order(s) for {slip_id} from the placement ledger")
+
+        to_place = [bet for bet in bets if bet["customer_order_ref"] not in recovered]
+        placed, unmatched, status = {}, [], "SUCCESS"
+        if to_place:
+            for bet in to_place:
+                self.ledger.record(bet["customer_order_ref"], {
+                    "status": "pending",
+                    "slip_id": slip_id,
+                    "market_id": bet["market_id"],
+                    "selection_id": bet["selection_id"],
+                    "side": bet.get("side", "BACK"),
+                    "stake": bet["stake"],
+                    "odds": bet["odds"],
+                })
+            result = self.place_bet(request=PlaceBetRequest(bets=to_place))
+            status = result.get("status", "SUCCESS")
+            for bet_result in result.get("bets", []):
+                ref = bet_result.get("customer_order_ref")
+                if not ref:
+                    unmatched.append(bet_result)
+                    continue
+                placed[ref] = bet_result
+                if bet_result.get("status") == "SUCCESS" and bet_result.get("bet_id"):
+                    self.ledger.record(ref, {"status": "placed", "bet_id": bet_result["bet_id"], "result": bet_result})
+                else:
+                    self.ledger.record(ref, {"status": "failed", "error_code": bet_result.get("error_code")})
+
+        if recovered and status != "SUCCESS":
+            status = "PARTIAL_FAILURE"
+        results = [
+            recovered.get(bet["customer_order_ref"]) or placed.get(bet["customer_order_ref"])
+            for bet in bets
+        ]
+        return {"status": status, "bets": [r for r in results if r] + unmatched}
+
     def update_placement_result(self, bet_id: str, placement_result: Dict[str, Any]) -> None:
         """Write Betfair placement results back to the bet document."""
         status = placement_result.get("status", "SUCCESS")
@@ -108,6 +245,13 @@ class BetPlacementService:
         """
         Validate selections from a 'ready' bet document, filter invalid ones,
         place valid bets on Betfair, and write the result back to Firestore.
+
+        Slip odds can be hours old, so outside the emulator each selection is first
+        re-priced against the current books (`refresh_prices`) and the price deltas are
+        saved on the slip's items. Bets go through `place_idempotent`, so the trigger
+        can safely be retried after a failure: the placement ledger is read first, and
+        selections a previous attempt already sent skip re-pricing and the slippage
+        check, so their live orders are always reconciled into placement_results.
         """
         selections_data = after_data.get("selections", [])
         selections = (
@@ -120,30 +264,60 @@ class BetPlacementService:
             logger.warning(f"No selections found for ready bet {bet_id}")
             return
 
+        # Refs follow each item's position on the slip, so a retry maps to the same ledger entries.
+        priced = {
+            index: item for index, item in enumerate(selections) if item.get("stake") and item.get("odds")
+        }
+        refs = {index: customer_order_ref(bet_id, index, item) for index, item in priced.items()}
+        entries = self.ledger.get_entries(list(refs.values())) if refs else {}
+        # Items a previous attempt already sent keep their odds: they are reconciled, not re-priced.
+        sent = {
+            index for index, ref in refs.items()
+            if entries.get(ref, {}).get("status") in ("pending", "placed")
+        }
+        odds_by_index = {index: item["odds"] for index, item in priced.items()}
+
+        unsent = [item for index, item in priced.items() if index not in sent]
+        if unsent and os.environ.get("FUNCTIONS_EMULATOR") != "true":
+            max_slippage_ticks = self.settings_manager.get_betting_settings().max_slippage_ticks
+            self.refresh_prices(unsent, max_slippage_ticks)
+            items = {"items": selections} if isinstance(selections_data, dict) else selections
+            self.repo.update_bet(bet_id, {"selections": items})
+            for index, item in priced.items():
+                if index in sent:
+                    continue
+                if item["price_refresh"]["status"] == "dropped":
+                    del odds_by_index[index]
+                else:
+                    odds_by_index[index] = item["price_refresh"]["current_odds"]
+            if not odds_by_index:
+                self.mark_bet_rejected(bet_id, "Every selection moved outside the slippage tolerance")
+                return
+
         bets_to_place = []
-        for item in selections:
+        for index, odds in odds_by_index.items():
+            item = priced[index]
             stake = item.get("stake")
-            odds = item.get("odds")
-            if stake and odds:
-                if self._is_valid_bet(stake, odds):
-                    bets_to_place.append({
-                        "market_id": item.get("market_id"),
-                        "selection_id": item.get("selection_id"),
-                        "stake": stake,
-                        "odds": odds,
-                        "side": item.get("side", "BACK"),
-                    })
-                else:
-                    potential_profit = stake * (odds - 1)
-                    logger.warning(
-                        f"Skipping bet — stake: {stake}, profit: {potential_profit:.3f}"
-                    )
+            if index in sent or self._is_valid_bet(stake, odds):
+                bets_to_place.append({
+                    "market_id": item.get("market_id"),
+                    "selection_id": item.get("selection_id"),
+                    "stake": stake,
+                    "odds": odds,
+                    "side": item.get("side", "BACK"),
+                    "customer_order_ref": refs[index],
+                })
+            else:
+                potential_profit = stake * (odds - 1)
+                logger.warning(
+                    f"Skipping bet — stake: {stake}, profit: {potential_profit:.3f}"
+                )
 
         if not bets_to_place:
             logger.warning(f"No valid bets to place for {bet_id}")
             return
 
-        result = self.place_bet(request=PlaceBetRequest(bets=bets_to_place))
+        result = self.place_idempotent(bet_id, bets_to_place, entries=entries)
         self.update_placement_result(bet_id, result)
 
     def create_and_place_bet(self, request: PlaceBetRequest) -> Dict[str, Any]:
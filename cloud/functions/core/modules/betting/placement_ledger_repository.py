@@ -0,0 +1,32 @@
+from typing import Any, Dict, Iterable
+
+from core.modules.shared.repository import BaseRepository
+from core.timestamps import server_timestamp
+
+
+class PlacementLedgerRepository(BaseRepository):
+    """
+    Repository for the placement ledger: one document per order placement attempt.
+
+    Documents in the 'placement_ledger' collection are keyed by the order's
+    customer_order_ref and move from 'pending' (about to be sent) to 'placed'
+    (with the Betfair bet ID) or 'failed'.
+    """
+
+    COLLECTION_NAME = "placement_ledger"
+
+    def __init__(self):
+        super().__init__(self.COLLECTION_NAME)
+
+    def get_entries(self, refs: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the ledger entries that exist for `refs`, keyed by ref."""
+        entries = {}
+        for ref in dict.fromkeys(refs):
+            entry = self.get(ref)
+            if entry:
+                entries[ref] = entry
+        return entries
+
+    def record(self, ref: str, data: Dict[str, Any]) -> None:
+        """Create or update the entry for `ref`."""
+        self.set(ref, {**data, "updated_at": server_timestamp()})
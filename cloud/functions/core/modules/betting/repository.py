@@ -1,7 +1,7 @@
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 
 from core import logger
-from core.firestore import admin_firestore
+from core.firestore import admin_firestore, get_db
 from core.modules.shared.repository import BaseRepository
 
 
@@ -61,6 +61,69 @@ class BetRepository(BaseRepository):
             logger.error(f"Error updating bet {bet_id}: {e}")
             raise e
 
+    def update_bets(self, updates: Dict[str, Dict[str, Any]], merge: bool = True) -> None:
+        """
+        Updates several bet documents using batched writes.
+        
+        Args:
+            updates: Fields to update, keyed by Firestore document ID
+            merge: Whether to merge with existing data (default: True)
+        """
+        try:
+            batch = get_db().batch()
+            batch_size = 0
+            for bet_id, data in updates.items():
+                batch.set(self.collection.document(bet_id), data, merge=merge)
+                batch_size += 1
+                if batch_size >= 400:
+                    batch.commit()
+                    batch = get_db().batch()
+                    batch_size = 0
+            if batch_size > 0:
+                batch.commit()
+            logger.info(f"Updated {len(updates)} bets")
+        except Exception as e:
+            logger.error(f"Error updating bets {list(updates)}: {e}")
+            raise e
+
+    def update_bet_transactionally(
+        self,
+        bet_id: str,
+        build_update: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Read-modify-write a bet document inside a Firestore transaction.
+        
+        Args:
+            bet_id: The Firestore document ID
+            build_update: Given the current document (including 'id'), returns the
+                fields to merge, or None to write nothing. It runs again if the
+                transaction is retried after a concurrent write.
+            
+        Returns:
+            The fields written, or None if nothing was written
+        """
+        doc_ref = self.collection.document(bet_id)
+
+        @admin_firestore.transactional
+        def read_and_update(transaction):
+            snapshot = doc_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            update = build_update({**snapshot.to_dict(), "id": snapshot.id})
+            if update:
+                transaction.set(doc_ref, update, merge=True)
+            return update
+
+        try:
+            update = read_and_update(get_db().transaction())
+            if update:
+                logger.info(f"Updated bet {bet_id}")
+            return update
+        except Exception as e:
+            logger.error(f"Error updating bet {bet_id}: {e}")
+            raise e
+
     def get_bet(self, bet_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieves a bet document by ID.
@@ -1,4 +1,5 @@
-from typing import Dict, Any
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
 
 from core import logger
 from core.timestamps import server_timestamp
@@ -23,19 +24,152 @@ class BetSettlementService:
         self.wallet_service = wallet_service
         self.learnings_manager = learnings_manager
 
-    def _mark_bet_rejected(self, bet_id: str, error: str) -> None:
-        self.repo.update_bet(bet_id, {"status": "rejected", "error": error})
-        logger.info(f"Marked bet {bet_id} as rejected: {error}")
+    def _get_order_states(self, betfair_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Streamed order states for `betfair_ids`, or {} if the order stream is unavailable."""
+        if not betfair_ids:
+            return {}
+        try:
+            return self.betfair.get_order_states(betfair_ids)
+        except Exception as e:
+            logger.warning(f"Order stream unavailable, polling cleared orders instead: {e}")
+            return {}
+
+    @staticmethod
+    def _awaiting_settlement(betfair_ids: List[str], order_states: Dict[str, Dict[str, Any]]) -> bool:
+        """
+        True when the order stream shows every order still live in an open market.
+
+        Orders missing from the stream, in closed markets, or completed with nothing
+        matched (lapsed/cancelled) may have cleared, so those slips are still polled.
+        """
+        for betfair_id in betfair_ids:
+            state = order_states.get(betfair_id)
+            if not state or state["market_closed"]:
+                return False
+            if state["status"] != "EXECUTABLE" and not state["size_matched"]:
+                return False
+        return True
+
+    @staticmethod
+    def _synced_placement(placement_results: Dict[str, Any], order_states: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """placement_results with streamed matched size, average price and order status copied in, or None if unchanged."""
+        synced_orders = []
+        for order in placement_results.get("bets", []):
+            state = order_states.get(order.get("bet_id"))
+            if state:
+                order = {
+                    **order,
+                    "size_matched": state["size_matched"],
+                    "average_price_matched": state["average_price_matched"],
+                    "order_status": state["status"],
+                }
+            synced_orders.append(order)
+
+        if synced_orders == placement_results.get("bets", []):
+            return None
+        return {**placement_results, "bets": synced_orders}
+
+    def _sync_placement(self, bet_id: str, order_states: Dict[str, Dict[str, Any]]) -> bool:
+        """
+        Sync streamed order state into the slip's placement_results as currently stored.
+
+        Runs in a transaction, so orders the order monitor appended since the slip was
+        read are kept rather than overwritten.
+        """
+        def build_update(current: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            synced = self._synced_placement(current.get("placement_results", {}), order_states)
+            return {"placement_results": synced} if synced else None
+
+        try:
+            if not self.repo.update_bet_transactionally(bet_id, build_update):
+                return False
+        except Exception as e:
+            logger.error(f"Error syncing placement for bet {bet_id}: {e}")
+            return False
+        logger.info(f"Bet {bet_id} placement synced from order stream.")
+        return True
+
+    def _cleared_orders_by_slip(self, betfair_ids_by_slip: Dict[str, List[str]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Cleared orders for every slip in one bulk lookup, keyed by slip ID.
+
+        All Betfair bet IDs go into a single list_cleared_orders call, which packs them
+        into concurrent chunked queries; results are fanned back out through a bet ID
+        to slip ID index.
+        """
+        slip_by_betfair_id = {
+            betfair_id: slip_id
+            for slip_id, betfair_ids in betfair_ids_by_slip.items()
+            for betfair_id in betfair_ids
+        }
+        if not slip_by_betfair_id:
+            return {}
+        try:
+            cleared_orders = self.betfair.list_cleared_orders(bet_ids=list(slip_by_betfair_id))
+        except Exception as e:
+            logger.error(f"Error fetching cleared orders for {len(betfair_ids_by_slip)} slips: {e}")
+            return {}
+
+        by_slip: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for order in cleared_orders:
+            slip_id = slip_by_betfair_id.get(order.get("bet_id"))
+            if slip_id:
+                by_slip[slip_id].append(order)
+        return by_slip
+
+    @staticmethod
+    def _settlement_update(bet_doc: Dict[str, Any], betfair_ids: List[str], cleared_orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge `cleared_orders` into a slip's settlement results; finishes the slip once every order has settled."""
+        bet_id = bet_doc.get("id")
+        expected_bet_count = len(betfair_ids)
+
+        # Merge: newer data overwrites older for the same bet_id.
+        settlements_map = {
+            s.get("bet_id"): s
+            for s in bet_doc.get("settlement_results", [])
+            if s.get("bet_id")
+        }
+        for new_s in cleared_orders:
+            key = new_s.get("bet_id")
+            if key:
+                settlements_map[key] = new_s
+
+        merged_results = list(settlements_map.values())
+        total_realized_profit = sum(r.get("profit", 0) for r in merged_results)
+        starting_balance = bet_doc.get("balance", {}).get("starting", 0)
+
+        update_data: Dict[str, Any] = {
+            "settlement_results": merged_results,
+            "last_settled_at": server_timestamp(),
+            "balance": {
+                **bet_doc.get("balance", {}),
+                "ending": starting_balance + total_realized_profit,
+            },
+        }
+
+        if len(merged_results) >= expected_bet_count:
+            update_data["status"] = "finished"
+            update_data["finished_at"] = server_timestamp()
+            logger.info(f"Bet {bet_id} finished! All {expected_bet_count} bets settled.")
+        else:
+            logger.info(f"Bet {bet_id} updated. {len(merged_results)}/{expected_bet_count} settled.")
+        return update_data
 
     def check_bet_results(self) -> Dict[str, Any]:
         """
         Check the status of all placed bets on Betfair and update Firestore accordingly.
 
-        For each bet:
-        - Fetches cleared orders from Betfair by Betfair bet ID.
-        - Merges new settlement results with any existing ones.
-        - Marks the bet as 'finished' once all expected orders are settled.
-        - Syncs the wallet balance and triggers learnings analysis for finished bets.
+        Slips are settled in bulk:
+        - Slips whose orders the order stream shows as still live are skipped, only
+          syncing their matched size and average price into placement_results (in a
+          transaction, as the order monitor appends to the same field).
+        - Betfair bet IDs of every other slip are fetched in one cross-slip cleared
+          orders lookup and fanned back out to their slips.
+        - New settlement results are merged with any existing ones, and a slip is
+          marked 'finished' once all expected orders are settled.
+        - Every other slip update is written in Firestore batches.
+        - For finished bets, the wallet balance is synced once and learnings analysis
+          is triggered.
         """
         logger.info("Checking bet results...")
 
@@ -44,90 +178,70 @@ class BetSettlementService:
             logger.info("No active placed bets found.")
             return {"status": "no_active_bets"}
 
-        updated_count = 0
+        updates: Dict[str, Dict[str, Any]] = {}
+        placements_synced = 0
+        order_states = self._get_order_states([
+            order.get("bet_id")
+            for bet_doc in placed_bets
+            for order in bet_doc.get("placement_results", {}).get("bets", [])
+            if order.get("bet_id")
+        ])
 
+        betfair_ids_by_slip: Dict[str, List[str]] = {}
         for bet_doc in placed_bets:
             bet_id = bet_doc.get("id")
             placement_results = bet_doc.get("placement_results", {})
-            placed_orders = placement_results.get("bets", [])
-
             betfair_ids = [
-                order.get("bet_id") for order in placed_orders if order.get("bet_id")
+                order.get("bet_id") for order in placement_results.get("bets", []) if order.get("bet_id")
             ]
 
             if not betfair_ids:
                 logger.warning(
                     f"No Betfair IDs found for placed bet {bet_id}. Marking as rejected."
                 )
-                self._mark_bet_rejected(bet_id, "No Betfair IDs found in placement_results")
+                updates[bet_id] = {"status": "rejected", "error": "No Betfair IDs found in placement_results"}
                 continue
 
-            try:
-                cleared_orders = self.betfair.list_cleared_orders(bet_ids=betfair_ids)
-
-                if not cleared_orders:
-                    continue
-
-                expected_bet_count = len(betfair_ids)
-                existing_settlements = bet_doc.get("settlement_results", [])
+            if self._awaiting_settlement(betfair_ids, order_states):
+                if self._synced_placement(placement_results, order_states) and self._sync_placement(bet_id, order_states):
+                    placements_synced += 1
+                continue
 
-                # Merge: newer data overwrites older for the same bet_id.
-                settlements_map = {
-                    s.get("bet_id"): s
-                    for s in existing_settlements
-                    if s.get("bet_id")
-                }
-                for new_s in cleared_orders:
-                    key = new_s.get("bet_id")
-                    if key:
-                        settlements_map[key] = new_s
-
-                merged_results = list(settlements_map.values())
-                total_realized_profit = sum(r.get("profit", 0) for r in merged_results)
-                is_finished = len(merged_results) >= expected_bet_count
-                starting_balance = bet_doc.get("balance", {}).get("starting", 0)
-
-                update_data: Dict[str, Any] = {
-                    "settlement_results": merged_results,
-                    "last_settled_at": server_timestamp(),
-                    "balance": {
-                        **bet_doc.get("balance", {}),
-                        "ending": starting_balance + total_realized_profit,
-                    },
-                }
+            betfair_ids_by_slip[bet_id] = betfair_ids
 
-                if is_finished:
-                    update_data["status"] = "finished"
-                    update_data["finished_at"] = server_timestamp()
-                    logger.info(
-                        f"Bet {bet_id} finished! All {expected_bet_count} bets settled."
-                    )
-                else:
-                    logger.info(
-                        f"Bet {bet_id} updated. "
-                        f"{len(merged_results)}/{expected_bet_count} settled."
+        cleared_by_slip = self._cleared_orders_by_slip(betfair_ids_by_slip)
+        updated_count = 0
+        finished_bets = []
+        for bet_doc in placed_bets:
+            bet_id = bet_doc.get("id")
+            if not cleared_by_slip.get(bet_id):
+                continue
+            update_data = self._settlement_update(bet_doc, betfair_ids_by_slip[bet_id], cleared_by_slip[bet_id])
+            updates[bet_id] = update_data
+            updated_count += 1
+            if update_data.get("status") == "finished":
+                finished_bets.append({**bet_doc, **update_data})
+
+        if updates:
+            self.repo.update_bets(updates)
+
+        if finished_bets:
+            self.wallet_service.sync_balance()
+            for finished_bet in finished_bets:
+                try:
+                    self.learnings_manager.analyze_finished_bet(finished_bet)
+                except Exception as le:
+                    logger.error(
+                        f"Error triggering learnings analysis for bet {finished_bet.get('id')}: {le}"
                     )
 
-                self.repo.update_bet(bet_id, update_data)
-                updated_count += 1
-
-                if is_finished:
-                    self.wallet_service.sync_balance()
-                    try:
-                        self.learnings_manager.analyze_finished_bet(
-                            {**bet_doc, **update_data}
-                        )
-                    except Exception as le:
-                        logger.error(
-                            f"Error triggering learnings analysis for bet {bet_id}: {le}"
-                        )
-
-            except Exception as e:
-                logger.error(f"Error checking results for bet {bet_id}: {e}")
-
-        logger.info(f"Checked results. Updated {updated_count} bets.")
+        logger.info(
+            f"Checked results. Updated {updated_count} bets, "
+            f"synced {placements_synced} placements from the order stream."
+        )
         return {
             "status": "success",
             "active_bets_checked": len(placed_bets),
             "bets_updated": updated_count,
+            "placements_synced": placements_synced,
         }
@@ -2,10 +2,12 @@ from pathlib import Path
 from pydantic_ai import Agent
 from pydantic_ai.models.openai import OpenAIModel
 
+from core.traffic import openai_provider
 from ..models import LearningsAgentResponse
 
 model = OpenAIModel(
     model_name="gpt-5.2",
+    provider=openai_provider(),
 )
 
 # Get the absolute path to the prompt file
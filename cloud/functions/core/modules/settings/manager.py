@@ -53,6 +53,7 @@ class SettingsManager:
             use_reliable_teams=raw.get("USE_RELIABLE_TEAMS", AUTOMATED_BETTING_OPTIONS["USE_RELIABLE_TEAMS"]),
             min_stake=raw.get("MIN_STAKE", AUTOMATED_BETTING_OPTIONS["MIN_STAKE"]),
             min_profit=raw.get("MIN_PROFIT", AUTOMATED_BETTING_OPTIONS["MIN_PROFIT"]),
+            max_slippage_ticks=raw.get("MAX_SLIPPAGE_TICKS", AUTOMATED_BETTING_OPTIONS["MAX_SLIPPAGE_TICKS"]),
             default_budget=raw.get("DEFAULT_BUDGET", AUTOMATED_BETTING_OPTIONS["DEFAULT_BUDGET"]),
         )
 
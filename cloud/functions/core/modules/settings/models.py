@@ -15,5 +15,6 @@ class BettingSettings(BaseModel):
     use_reliable_teams: bool = Field(default_factory=lambda: AUTOMATED_BETTING_OPTIONS["USE_RELIABLE_TEAMS"])
     min_stake: float = Field(default_factory=lambda: AUTOMATED_BETTING_OPTIONS["MIN_STAKE"])
     min_profit: float = Field(default_factory=lambda: AUTOMATED_BETTING_OPTIONS["MIN_PROFIT"])
+    max_slippage_ticks: int = Field(default_factory=lambda: AUTOMATED_BETTING_OPTIONS["MAX_SLIPPAGE_TICKS"])
     default_budget: float = Field(default_factory=lambda: AUTOMATED_BETTING_OPTIONS["DEFAULT_BUDGET"])
     automation_enabled: bool = Field(default_factory=lambda: AUTOMATED_BETTING_OPTIONS["AUTOMATION_ENABLED"])
@@ -0,0 +1,303 @@
+"""
+Record/replay of outbound HTTP traffic (Betfair, Brave Search and LLM calls).
+
+With TRAFFIC_MODE=record every request sent through a recorded requests.Session or
+httpx client is captured into TRAFFIC_DIR; with TRAFFIC_MODE=replay the same calls are
+answered from disk, sleeping the originally measured latency times
+TRAFFIC_LATENCY_SCALE (0 answers instantly). Jobs such as fetch_and_store_daily_fixtures
+or the hourly run can then be re-run offline against a captured day and timed.
+
+A capture directory holds two append-only files:
+
+    bodies.bin   zlib-compressed response bodies, back to back
+    index.jsonl  one line per call: [key, route, offset, length, elapsed_ms, status, content_type]
+
+`key` hashes the full request (method, URL, canonical JSON body) and `route` names the
+endpoint (method, URL path and JSON-RPC method). Replay serves recordings of an exact key
+in capture order and repeats the last one once they run out; a request whose key was never
+captured (its body carries a timestamp, a reworded prompt, ...) gets the next unserved
+recording of its route. Credentials in request bodies are never written, and session
+tokens in login responses are replaced before they reach disk.
+"""
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from datetime import timedelta
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .logger import logger
+from constants import TRAFFIC_DIR, TRAFFIC_LATENCY_SCALE, TRAFFIC_MODE
+
+
+# Response fields holding live credentials (Betfair certlogin / keepAlive).
+REDACTED_FIELDS = ("sessionToken", "token")
+
+BODIES_FILE = "bodies.bin"
+INDEX_FILE = "index.jsonl"
+
+
+class ReplayMiss(LookupError):
+    """Raised in replay mode for a request whose route was never captured."""
+
+
+class Recording:
+    __slots__ = ("key", "route", "offset", "length", "elapsed_ms", "status", "content_type")
+
+    def __init__(self, key: str, route: str, offset: int, length: int, elapsed_ms: float, status: int, content_type: Optional[str]):
+        self.key = key
+        self.route = route
+        self.offset = offset
+        self.length = length
+        self.elapsed_ms = elapsed_ms
+        self.status = status
+        self.content_type = content_type
+
+
+def request_identity(method: str, url: str, body: Optional[bytes]) -> Tuple[str, str]:
+    """Return the (key, route) of a request; JSON bodies are canonicalised first."""
+    method = method.upper()
+    parts = urlsplit(url)
+    route = f"{method} {parts.netloc}{parts.path}"
+    payload = body or b""
+    if payload:
+        try:
+            decoded = json.loads(payload)
+        except ValueError:
+            decoded = None
+        if isinstance(decoded, dict):
+            if "jsonrpc" in decoded and decoded.get("method"):
+                route = f"{route} {decoded['method']}"
+            payload = json.dumps(decoded, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.sha1()
+    digest.update(f"{method} {url}\n".encode("utf-8"))
+    digest.update(payload)
+    return digest.hexdigest()[:20], route
+
+
+def _redact(content: bytes) -> bytes:
+    try:
+        decoded = json.loads(content)
+    except ValueError:
+        return content
+    if not isinstance(decoded, dict) or not any(field in decoded for field in REDACTED_FIELDS):
+        return content
+    for field in REDACTED_FIELDS:
+        if field in decoded:
+            decoded[field] = "replayed-session"
+    return json.dumps(decoded).encode("utf-8")
+
+
+class TrafficRecorder:
+    """Captures or replays HTTP calls under `directory`; safe to share across threads."""
+
+    def __init__(self, directory: str, mode: str, latency_scale: float = 1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported traffic mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, Deque[Recording]] = defaultdict(deque)
+        self._by_route: Dict[str, Deque[Recording]] = defaultdict(deque)
+        self._last: Dict[str, Recording] = {}
+        self._served = set()
+        self._bodies = None
+        self._index = None
+
+        os.makedirs(directory, exist_ok=True)
+        bodies_path = os.path.join(directory, BODIES_FILE)
+        index_path = os.path.join(directory, INDEX_FILE)
+        if mode == "record":
+            self._bodies = open(bodies_path, "ab")
+            self._index = open(index_path, "a", encoding="utf-8")
+        else:
+            self._load(index_path)
+            self._bodies = open(bodies_path, "rb")
+
+    def _load(self, index_path: str) -> None:
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    recording = Recording(*json.loads(line))
+                    self._by_key[recording.key].append(recording)
+                    self._by_route[recording.route].append(recording)
+        logger.info(f"Loaded {sum(len(q) for q in self._by_key.values())} recorded calls from {self.directory}")
+
+    def close(self) -> None:
+        with self._lock:
+            for f in (self._bodies, self._index):
+                if f is not None and not f.closed:
+                    f.close()
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def record(self, key: str, route: str, status: int, content_type: Optional[str], content: bytes, elapsed: float) -> None:
+        blob = zlib.compress(_redact(content))
+        with self._lock:
+            offset = self._bodies.seek(0, os.SEEK_END)
+            self._bodies.write(blob)
+            self._bodies.flush()
+            entry = [key, route, offset, len(blob), round(elapsed * 1000, 2), status, content_type]
+            self._index.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._index.flush()
+
+    def lookup(self, key: str, route: str) -> Tuple[Recording, bytes]:
+        """Return the recording serving this request and its decompressed body."""
+        with self._lock:
+            recording = self._take(self._by_key.get(key)) or self._last.get(key) or self._take(self._by_route.get(route))
+            if recording is None:
+                raise ReplayMiss(f"No recorded response for {route}")
+            self._last[key] = recording
+            self._bodies.seek(recording.offset)
+            blob = self._bodies.read(recording.length)
+        return recording, zlib.decompress(blob)
+
+    def _take(self, queue: Optional[Deque[Recording]]) -> Optional[Recording]:
+        while queue:
+            recording = queue.popleft()
+            if id(recording) not in self._served:
+                self._served.add(id(recording))
+                return recording
+        return None
+
+    def delay(self, recording: Recording) -> float:
+        return recording.elapsed_ms / 1000 * self.latency_scale
+
+    # ------------------------------------------------------------------
+    # Client hooks
+    # ------------------------------------------------------------------
+
+    def mount(self, session: requests.Session) -> requests.Session:
+        """Route every request of `session` through this recorder."""
+        adapter = RecordingAdapter(self)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def async_transport(self, inner: Optional[httpx.AsyncBaseTransport] = None) -> "RecordingAsyncTransport":
+        """An httpx transport recording through (or replaying instead of) `inner`."""
+        return RecordingAsyncTransport(self, inner or httpx.AsyncHTTPTransport())
+
+
+class RecordingAdapter(HTTPAdapter):
+    """requests transport adapter that records real responses or serves recorded ones."""
+
+    def __init__(self, recorder: TrafficRecorder, **kwargs):
+        super().__init__(**kwargs)
+        self.recorder = recorder
+
+    def send(self, request, **kwargs):
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        key, route = request_identity(request.method, request.url, body)
+
+        if self.recorder.mode == "record":
+            started = time.perf_counter()
+            response = super().send(request, **kwargs)
+            content = response.content
+            self.recorder.record(
+                key, route, response.status_code, response.headers.get("Content-Type"), content,
+                time.perf_counter() - started,
+            )
+            return response
+
+        recording, content = self.recorder.lookup(key, route)
+        time.sleep(self.recorder.delay(recording))
+        response = requests.Response()
+        response.status_code = recording.status
+        response._content = content
+        response.headers = CaseInsensitiveDict({"Content-Type": recording.content_type or "application/json"})
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(milliseconds=recording.elapsed_ms)
+        return response
+
+
+class RecordingAsyncTransport(httpx.AsyncBaseTransport):
+    """httpx counterpart of RecordingAdapter for the asyncio clients."""
+
+    def __init__(self, recorder: TrafficRecorder, inner: httpx.AsyncBaseTransport):
+        self.recorder = recorder
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        key, route = request_identity(request.method, str(request.url), body)
+
+        if self.recorder.mode == "record":
+            started = time.perf_counter()
+            response = await self.inner.handle_async_request(request)
+            content = await response.aread()
+            await response.aclose()
+            self.recorder.record(
+                key, route, response.status_code, response.headers.get("Content-Type"), content,
+                time.perf_counter() - started,
+            )
+            return httpx.Response(
+                response.status_code, headers={"Content-Type": response.headers.get("Content-Type", "")},
+                content=content, request=request, extensions=response.extensions,
+            )
+
+        recording, content = self.recorder.lookup(key, route)
+        await asyncio.sleep(self.recorder.delay(recording))
+        return httpx.Response(
+            recording.status, headers={"Content-Type": recording.content_type or "application/json"},
+            content=content, request=request,
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+_recorder: Optional[TrafficRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder() -> Optional[TrafficRecorder]:
+    """The process-wide recorder configured by TRAFFIC_MODE, or None when traffic is live."""
+    global _recorder
+    if _recorder is None and TRAFFIC_MODE in ("record", "replay"):
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = TrafficRecorder(TRAFFIC_DIR, TRAFFIC_MODE, TRAFFIC_LATENCY_SCALE)
+                atexit.register(_recorder.close)
+    return _recorder
+
+
+def set_recorder(recorder: Optional[TrafficRecorder]) -> None:
+    """Install (or with None, remove) the process-wide recorder, e.g. from a replay script."""
+    global _recorder
+    _recorder = recorder
+
+
+def http_session(session: Optional[requests.Session] = None) -> Optional[requests.Session]:
+    """Mount the active recorder on `session` (a new one if None); returns `session` unchanged when live."""
+    recorder = get_recorder()
+    if recorder is None:
+        return session
+    return recorder.mount(session or requests.Session())
+
+
+def openai_provider():
+    """Provider for pydantic-ai OpenAI models: "openai" when live, else one whose HTTP goes through the recorder."""
+    recorder = get_recorder()
+    if recorder is None:
+        return "openai"
+    from pydantic_ai.providers.openai import OpenAIProvider
+    return OpenAIProvider(
+        api_key=os.getenv("OPENAI_API_KEY") or "replay",
+        http_client=httpx.AsyncClient(transport=recorder.async_transport()),
+    )
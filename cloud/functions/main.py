@@ -10,6 +10,8 @@ from pydantic import ValidationError
 import json
 from core import logger
 from core.migrations.migrate_bet_slips import run_migration, migrate_single_document
+from core.modules.betting.betfair_service import BetfairService
+from core.modules.betting.betfair_state_repository import BetfairStateRepository
 from core.modules.betting.manager import BettingManager
 from core.modules.betting.models import AnalyzeBetsRequest, GetOddsRequest, PlaceBetRequest
 from core.modules.betting.repository import BetRepository
@@ -21,23 +23,38 @@ from core.modules.settings.manager import SettingsManager
 from core.modules.learnings.manager import LearningsManager
 from core.modules.wallet.service import WalletService
 from utils.responses import make_error_response, make_success_response
-from constants import RELIABLE_TEAMS, RELIABLE_COMPETITIONS, RELIABLE_ALL_TEAMS
+from constants import AUTOMATED_BETTING_OPTIONS, RELIABLE_TEAMS, RELIABLE_COMPETITIONS, RELIABLE_ALL_TEAMS
 from core.modules.notifications import NotificationManager
+from third_party.betting_platforms.betfair_exchange.governor import RequestGovernor, TransactionLedger
+from third_party.betting_platforms.betfair_exchange.reference_data import ReferenceDataCache
+from third_party.betting_platforms.betfair_exchange.resilience import Resilience
+from third_party.betting_platforms.betfair_exchange.session import SessionBroker
 
 
 def _make_settings_manager() -> SettingsManager:
     return SettingsManager(repository=SettingsRepository())
 
 
+def _make_betfair_service() -> BetfairService:
+    return BetfairService(
+        reference_data=_betfair_reference_data,
+        session_broker=_betfair_session_broker,
+        governor=_betfair_governor,
+        resilience=_betfair_resilience,
+    )
+
+
 def _make_betting_manager() -> BettingManager:
     bet_repo = BetRepository()
+    betfair_service = _make_betfair_service()
     learnings_manager = LearningsManager(
         repository=LearningsRepository(),
         bet_repository=BetRepository(),
     )
-    wallet_service = WalletService(repository=WalletRepository())
+    wallet_service = WalletService(repository=WalletRepository(), betfair_service=betfair_service)
     settings_manager = _make_settings_manager()
     return BettingManager(
+        betfair_service=betfair_service,
         bet_repo=bet_repo,
         learnings_manager=learnings_manager,
         wallet_service=wallet_service,
@@ -61,6 +78,14 @@ set_global_options(max_instances=10, region="europe-west2")
 
 initialize_app()
 
+# Betfair plumbing built once per instance and injected into every BetfairService,
+# so warm invocations reuse resolved reference data, the login session, the request
+# budget and circuit breakers; the Firestore copies cover cold starts.
+_betfair_reference_data = ReferenceDataCache(store=BetfairStateRepository("reference_data"))
+_betfair_session_broker = SessionBroker(store=BetfairStateRepository("session"))
+_betfair_governor = RequestGovernor(ledger=TransactionLedger(store=BetfairStateRepository("transactions")))
+_betfair_resilience = Resilience()
+
 cors_options = CorsOptions(
     cors_origins=["*"],
     cors_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
@@ -402,9 +427,17 @@ def analyze_daily_fixture(event: firestore_fn.Event[firestore_fn.DocumentSnapsho
             pass
 
 
-@firestore_fn.on_document_written(document="bet_slips/{betId}", timeout_sec=60, memory=options.MemoryOption.GB_1)
+@firestore_fn.on_document_written(document="bet_slips/{betId}", timeout_sec=60, memory=options.MemoryOption.GB_1, retry=True)
 def place_bet_on_ready(event: firestore_fn.Event[firestore_fn.Change[firestore_fn.DocumentSnapshot]]) -> None:
-    """Triggered when a bet document is created or updated to 'ready' status. Places the bets on Betfair."""
+    """
+    Triggered when a bet document is created or updated to 'ready' status. Places the bets on Betfair.
+
+    Failed runs are retried by the platform: a redelivery of the same event may pick
+    the slip up again from 'processing', and placement is idempotent (see
+    BetPlacementService.place_idempotent). After MAX_PLACEMENT_ATTEMPTS the slip is
+    marked rejected instead.
+    """
+    attempts = 0
     try:
         if not event.data.after.exists:
             # Document deleted
@@ -439,15 +472,22 @@ def place_bet_on_ready(event: firestore_fn.Event[firestore_fn.Change[firestore_f
                     return None
                     
                 current_data = snapshot.to_dict()
-                if current_data.get("status") != "ready":
+                is_retry = current_data.get("status") == "processing" and current_data.get("placement_attempt") == event.id
+                if current_data.get("status") != "ready" and not is_retry:
                     return None
-                    
-                transaction.update(doc_ref, {"status": "processing"})
-                return current_data
-                
+
+                attempt_count = current_data.get("placement_attempts", 0) + 1 if is_retry else 1
+                transaction.update(doc_ref, {
+                    "status": "processing",
+                    "placement_attempt": event.id,
+                    "placement_attempts": attempt_count,
+                })
+                return {**current_data, "placement_attempts": attempt_count}
+
             transaction_data = proceed_with_placement(transaction, doc_ref)
             
             if transaction_data:
+                attempts = transaction_data["placement_attempts"]
                 manager = _make_betting_manager()
                 manager.prepare_and_place_bets_from_ready_doc(bet_id, transaction_data)
                 logger.info(f"Bets placed for {bet_id}")
@@ -455,9 +495,14 @@ def place_bet_on_ready(event: firestore_fn.Event[firestore_fn.Change[firestore_f
                 logger.info(f"Bet {bet_id} is no longer 'ready'. Skipping to avoid duplicate placement.")
             
     except Exception as e:
-        logger.error(f"Error placing bets for {event.params['betId']}: {e}", exc_info=True)
+        logger.error(f"Error placing bets for {event.params['betId']} (attempt {attempts}): {e}", exc_info=True)
+        if not attempts:
+            return
+        if attempts < AUTOMATED_BETTING_OPTIONS["MAX_PLACEMENT_ATTEMPTS"]:
+            # Raising makes the platform redeliver the event.
+            raise
         try:
-            _make_betting_manager().mark_bet_failed(event.params['betId'], f"Placement failed: {str(e)}")
+            _make_betting_manager().mark_bet_rejected(event.params['betId'], f"Placement failed: {str(e)}")
         except:
             pass
 
@@ -504,11 +549,7 @@ def get_event_markets(req: https_fn.Request) -> https_fn.Response:
         market_types_param = req.args.get('market_types')
         market_type_codes = market_types_param.split(',') if market_types_param else None
         
-        from third_party.betting_platforms.betfair_exchange import BetfairExchange
-        betfair = BetfairExchange()
-        betfair.login()
-        
-        result = betfair.get_event_markets(event_id, market_type_codes)
+        result = _make_betfair_service().get_event_markets(event_id, market_type_codes)
         return make_success_response(data=result)
     except Exception as e:
         logger.error(f"Get event markets error: {e}", exc_info=True)
@@ -672,6 +713,18 @@ def automated_check_bet_results(event: scheduler_fn.ScheduledEvent) -> None:
         logger.error(f"Error in automated bet results check: {e}", exc_info=True)
 
 
+@scheduler_fn.on_schedule(schedule='*/5 * * * *', timeout_sec=240, memory=options.MemoryOption.GB_1)
+def monitor_unmatched_orders(event: scheduler_fn.ScheduledEvent) -> None:
+    """
+    Every 5 minutes, follow up unmatched orders: cancel, re-price or top up per the order monitor policy.
+    """
+    try:
+        result = _make_betting_manager().monitor_orders()
+        logger.info(f"Order monitor completed: {result}")
+    except Exception as e:
+        logger.error(f"Error in order monitor: {e}", exc_info=True)
+
+
 @https_fn.on_call(timeout_sec=60, memory=options.MemoryOption.GB_1)
 def save_settings(req: https_fn.CallableRequest) -> Any:
     """
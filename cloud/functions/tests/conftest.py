@@ -120,6 +120,9 @@ def betting_manager(mock_betfair_client, mock_betting_repo,
     mock_betfair_service.place_bets.return_value = {"status": "SUCCESS", "bets": []}
     mock_betfair_service.search_market.return_value = []
     mock_betfair_service.list_cleared_orders.return_value = []
+    mock_betfair_service.get_order_states.return_value = {}
+    mock_placement_ledger = MagicMock()
+    mock_placement_ledger.get_entries.return_value = {}
 
     settings_manager = SettingsManager(repository=mock_settings_repo)
     learnings_manager = LearningsManager(repository=mock_learnings_repo, bet_repository=mock_betting_repo)
@@ -131,6 +134,7 @@ def betting_manager(mock_betfair_client, mock_betting_repo,
         settings_manager=settings_manager,
         learnings_manager=learnings_manager,
         wallet_service=wallet_service,
+        placement_ledger=mock_placement_ledger,
     )
 
 
@@ -5,6 +5,7 @@ import os
 import uuid
 from unittest.mock import MagicMock, Mock, patch
 import pytest
+import requests
 
 
 def test_mock_bet_placement_in_emulator(sample_bets):
@@ -143,16 +144,14 @@ def test_search_market():
             
             mock_client.betting.list_market_catalogue.return_value = [mock_market]
             
-            # Mock market books (also dicts or objects with runners as objects, but let's mock the necessary parts)
-            mock_book = Mock()
-            mock_book.market_id = "1.123"
-            mock_book.total_matched = 1000
-            mock_runner_book = Mock()
-            mock_runner_book.selection_id = 12345
-            mock_price = Mock()
-            mock_price.price = 2.5
-            mock_runner_book.ex.available_to_back = [mock_price]
-            mock_book.runners = [mock_runner_book]
+            # Mock market books as raw JSON (list_market_book is also called with lightweight=True)
+            mock_book = {
+                "marketId": "1.123",
+                "totalMatched": 1000,
+                "runners": [
+                    {"selectionId": 12345, "ex": {"availableToBack": [{"price": 2.5, "size": 10.0}]}}
+                ]
+            }
             
             mock_client.betting.list_market_book.return_value = [mock_book]
             
@@ -161,3 +160,1022 @@ def test_search_market():
             
             assert len(results) > 0
             assert results[0]["name"] == "Test Match"
+
+
+def test_fetch_markets_with_odds_parallel_isolates_failed_chunk():
+    """Books are fetched concurrently per chunk; a chunk that keeps failing is skipped."""
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+    from third_party.betting_platforms.betfair_exchange.constants import BOOK_FETCH_ATTEMPTS
+
+    def fake_list_market_book(market_ids, price_projection, lightweight):
+        if "1.3" in market_ids:
+            raise requests.ConnectionError("Connection reset by peer")
+        return [{"marketId": market_id} for market_id in market_ids]
+
+    with patch('betfairlightweight.APIClient') as MockAPIClient:
+        mock_client = MockAPIClient.return_value
+        mock_client.betting.list_market_book.side_effect = fake_list_market_book
+
+        client = BetfairExchange()
+        catalogue = [{"marketId": f"1.{i}"} for i in range(6)]
+        books_map = client._fetch_markets_with_odds(catalogue, batch_size=2, max_workers=3)
+
+        assert list(books_map) == ["1.0", "1.1", "1.4", "1.5"]
+        # The failing chunk is retried before being given up on.
+        failing_calls = [
+            c for c in mock_client.betting.list_market_book.call_args_list
+            if "1.3" in c.kwargs["market_ids"]
+        ]
+        assert len(failing_calls) == BOOK_FETCH_ATTEMPTS
+
+
+def test_fetch_catalogue_batches_keeps_order_and_stops_at_max_results():
+    """Concurrent catalogue pages merge in filter order and stop once max_results is reached."""
+    import time
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+    def fake_list_market_catalogue(filter, **kwargs):
+        event_id = filter["eventIds"][0]
+        # Earlier pages answer last, so completion order differs from filter order.
+        time.sleep(0.01 * (5 - int(event_id)))
+        return [{"marketId": f"1.{event_id}{n}"} for n in range(2)]
+
+    with patch('betfairlightweight.APIClient') as MockAPIClient:
+        mock_client = MockAPIClient.return_value
+        mock_client.betting.list_market_catalogue.side_effect = fake_list_market_catalogue
+
+        client = BetfairExchange()
+        market_filters = [{"eventIds": [str(i)]} for i in range(5)]
+        catalogue = client._fetch_catalogue_batches(market_filters, max_results=5, max_workers=3)
+
+        assert [m["marketId"] for m in catalogue] == ["1.00", "1.01", "1.10", "1.11", "1.20"]
+        # Pages 0-2 cover max_results; the second wave is never requested.
+        assert mock_client.betting.list_market_catalogue.call_count == 3
+
+
+def test_search_market_iter_yields_events_per_catalogue_page():
+    """search_market_iter prices and yields each catalogue page as soon as it is fetched."""
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+    def make_market(market_id, event_id):
+        return {
+            "marketId": market_id,
+            "marketStartTime": "2025-01-01T15:00:00Z",
+            "event": {"id": event_id, "name": f"Match {event_id}"},
+            "competition": {"name": "Test League"},
+            "description": {"marketType": "MATCH_ODDS"},
+            "runners": [{"selectionId": 1, "runnerName": "Home"}],
+        }
+
+    def make_book(market_id):
+        return {
+            "marketId": market_id,
+            "totalMatched": 1000,
+            "runners": [{"selectionId": 1, "ex": {"availableToBack": [{"price": 2.0, "size": 50.0}]}}],
+        }
+
+    with patch('betfairlightweight.APIClient') as MockAPIClient:
+        mock_client = MockAPIClient.return_value
+        mock_event_type = Mock()
+        mock_event_type.event_type.id = "1"
+        mock_client.betting.list_event_types.return_value = [mock_event_type]
+        mock_client.betting.list_events.return_value = [Mock(event=Mock(id=str(i))) for i in range(25)]
+        mock_client.betting.list_market_catalogue.side_effect = lambda filter, **kwargs: [
+            make_market(f"1.{event_id}", event_id) for event_id in filter["eventIds"]
+        ]
+        mock_client.betting.list_market_book.side_effect = lambda market_ids, **kwargs: [
+            make_book(market_id) for market_id in market_ids
+        ]
+
+        client = BetfairExchange()
+        chunks = list(client.search_market_iter("Soccer", max_results=1000))
+
+        # 25 events are paged 20 + 5, and each page is yielded separately.
+        assert [len(chunk) for chunk in chunks] == [20, 5]
+        assert chunks[1][0]["provider_event_id"] == "20"
+        assert client.search_market("Soccer", max_results=1000) == [e for chunk in chunks for e in chunk]
+
+
+def test_reference_data_cache_reuses_resolutions_and_persists_them():
+    """Sport and competition lookups hit Betfair once per TTL and are shared through the store."""
+    from third_party.betting_platforms.betfair_exchange.reference_data import ReferenceDataCache
+
+    betting = MagicMock()
+    betting.list_event_types.return_value = [Mock(event_type=Mock(id="1"))]
+    exact = Mock()
+    exact.competition.id = "10932509"
+    exact.competition.name = "English Premier League"
+    partial = Mock()
+    partial.competition.id = "999"
+    partial.competition.name = "English Premier League U21"
+    betting.list_competitions.return_value = [exact, partial]
+
+    store = MagicMock()
+    store.load.return_value = None
+    cache = ReferenceDataCache(store=store)
+
+    for _ in range(3):
+        assert cache.resolve_event_type_id(betting, "Soccer") == "1"
+        assert cache.resolve_competition_ids(betting, "1", "english premier league") == ["10932509"]
+
+    assert betting.list_event_types.call_count == 1
+    assert betting.list_competitions.call_count == 1
+
+    # A fresh instance warmed from the saved snapshot needs no Betfair calls at all.
+    store.load.return_value = store.save.call_args.args[0]
+    warm_cache = ReferenceDataCache(store=store)
+    warm_cache.warm_up()
+    # Services sharing the cache each warm it up; only the first call reads the snapshot.
+    warm_cache.warm_up()
+    assert store.load.call_count == 1
+    fresh_betting = MagicMock()
+    assert warm_cache.resolve_event_type_id(fresh_betting, "Soccer") == "1"
+    assert warm_cache.resolve_competition_ids(fresh_betting, "1", "English Premier League") == ["10932509"]
+    fresh_betting.list_event_types.assert_not_called()
+    fresh_betting.list_competitions.assert_not_called()
+
+    # Expired entries are refreshed from Betfair.
+    expired_cache = ReferenceDataCache(ttl_seconds=0)
+    expired_cache.resolve_event_type_id(betting, "Soccer")
+    expired_cache.resolve_event_type_id(betting, "Soccer")
+    assert betting.list_event_types.call_count == 3
+
+
+def test_session_broker_shares_one_login_and_keeps_it_alive():
+    """Clients attached to one broker reuse its token; old tokens are refreshed with keepAlive."""
+    from third_party.betting_platforms.betfair_exchange.session import SessionBroker
+
+    def make_client(token="tok-1"):
+        client = MagicMock()
+        client.login.side_effect = lambda: setattr(client, "session_token", token)
+        return client
+
+    store = MagicMock()
+    store.load.return_value = None
+    broker = SessionBroker(store=store, keep_alive_after=3600, min_login_interval=0)
+
+    clients = [make_client() for _ in range(3)]
+    for client in clients:
+        broker.attach(client)
+
+    assert clients[0].login.call_count == 1
+    assert all(not c.login.called for c in clients[1:])
+    assert all(c.session_token == "tok-1" for c in clients)
+    assert store.save.call_args.args[0]["session_token"] == "tok-1"
+
+    # A new instance picks the token up from the store; past keep_alive_after it refreshes it.
+    snapshot = {**store.save.call_args.args[0], "refreshed_at": store.save.call_args.args[0]["refreshed_at"] - 7200}
+    store.load.return_value = snapshot
+    cold_broker = SessionBroker(store=store, keep_alive_after=3600, min_login_interval=0)
+    cold_client = make_client()
+    cold_broker.attach(cold_client)
+    cold_client.login.assert_not_called()
+    cold_client.keep_alive.assert_called_once()
+
+
+def test_session_broker_renews_rejected_token_once():
+    """A rejected token triggers one login; callers still holding it get the renewed token."""
+    from third_party.betting_platforms.betfair_exchange.session import SessionBroker
+
+    tokens = iter(["tok-1", "tok-2"])
+    first = MagicMock()
+    first.login.side_effect = lambda: setattr(first, "session_token", next(tokens))
+    second = MagicMock()
+
+    broker = SessionBroker(min_login_interval=0)
+    broker.attach(first)
+    broker.attach(second)
+
+    broker.renew(first, "tok-1")
+    broker.renew(second, "tok-1")
+
+    assert first.login.call_count == 2
+    second.login.assert_not_called()
+    assert second.session_token == "tok-2"
+
+
+def test_brokered_http_session_retries_invalid_session_once():
+    """An INVALID_SESSION response is retried with the broker's renewed token."""
+    from third_party.betting_platforms.betfair_exchange.session import BrokeredHTTPSession
+
+    broker = MagicMock()
+    api_client = Mock(api_uri="https://api.betfair.com/exchange/", session_token="tok-2")
+    http_session = BrokeredHTTPSession(broker)
+    http_session.api_client = api_client
+
+    rejected = Mock(content=b'{"error": {"data": {"APINGException": {"errorCode": "INVALID_SESSION_INFORMATION"}}}}')
+    accepted = Mock(content=b'{"result": []}')
+    url = "https://api.betfair.com/exchange/betting/json-rpc/v1"
+
+    with patch("requests.Session.post", side_effect=[rejected, accepted]) as post:
+        response = http_session.post(url, data="{}", headers={"X-Authentication": "tok-1"})
+
+    assert response is accepted
+    broker.renew.assert_called_once_with(api_client, "tok-1")
+    assert post.call_args.kwargs["headers"]["X-Authentication"] == "tok-2"
+
+
+def _wait_for(predicate, timeout=5.0):
+    import time
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_market_stream_cache_follows_local_stream_server():
+    """Subscribed fixtures are imaged into the cache, updated by deltas and dropped on unsubscribe."""
+    from third_party.betting_platforms.betfair_exchange.stream_server import LocalStreamServer
+    from third_party.betting_platforms.betfair_exchange.streaming import MarketStreamCache
+
+    server = LocalStreamServer(markets={
+        "1.100": {"event_id": "e1", "market_type": "MATCH_ODDS", "runners": {
+            11: {"back": [(2.0, 150.0), (1.98, 40.0)], "lay": [(2.02, 80.0)]},
+            12: {"back": [(3.5, 20.0)], "lay": [(3.6, 10.0)]},
+        }},
+        "1.200": {"event_id": "e2", "market_type": "MATCH_ODDS", "runners": {
+            21: {"back": [(1.5, 500.0)], "lay": [(1.52, 300.0)]},
+        }},
+        "1.300": {"event_id": "e1", "market_type": "CORRECT_SCORE", "runners": {
+            31: {"back": [(9.0, 5.0)], "lay": []},
+        }},
+    }).start()
+    cache = MarketStreamCache(Mock(), conflate_ms=0, stream_factory=server.create_stream)
+    try:
+        cache.subscribe(["e1"])
+        assert _wait_for(lambda: cache.get_market_book("1.100") is not None)
+        assert len(server.subscriptions) == 1
+        assert server.subscriptions[-1]["conflateMs"] == 0
+        assert server.subscriptions[-1]["marketFilter"]["eventIds"] == ["e1"]
+        # Market types outside the configured list are not streamed.
+        assert cache.get_market_book("1.300") is None
+
+        runner = next(r for r in cache.get_market_book("1.100").runners if r.selection_id == 11)
+        assert (runner.ex.available_to_back[0].price, runner.ex.available_to_back[0].size) == (2.0, 150.0)
+
+        server.push_prices("1.100", 11, back=[(2.1, 75.0)])
+
+        def best_back():
+            book = cache.get_market_book("1.100")
+            runner = next(r for r in book.runners if r.selection_id == 11)
+            return [(p.price, p.size) for p in runner.ex.available_to_back]
+
+        assert _wait_for(lambda: best_back() == [(2.1, 75.0)])
+
+        cache.subscribe(["e2"])
+        cache.unsubscribe(["e1"])
+        assert _wait_for(lambda: server.subscriptions[-1]["marketFilter"]["eventIds"] == ["e2"])
+        assert _wait_for(lambda: cache.get_market_book("1.200") is not None)
+        assert cache.get_market_book("1.100") is None
+
+        cache.stop()
+        assert not cache.running
+        assert cache.get_market_books(["1.200"]) == {}
+    finally:
+        cache.stop()
+        server.stop()
+
+
+def test_fetch_markets_with_odds_reads_streamed_books_first():
+    """Only markets missing from the stream cache are polled with list_market_book."""
+    with patch('betfairlightweight.APIClient'):
+        from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+        streamed_book = Mock(market_id="1.1")
+        market_stream = MagicMock()
+        market_stream.get_market_books.return_value = {"1.1": streamed_book}
+        client = BetfairExchange(
+            username="u", password="p", app_key="k", certs_path="/tmp", market_stream=market_stream
+        )
+        client.client.betting.list_market_book.return_value = [{"marketId": "1.2"}]
+
+        books = client._fetch_markets_with_odds([{"marketId": "1.1"}, {"marketId": "1.2"}])
+
+        assert books["1.1"] is streamed_book
+        assert set(books) == {"1.1", "1.2"}
+        client.client.betting.list_market_book.assert_called_once()
+        assert client.client.betting.list_market_book.call_args.kwargs["market_ids"] == ["1.2"]
+
+
+def _recorded_order(bet_id, status, size_matched, size_remaining, size_lapsed=0.0, avp=None):
+    order = {
+        "id": bet_id, "p": 2.0, "s": 10.0, "side": "B", "status": status, "pt": "L", "ot": "L",
+        "pd": 1735740000000, "sm": size_matched, "sr": size_remaining, "sl": size_lapsed,
+        "sc": 0.0, "sv": 0.0, "rfo": "", "rfs": "",
+    }
+    if avp is not None:
+        order["avp"] = avp
+    return order
+
+
+def test_order_stream_cache_replays_recorded_order_messages():
+    """A recorded order-stream session is replayed into per-bet state, including closed markets."""
+    from third_party.betting_platforms.betfair_exchange.stream_server import LocalStreamServer
+    from third_party.betting_platforms.betfair_exchange.streaming import OrderStreamCache
+
+    recording = [
+        {"op": "ocm", "ct": "SUB_IMAGE", "initialClk": "1", "clk": "1", "pt": 1735740000000, "oc": [
+            {"id": "1.100", "fullImage": True, "orc": [{"id": 11, "fullImage": True, "uo": [
+                _recorded_order("b1", "E", 4.0, 6.0, avp=2.0),
+                _recorded_order("b2", "EC", 0.0, 0.0, size_lapsed=10.0),
+            ]}]},
+            {"id": "1.200", "fullImage": True, "orc": [{"id": 21, "fullImage": True, "uo": [
+                _recorded_order("b3", "EC", 10.0, 0.0, avp=1.5),
+            ]}]},
+        ]},
+        {"op": "ocm", "clk": "2", "pt": 1735740060000, "oc": [
+            {"id": "1.100", "orc": [{"id": 11, "uo": [_recorded_order("b1", "EC", 10.0, 0.0, avp=2.02)]}]},
+        ]},
+        {"op": "ocm", "clk": "3", "pt": 1735740120000, "oc": [{"id": "1.200", "closed": True}]},
+    ]
+    server = LocalStreamServer(order_messages=recording).start()
+    cache = OrderStreamCache(Mock(), stream_factory=server.create_stream)
+    try:
+        assert cache.start(timeout=5)
+        assert _wait_for(lambda: cache.get_orders(["b3"]).get("b3", {}).get("market_closed"))
+
+        orders = cache.get_orders(["b1", "b2", "b3", "unknown"])
+        assert set(orders) == {"b1", "b2", "b3"}
+        assert orders["b1"]["status"] == "EXECUTION_COMPLETE"
+        assert (orders["b1"]["size_matched"], orders["b1"]["average_price_matched"]) == (10.0, 2.02)
+        assert orders["b1"]["market_closed"] is False
+        assert (orders["b2"]["size_matched"], orders["b2"]["size_lapsed"]) == (0.0, 10.0)
+        assert orders["b3"]["market_id"] == "1.200" and orders["b3"]["selection_id"] == 21
+        assert server.subscriptions[0]["op"] == "orderSubscription"
+    finally:
+        cache.stop()
+        server.stop()
+
+
+def test_get_market_liquidities_packs_book_calls_and_caches_them():
+    """Many selections resolve with one packed set of book calls, reused within the cache TTL."""
+    with patch('betfairlightweight.APIClient'):
+        from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+
+        def make_book(market_id):
+            return {
+                "marketId": market_id,
+                "runners": [
+                    {"selectionId": 1, "ex": {"availableToBack": [{"price": 2.0, "size": 120.0}]}},
+                    {"selectionId": 2, "ex": {"availableToBack": []}},
+                ],
+            }
+
+        client.client.betting.list_market_book.side_effect = (
+            lambda market_ids, price_projection, lightweight: [make_book(m) for m in market_ids]
+        )
+        selections = [(f"1.{i}", 1) for i in range(45)] + [("1.0", 2), ("1.0", 99)]
+
+        liquidity = client.get_market_liquidities(selections)
+
+        assert client.client.betting.list_market_book.call_count == 2
+        assert liquidity[("1.44", 1)] == 120.0
+        assert liquidity[("1.0", 2)] == 0.0
+        assert liquidity[("1.0", 99)] == 0.0
+
+        assert client.get_market_liquidity("1.7", 1) == 120.0
+        assert client.client.betting.list_market_book.call_count == 2
+
+        client.book_cache_ttl = 0
+        client.get_market_liquidity("1.7", 1)
+        assert client.client.betting.list_market_book.call_count == 3
+
+
+def test_request_packer_fills_data_weight_and_adapts():
+    """Requests are sized from projection weights and shrink after TOO_MUCH_DATA."""
+    from third_party.betting_platforms.betfair_exchange.packer import RequestPacker, book_weight, catalogue_weight
+    from third_party.betting_platforms.betfair_exchange.constants import CATALOGUE_MARKET_PROJECTION
+
+    assert book_weight(['EX_BEST_OFFERS']) == 5
+    assert book_weight(['EX_BEST_OFFERS', 'EX_TRADED']) == 20
+    assert book_weight(['EX_ALL_OFFERS', 'EX_TRADED', 'SP_AVAILABLE']) == 35
+    assert book_weight([]) == 2
+    assert catalogue_weight(CATALOGUE_MARKET_PROJECTION) == 2
+
+    assert RequestPacker(book_weight(['EX_BEST_OFFERS'])).capacity == 40
+    packer = RequestPacker(catalogue_weight(CATALOGUE_MARKET_PROJECTION))
+    assert packer.capacity == 100
+    counts = {"a": 60, "b": 30, "c": 20, "d": 150, "e": None}
+    assert packer.pack(["a", "b", "c", "d", "e"], counts, default_count=10) == [["a", "b"], ["c"], ["d"], ["e"]]
+
+    assert packer.record_too_much_data(100) == 50
+    assert packer.record_too_much_data(120) == 50
+    assert packer.pack(["a", "b", "c"], counts) == [["a"], ["b", "c"]]
+
+
+def test_fetch_market_books_splits_chunks_on_too_much_data():
+    """A TOO_MUCH_DATA chunk is split and re-requested, and later chunks use the smaller size."""
+    with patch('betfairlightweight.APIClient'):
+        from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+        def fake_list_market_book(market_ids, price_projection, lightweight):
+            if len(market_ids) > 10:
+                raise Exception("APINGException: TOO_MUCH_DATA")
+            return [{"marketId": market_id} for market_id in market_ids]
+
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        client.client.betting.list_market_book.side_effect = fake_list_market_book
+
+        books = client._fetch_market_books([f"1.{i}" for i in range(40)])
+
+        assert len(books) == 40
+        assert client.book_packer.capacity == 10
+        calls_before = client.client.betting.list_market_book.call_count
+
+        client.book_cache_ttl = 0
+        client._fetch_market_books([f"2.{i}" for i in range(40)])
+        assert client.client.betting.list_market_book.call_count - calls_before == 4
+
+
+def test_build_catalogue_filters_packs_competitions_by_market_count():
+    """Competitions share calls up to the weight limit; empty ones are skipped, oversized ones paged by event."""
+    with patch('betfairlightweight.APIClient'):
+        from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        client.reference_data = MagicMock()
+        client.reference_data.resolve_event_type_id.return_value = "1"
+        client.reference_data.resolve_competition_ids.side_effect = lambda betting, event_type_id, name: [name]
+
+        def competition(comp_id, market_count):
+            return Mock(competition=Mock(id=comp_id), market_count=market_count)
+
+        client.client.betting.list_competitions.return_value = [
+            competition("A", 60), competition("B", 30), competition("D", 250),
+        ]
+        client.client.betting.list_events.return_value = [
+            Mock(event=Mock(id=f"e{i}"), market_count=50) for i in range(5)
+        ]
+
+        filters = client._build_catalogue_filters(
+            "Soccer", ["A", "B", "C", "D"], None, None, None, None, False
+        )
+
+        assert [f.get("eventIds") or f.get("competitionIds") for f in filters] == [
+            ["A", "B"], ["e0", "e1"], ["e2", "e3"], ["e4"],
+        ]
+        assert client.client.betting.list_events.call_args.kwargs["filter"]["competitionIds"] == ["D"]
+        assert filters[0]["marketTypeCodes"] == ["MATCH_ODDS"]
+
+
+def test_list_cleared_orders_pages_chunks_and_deduplicates():
+    """Every status and bet-ID chunk is queried, pages are followed until exhausted and bets appear once."""
+    with patch('betfairlightweight.APIClient'), \
+         patch('third_party.betting_platforms.betfair_exchange.client.CLEARED_ORDERS_BET_ID_CHUNK', 2):
+        from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+        def order(bet_id, profit):
+            return Mock(bet_id=bet_id, market_id="1.1", selection_id=1, profit=profit)
+
+        settled = [order("b1", 5.0), order("b2", -2.0), order("b3", 1.0)]
+
+        def fake_list_cleared_orders(bet_status, bet_ids, settled_date_range, from_record, record_count):
+            if bet_status == "SETTLED":
+                matching = [o for o in settled if o.bet_id in bet_ids]
+                page = matching[from_record:from_record + 1]
+                return Mock(orders=page, more_available=from_record + 1 < len(matching))
+            if bet_status == "VOIDED" and "b1" in bet_ids:
+                return Mock(orders=[order("b1", 0.0)], more_available=False)
+            return Mock(orders=[], more_available=False)
+
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        client.client.betting.list_cleared_orders.side_effect = fake_list_cleared_orders
+
+        results = client.list_cleared_orders(bet_ids=["b1", "b2", "b3"])
+
+        assert [(r["bet_id"], r["status"]) for r in results] == [("b1", "WON"), ("b2", "LOST"), ("b3", "WON")]
+        calls = client.client.betting.list_cleared_orders.call_args_list
+        assert {tuple(c.kwargs["bet_ids"]) for c in calls} == {("b1", "b2"), ("b3",)}
+        assert {c.kwargs["bet_status"] for c in calls} == {"SETTLED", "VOIDED", "LAPSED", "CANCELLED"}
+        # Two SETTLED pages for the first chunk, one for the second, one per chunk for the other statuses.
+        assert len(calls) == 3 + 3 * 2
+
+
+def test_place_bets_places_markets_concurrently_and_keeps_aggregation():
+    """Markets are placed in parallel; results keep their order and status aggregation, with latency per market."""
+    import threading
+
+    with patch('betfairlightweight.APIClient'), patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+        from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fake_place_orders(market_id, instructions):
+            barrier.wait()  # only passes if all three markets are in flight at once
+            if market_id == "1.3":
+                raise Exception("Connection reset by peer")
+            reports = [
+                Mock(status="SUCCESS", bet_id=f"bet-{market_id}-{i.get('selectionId')}",
+                     average_price_matched=2.0, size_matched=5.0)
+                if market_id == "1.1" else Mock(status="FAILURE", error_code="INVALID_ODDS")
+                for i in instructions
+            ]
+            return Mock(status="SUCCESS", place_instruction_reports=reports)
+
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        client.client.betting.place_orders.side_effect = fake_place_orders
+
+        result = client.place_bets([
+            {"market_id": "1.1", "selection_id": 11, "stake": 5.0, "odds": 2.0},
+            {"market_id": "1.2", "selection_id": 21, "stake": 5.0, "odds": 3.0},
+            {"market_id": "1.1", "selection_id": 12, "stake": 5.0, "odds": 2.5},
+            {"market_id": "1.3", "selection_id": 31, "stake": 5.0, "odds": 4.0},
+        ])
+
+        assert [(b["market_id"], b["selection_id"], b["status"]) for b in result["bets"]] == [
+            ("1.1", 11, "SUCCESS"), ("1.1", 12, "SUCCESS"), ("1.2", 21, "FAILURE"), ("1.3", 31, "FAILURE"),
+        ]
+        assert result["bets"][0]["bet_id"] == "bet-1.1-11"
+        assert result["status"] == "FAILURE"
+        assert set(result["market_latency_ms"]) == {"1.1", "1.2", "1.3"}
+
+        client.client.betting.place_orders.side_effect = lambda market_id, instructions: Mock(
+            status="SUCCESS",
+            place_instruction_reports=[Mock(status="FAILURE", error_code="INVALID_ODDS")],
+        )
+        partial = client.place_bets([{"market_id": "1.1", "selection_id": 11, "stake": 5.0, "odds": 2.0}])
+        assert partial["status"] == "PARTIAL_FAILURE"
+
+        client.client.betting.place_orders.reset_mock()
+        assert client.place_bets([]) == {"status": "SUCCESS", "bets": []}
+        assert not client.client.betting.place_orders.called
+
+
+def test_parse_market_books_builds_compact_books_from_raw_json():
+    """Raw listMarketBook JSON becomes slotted books that the runner-option builder reads directly."""
+    with patch('betfairlightweight.APIClient'):
+        from third_party.betting_platforms.betfair_exchange.books import parse_market_books
+        from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+        raw = [{
+            "marketId": "1.5", "status": "OPEN", "inplay": False, "totalMatched": 5400.0,
+            "runners": [
+                {"selectionId": 1, "status": "ACTIVE", "lastPriceTraded": 2.1, "ex": {
+                    "availableToBack": [{"price": 2.1, "size": 30.0}, {"price": 2.08, "size": 75.5}],
+                    "availableToLay": [{"price": 2.12, "size": 12.0}],
+                }},
+                {"selectionId": 2, "status": "ACTIVE"},
+            ],
+        }]
+
+        book = parse_market_books(raw)[0]
+
+        assert not hasattr(book, "__dict__") and not hasattr(book.runners[0], "__dict__")
+        assert (book.market_id, book.total_matched) == ("1.5", 5400.0)
+        assert [(p.price, p.size) for p in book.runners[0].ex.available_to_back] == [(2.1, 30.0), (2.08, 75.5)]
+        assert book.runners[1].ex.available_to_back == ()
+
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        market = {"runners": [{"selectionId": 1, "runnerName": "Home"}, {"selectionId": 2, "runnerName": "Away"}]}
+        assert client._build_runner_options(market, book) == [
+            {"name": "Home", "odds": 2.1, "selection_id": 1},
+            {"name": "Away", "odds": None, "selection_id": 2},
+        ]
+        assert client._best_back_size(book, 1) == 30.0
+
+
+def test_estimate_fill_prices_walks_full_depth_ladders():
+    """Full-depth books are fetched with EX_ALL_OFFERS/EX_TRADED and a stake is filled level by level."""
+    with patch('betfairlightweight.APIClient'):
+        from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+        def make_book(market_id):
+            return {
+                "marketId": market_id,
+                "runners": [
+                    {"selectionId": 1, "ex": {
+                        "availableToBack": [{"price": 3.0, "size": 10.0}, {"price": 2.9, "size": 20.0}, {"price": 2.8, "size": 5.0}],
+                        "availableToLay": [{"price": 3.1, "size": 100.0}],
+                        "tradedVolume": [{"price": 3.0, "size": 250.0}],
+                    }},
+                    {"selectionId": 2, "ex": {"availableToBack": [{"price": 1.5, "size": 4.0}]}},
+                    {"selectionId": 3, "ex": {}},
+                ],
+            }
+
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        client.client.betting.list_market_book.side_effect = (
+            lambda market_ids, price_projection, lightweight: [make_book(m) for m in market_ids]
+        )
+
+        fills = client.estimate_fill_prices([f"1.{i}" for i in range(8)], stake=20.0)
+
+        calls = client.client.betting.list_market_book.call_args_list
+        assert [len(c.kwargs["market_ids"]) for c in calls] == [6, 2]
+        assert calls[0].kwargs["price_projection"]["priceData"] == ["EX_ALL_OFFERS", "EX_TRADED"]
+        assert len(fills) == 24
+        # 10 @ 3.0 + 10 @ 2.9
+        assert fills[("1.0", 1)] == {"stake": 20.0, "average_price": 2.95, "matched": 20.0, "unfilled": 0.0}
+        assert fills[("1.7", 2)] == {"stake": 20.0, "average_price": 1.5, "matched": 4.0, "unfilled": 16.0}
+        assert fills[("1.7", 3)]["average_price"] is None
+
+        lay = client.estimate_fill_prices(["1.0"], stake=20.0, side="LAY")
+        assert lay[("1.0", 1)]["average_price"] == 3.1
+
+
+def test_base_platform_async_methods_default_to_worker_threads():
+    """Platforms without a native async transport still serve the *_async methods."""
+    import asyncio
+
+    with patch('betfairlightweight.APIClient'):
+        from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        client.client.account.get_account_funds.return_value = Mock(
+            available_to_bet_balance=50.0, exposure=-5.0, retained_commission=0.0,
+            exposure_limit=-10000.0, discount_rate=0.0, points_balance=3,
+        )
+
+        balance = asyncio.run(client.get_balance_async())
+
+        assert balance["available_balance"] == 50.0
+        assert balance["exposure"] == -5.0
+
+
+def test_async_client_multiplexes_json_rpc_calls():
+    """AsyncBetfairExchange fans book chunks, placements and cleared-order pages out as concurrent JSON-RPC calls."""
+    import asyncio
+    import json
+
+    httpx = pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+
+    with patch('betfairlightweight.APIClient') as MockAPIClient:
+        from third_party.betting_platforms.betfair_exchange.async_client import AsyncBetfairExchange
+        from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+
+        MockAPIClient.return_value.api_uri = "https://api.betfair.com/exchange/"
+        MockAPIClient.return_value.app_key = "k"
+        MockAPIClient.return_value.session_token = "token"
+
+        in_flight = {"now": 0, "max": 0}
+        requests_seen = []
+
+        async def handler(request):
+            body = json.loads(request.content)
+            method = body["method"].split("/")[-1]
+            params = body["params"]
+            requests_seen.append((method, params))
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            in_flight["now"] -= 1
+
+            if method == "listMarketBook":
+                result = [
+                    {"marketId": m, "totalMatched": 500.0, "runners": [
+                        {"selectionId": 1, "ex": {"availableToBack": [{"price": 2.0, "size": 10.0}]}}
+                    ]}
+                    for m in params["marketIds"]
+                ]
+            elif method == "placeOrders":
+                if params["marketId"] == "1.9":
+                    return httpx.Response(200, json={"jsonrpc": "2.0", "id": 1, "error": {
+                        "code": -32099, "message": "ANGX-0003",
+                        "data": {"APINGException": {"errorCode": "INVALID_INPUT_DATA"}},
+                    }})
+                result = {"status": "SUCCESS", "marketId": params["marketId"], "instructionReports": [
+                    {"status": "SUCCESS", "betId": f"bet-{params['marketId']}", "averagePriceMatched": 2.0,
+                     "sizeMatched": 5.0, "instruction": i}
+                    for i in params["instructions"]
+                ]}
+            elif method == "listClearedOrders":
+                orders = [
+                    {"betId": b, "marketId": "1.1", "selectionId": 1, "profit": 5.0, "side": "BACK",
+                     "priceRequested": 2.0, "priceMatched": 2.0, "sizeSettled": 5.0,
+                     "settledDate": "2025-01-01T12:00:00.000Z"}
+                    for b in params.get("betIds", [])
+                ] if params["betStatus"] == "SETTLED" else []
+                result = {"clearedOrders": orders, "moreAvailable": False}
+            else:
+                result = {}
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": 1, "result": result})
+
+        client = AsyncBetfairExchange(
+            username="u", password="p", app_key="k", certs_path="/tmp", transport=httpx.MockTransport(handler),
+        )
+
+        async def run():
+            books = await client._fetch_market_books_async([f"1.{i}" for i in range(100)])
+            placed = await client.place_bets_async([
+                {"market_id": "1.1", "selection_id": 1, "stake": 5.0, "odds": 2.0},
+                {"market_id": "1.2", "selection_id": 1, "stake": 5.0, "odds": 2.0},
+                {"market_id": "1.9", "selection_id": 1, "stake": 5.0, "odds": 2.0},
+            ])
+            cleared = await client.list_cleared_orders_async(bet_ids=["bet-1.1", "bet-1.2"])
+            placed_calls = sum(1 for method, _ in requests_seen if method == "placeOrders")
+            assert await client.place_bets_async([]) == {"status": "SUCCESS", "bets": []}
+            assert sum(1 for method, _ in requests_seen if method == "placeOrders") == placed_calls
+            await client.place_bets_async([
+                {"market_id": "1.1", "selection_id": 1, "stake": 5.0, "odds": 2.0, "customer_order_ref": "ref-1"},
+            ])
+            await client.aclose()
+            return books, placed, cleared
+
+        with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+            books, placed, cleared = asyncio.run(run())
+
+        assert len(books) == 100 and books["1.42"].runners[0].ex.available_to_back[0].price == 2.0
+        assert in_flight["max"] > 1
+        assert [b["status"] for b in placed["bets"]] == ["SUCCESS", "SUCCESS", "FAILURE"]
+        assert placed["status"] == "FAILURE"
+        assert "INVALID_INPUT_DATA" in placed["bets"][2]["error_code"]
+        assert [(c["bet_id"], c["status"]) for c in cleared] == [("bet-1.1", "WON"), ("bet-1.2", "WON")]
+        place_params = [p for m, p in requests_seen if m == "placeOrders"]
+        assert all("customerRef" not in p for p in place_params[:3])
+        assert place_params[3]["customerRef"] == BetfairExchange._customer_ref([{"customer_order_ref": "ref-1"}])
+        assert place_params[3]["instructions"][0]["customerOrderRef"] == "ref-1"
+        assert {p["betStatus"] for m, p in requests_seen if m == "listClearedOrders"} == {
+            "SETTLED", "VOIDED", "LAPSED", "CANCELLED",
+        }
+
+
+def test_client_runs_end_to_end_against_local_exchange_simulator():
+    """Login, packed search, TOO_MUCH_DATA, injected errors, placement and settlement over real HTTP."""
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+    from third_party.betting_platforms.betfair_exchange.session import SessionBroker
+    from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+
+    simulator = LocalExchangeSimulator(seed_markets(600, competitions=4), max_weight=100).start()
+    try:
+        client = BetfairExchange(
+            username="u", password="p", app_key="k", certs_path="/tmp",
+            session_broker=SessionBroker(min_login_interval=0),
+        )
+        simulator.attach(client.client)
+        client.login()
+        # The simulator allows half of Betfair's weight, so the client must learn to pack smaller requests.
+        simulator.inject_error("listMarketBook", "SERVICE_BUSY")
+
+        events = client.search_market("Soccer", ["Sim League 1"], max_results=1000)
+
+        assert len(events) == 150
+        assert client.book_packer.capacity == 20
+        assert simulator.calls["listMarketCatalogue"] >= 2
+
+        market = events[0]["options"][0]
+        runner = market["options"][0]
+        with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+            placed = client.place_bets([{
+                "market_id": market["market_id"], "selection_id": runner["selection_id"],
+                "stake": 2.0, "odds": runner["odds"],
+            }])
+        assert placed["status"] == "SUCCESS"
+        assert placed["bets"][0]["size_matched"] == 2.0
+
+        simulator.settle_market(market["market_id"], winner=runner["selection_id"])
+        cleared = client.list_cleared_orders(bet_ids=[placed["bets"][0]["bet_id"]])
+        assert cleared[0]["status"] == "WON"
+        assert cleared[0]["profit"] == round(2.0 * (runner["odds"] - 1), 2)
+
+        # A dead session is renewed by the broker and the call retried.
+        simulator.expire_sessions()
+        assert client.get_balance()["available_balance"] == round(1000.0 + cleared[0]["profit"], 2)
+        assert simulator.calls["certlogin"] == 2
+    finally:
+        simulator.stop()
+
+
+def test_search_market_pushes_date_into_market_start_time():
+    """A date search only lists, prices and returns that UTC day's markets."""
+    from datetime import datetime, timedelta, timezone
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+    from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+
+    window = BetfairExchange._market_start_window
+    start, end = window("2025-03-30", "2025-03-30T09:00:00+01:00", None)
+    assert (start.isoformat(), end.isoformat()) == ("2025-03-30T08:00:00+00:00", "2025-03-30T23:59:59+00:00")
+    assert window("2025-03-30", "2025-03-31T10:00:00Z", None) is None
+
+    day = datetime(2025, 3, 30, tzinfo=timezone.utc)
+    simulator = LocalExchangeSimulator(seed_markets(300, competitions=3, start=day, days=3)).start()
+    try:
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        simulator.attach(client.client)
+        client.login()
+
+        everything = client.search_market("Soccer", max_results=1000)
+        client._book_cache.clear()
+        simulator.calls.clear()
+        events = client.search_market("Soccer", date="2025-03-31", max_results=1000)
+
+        by_id = lambda found: sorted(found, key=lambda e: e["provider_event_id"])
+        assert by_id(events) == by_id(client._filter_events_by_date(everything, "2025-03-31"))
+        assert events and all(e["time"].startswith("2025-03-31") for e in events)
+        # Only that day's third of the 300 markets is priced: three book chunks instead of eight.
+        assert simulator.calls["listMarketBook"] == 3
+        assert client.search_market("Soccer", date="2025-03-31", from_time="2025-04-01T00:00:00Z") == []
+    finally:
+        simulator.stop()
+
+
+def test_search_market_prescreens_liquidity_from_catalogue_totals():
+    """Markets whose catalogue totalMatched is under the minimum are never priced."""
+    from constants import AUTOMATED_BETTING_OPTIONS
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+    from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+
+    markets = seed_markets(400, competitions=4)
+    liquid = {m for m, market in markets.items() if market["total_matched"] >= 40000}
+    simulator = LocalExchangeSimulator(markets).start()
+    try:
+        def search(min_liquidity):
+            client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+            simulator.attach(client.client)
+            client.login()
+            simulator.calls.clear()
+            with patch.dict(AUTOMATED_BETTING_OPTIONS, {"MIN_MATCHED_LIQUIDITY": min_liquidity}):
+                return client, client.search_market("Soccer", max_results=1000), simulator.calls["listMarketBook"]
+
+        _, _, unscreened_calls = search(0)
+        client, events, screened_calls = search(40000)
+
+        assert {o["market_id"] for e in events for o in e["options"]} == liquid
+        assert client.prescreened_markets == 400 - len(liquid)
+        assert screened_calls * 2 <= unscreened_calls
+    finally:
+        simulator.stop()
+
+
+def test_get_markets_for_events_packs_many_events_and_caches_them():
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+    from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+
+    markets = seed_markets(120, competitions=2, market_types=("MATCH_ODDS", "OVER_UNDER_25", "BOTH_TEAMS_TO_SCORE"))
+    event_ids = sorted({m["event_id"] for m in markets.values()})[:30]
+    simulator = LocalExchangeSimulator(markets).start()
+    try:
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        simulator.attach(client.client)
+        client.login()
+        simulator.calls.clear()
+
+        by_event = client.get_markets_for_events(event_ids + ["404"])
+
+        assert set(by_event) == set(event_ids) | {"404"}
+        assert by_event["404"] == []
+        assert all(len(by_event[e]) == 3 for e in event_ids)
+        # 90 markets: one count call, one catalogue page and three book chunks instead of 30 of each.
+        assert dict(simulator.calls) == {"listEvents": 1, "listMarketCatalogue": 1, "listMarketBook": 3}
+
+        simulator.calls.clear()
+        assert client.get_event_markets(event_ids[0]) == by_event[event_ids[0]]
+        assert client.get_markets_for_events(event_ids[:5]) == {e: by_event[e] for e in event_ids[:5]}
+        assert not simulator.calls
+    finally:
+        simulator.stop()
+
+
+def test_async_get_markets_for_events_uses_the_bulk_path_and_shares_the_cache():
+    """The async client packs events the same way, returns the same markets and reuses the shared cache."""
+    import asyncio
+
+    pytest.importorskip("h2")
+    from third_party.betting_platforms.betfair_exchange.async_client import AsyncBetfairExchange
+    from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+
+    markets = seed_markets(60, competitions=2, market_types=("MATCH_ODDS", "OVER_UNDER_25"))
+    event_ids = sorted({m["event_id"] for m in markets.values()})[:20]
+    simulator = LocalExchangeSimulator(markets).start()
+    try:
+        client = AsyncBetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        simulator.attach(client.client)
+        client.login()
+        simulator.calls.clear()
+
+        async def run():
+            by_event = await client.get_markets_for_events_async(event_ids)
+            single = await client.get_event_markets_async(event_ids[0])
+            await client.aclose()
+            return by_event, single
+
+        by_event, single = asyncio.run(run())
+
+        assert all(len(by_event[e]) == 2 for e in event_ids)
+        assert single == by_event[event_ids[0]]
+        assert dict(simulator.calls) == {"listEvents": 1, "listMarketCatalogue": 1, "listMarketBook": 1}
+        client._book_cache.clear()
+        assert client.get_markets_for_events(event_ids) == by_event
+        assert dict(simulator.calls) == {"listEvents": 1, "listMarketCatalogue": 1, "listMarketBook": 1}
+    finally:
+        simulator.stop()
+
+
+def test_request_governor_paces_calls_and_books_transactions_per_hour():
+    """Calls wait for their method's bucket, and placements are booked in a shared hourly ledger."""
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+    from third_party.betting_platforms.betfair_exchange.governor import (
+        RequestGovernor, TokenBucket, TransactionBudgetExhausted, TransactionLedger,
+    )
+    from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+
+    bucket = TokenBucket(rate=10, burst=2)
+    assert [round(bucket.reserve(), 1) for _ in range(4)] == [0.0, 0.0, 0.1, 0.2]
+
+    class Store:
+        snapshot = None
+        loads = 0
+
+        def load(self):
+            self.loads += 1
+            return self.snapshot
+
+        def save(self, data):
+            self.snapshot = data
+
+    store = Store()
+    TransactionLedger(limit=10, store=store).reserve(8)
+    other_instance = TransactionLedger(limit=10, store=store, max_wait=3600)
+    assert other_instance.reserve(2) == 0
+    # The hour is full across both instances, so the next booking waits for the next hour.
+    assert 0 < other_instance.reserve(1) <= 3600
+    # The snapshot is synced at most once per sync interval, not on every booking.
+    assert store.loads == 2
+
+    # Past max_wait the call fails fast and books nothing.
+    exhausted = TransactionLedger(limit=10, max_wait=0)
+    exhausted.reserve(10)
+    with pytest.raises(TransactionBudgetExhausted, match="transaction budget exhausted"):
+        exhausted.reserve(1)
+    assert exhausted.used() == 10
+
+    governor = RequestGovernor(method_rates={"listMarketBook": (10, 1)})
+    simulator = LocalExchangeSimulator(seed_markets(200, competitions=2)).start()
+    try:
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp", governor=governor)
+        simulator.attach(client.client)
+        client.login()
+        events = client.search_market("Soccer", max_results=1000)
+        runners = [(m["market_id"], m["options"][0]) for e in events[:3] for m in e["options"]]
+        with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+            placed = client.place_bets([
+                {"market_id": market_id, "selection_id": r["selection_id"], "stake": 2.0, "odds": r["odds"]}
+                for market_id, r in runners
+            ])
+        assert placed["status"] == "SUCCESS"
+        assert governor.throttled["listMarketBook"] == simulator.calls["listMarketBook"] - 1
+        assert governor.ledger.used() == 3
+    finally:
+        simulator.stop()
+
+
+def test_resilience_retries_by_error_class_and_opens_the_circuit():
+    """Throttles and transient faults are retried, fatal errors are not, and repeated failures fail fast."""
+    from betfairlightweight.exceptions import APIError, StatusCodeError
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+    from third_party.betting_platforms.betfair_exchange.governor import TransactionBudgetExhausted
+    from third_party.betting_platforms.betfair_exchange.resilience import (
+        FATAL, RETRYABLE, THROTTLE, CircuitOpenError, Resilience, classify_error,
+    )
+    from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+
+    assert classify_error(StatusCodeError("429")) == THROTTLE
+    assert classify_error(StatusCodeError("503")) == RETRYABLE
+    assert classify_error(StatusCodeError("403")) == FATAL
+    assert classify_error(APIError(None, "listMarketBook", {}, requests.Timeout())) == RETRYABLE
+    assert classify_error(APIError({}, "listMarketBook", {}, "INVALID_SESSION_INFORMATION")) == FATAL
+    assert classify_error(ValueError("bad filter")) == FATAL
+    assert classify_error(APIError(None, "placeOrders", {}, TransactionBudgetExhausted(1, 600))) == FATAL
+
+    resilience = Resilience(backoff=0, throttle_backoff=0, failure_threshold=3, reset_after=60)
+    simulator = LocalExchangeSimulator(seed_markets(20)).start()
+    try:
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp", resilience=resilience)
+        simulator.attach(client.client)
+        client.login()
+        simulator.inject_error("listMarketBook", "TOO_MANY_REQUESTS")
+        simulator.inject_error("getAccountFunds", "INVALID_APP_KEY")
+
+        assert client.search_market("Soccer", max_results=100)
+        with pytest.raises(Exception):
+            client.get_balance()
+        stats = resilience.stats()
+        assert stats["listMarketBook"]["errors_throttle"] == 1
+        assert stats["listMarketBook"]["retries"] == 1
+        assert stats["getAccountFunds"]["errors_fatal"] == 1
+        assert "retries" not in stats["getAccountFunds"]
+    finally:
+        simulator.stop()
+
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        raise requests.ConnectionError("reset")
+
+    for _ in range(3):
+        with pytest.raises(requests.ConnectionError):
+            resilience.call("listEvents", flaky, attempts=1)
+    with pytest.raises(CircuitOpenError):
+        resilience.call("listEvents", flaky)
+    assert len(calls) == 3
+    assert resilience.stats()["listEvents"]["circuit"] == "open"
+    assert resilience.stats()["listEvents"]["short_circuited"] == 1
+    # Placement is not retried on a transient fault, which may have reached the exchange.
+    with pytest.raises(requests.ConnectionError):
+        resilience.call("placeOrders", flaky, idempotent=False)
+    assert len(calls) == 4
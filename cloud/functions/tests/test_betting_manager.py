@@ -247,6 +247,407 @@ def test_check_bet_results(betting_manager):
     result = betting_manager.check_bet_results()
     
     assert betting_manager.betfair.list_cleared_orders.called
-    assert betting_manager.repo.update_bet.called
+    assert betting_manager.repo.update_bets.called
     assert result["status"] == "success"
 
+
+def test_check_bet_results_uses_order_stream_state(betting_manager):
+    """Slips with live orders are synced from the order stream; only settled candidates are polled."""
+    live_slip = {
+        "id": "live_slip",
+        "placement_results": {"bets": [{"bet_id": "b1", "market_id": "1.1", "size_matched": 0.0}]},
+    }
+    betting_manager.repo.get_placed_bets.return_value = [
+        live_slip,
+        {
+            "id": "closed_slip",
+            "placement_results": {"bets": [{"bet_id": "b2", "market_id": "1.2"}]},
+        },
+    ]
+    # A top-up the order monitor appended after the slip was read survives the sync.
+    stored = {**live_slip, "placement_results": {"bets": live_slip["placement_results"]["bets"] + [{"bet_id": "b3"}]}}
+    transacted = {}
+
+    def update_bet_transactionally(bet_id, build_update):
+        transacted[bet_id] = build_update(stored)
+        return transacted[bet_id]
+
+    betting_manager.repo.update_bet_transactionally.side_effect = update_bet_transactionally
+    betting_manager.betfair.get_order_states.return_value = {
+        "b1": {
+            "bet_id": "b1", "status": "EXECUTABLE", "size_matched": 4.0,
+            "average_price_matched": 2.0, "market_closed": False,
+        },
+        "b2": {
+            "bet_id": "b2", "status": "EXECUTION_COMPLETE", "size_matched": 5.0,
+            "average_price_matched": 3.0, "market_closed": True,
+        },
+    }
+    betting_manager.betfair.list_cleared_orders.return_value = [
+        {"bet_id": "b2", "status": "WON", "profit": 10.0}
+    ]
+
+    result = betting_manager.check_bet_results()
+
+    betting_manager.betfair.list_cleared_orders.assert_called_once_with(bet_ids=["b2"])
+    updates = betting_manager.repo.update_bets.call_args.args[0]
+    assert "live_slip" not in updates
+    synced_bets = transacted["live_slip"]["placement_results"]["bets"]
+    assert (synced_bets[0]["size_matched"], synced_bets[0]["order_status"]) == (4.0, "EXECUTABLE")
+    assert [b["bet_id"] for b in synced_bets] == ["b1", "b3"]
+    assert updates["closed_slip"]["status"] == "finished"
+    assert result["placements_synced"] == 1
+    assert result["bets_updated"] == 1
+
+
+def test_check_bet_results_settles_every_slip_in_one_bulk_pass(betting_manager):
+    """Bet IDs across slips go into one cleared-orders lookup whose results fan back out to their slips."""
+    betting_manager.repo.get_placed_bets.return_value = [
+        {"id": "slip_a", "placement_results": {"bets": [{"bet_id": "a1"}, {"bet_id": "a2"}]}, "balance": {"starting": 100.0}},
+        {"id": "slip_b", "placement_results": {"bets": [{"bet_id": "b1"}]}, "settlement_results": [{"bet_id": "b1", "profit": 0}]},
+        {"id": "slip_c", "placement_results": {"bets": [{"bet_id": "c1"}]}},
+        {"id": "slip_d", "placement_results": {"bets": []}},
+    ]
+    betting_manager.betfair.list_cleared_orders.return_value = [
+        {"bet_id": "a1", "status": "WON", "profit": 6.0},
+        {"bet_id": "c1", "status": "LOST", "profit": -5.0},
+        {"bet_id": "a2", "status": "LOST", "profit": -2.0},
+        {"bet_id": "zz", "status": "WON", "profit": 1.0},
+    ]
+    betting_manager._settlement.wallet_service.sync_balance = MagicMock()
+    betting_manager._settlement.learnings_manager.analyze_finished_bet = MagicMock()
+
+    result = betting_manager.check_bet_results()
+
+    betting_manager.betfair.list_cleared_orders.assert_called_once_with(bet_ids=["a1", "a2", "b1", "c1"])
+    betting_manager.repo.update_bets.assert_called_once()
+    assert not betting_manager.repo.update_bet.called
+    updates = betting_manager.repo.update_bets.call_args.args[0]
+    assert set(updates) == {"slip_a", "slip_c", "slip_d"}
+    assert updates["slip_a"]["status"] == "finished" and updates["slip_a"]["balance"]["ending"] == 104.0
+    assert [s["bet_id"] for s in updates["slip_c"]["settlement_results"]] == ["c1"]
+    assert updates["slip_d"]["status"] == "rejected"
+    betting_manager._settlement.wallet_service.sync_balance.assert_called_once()
+    assert betting_manager._settlement.learnings_manager.analyze_finished_bet.call_count == 2
+    assert result["bets_updated"] == 2
+
+
+
+def test_fetch_and_store_daily_fixtures_streams_chunks(betting_manager, sample_event):
+    """Daily fixtures are annotated and handed to the repository chunk by chunk."""
+    second_event = {**sample_event, "provider_event_id": "654321", "name": "Arsenal v Chelsea"}
+    betting_manager.betfair.search_market_iter = MagicMock(return_value=iter([[sample_event], [second_event]]))
+    saved_chunks = []
+
+    def fake_batch_save_fixture_chunks(date_str, chunks, on_chunk_saved=None):
+        for chunk in chunks:
+            saved_chunks.append(chunk)
+            on_chunk_saved(len(chunk))
+        return sum(len(chunk) for chunk in saved_chunks)
+
+    repo = MagicMock()
+    repo.batch_save_fixture_chunks.side_effect = fake_batch_save_fixture_chunks
+    betting_manager._daily_fixtures_repo_instance = repo
+
+    result = betting_manager.fetch_and_store_daily_fixtures(target_date="2025-01-01")
+
+    assert result == {"status": "success", "count": 2, "date": "2025-01-01"}
+    assert [chunk[0]["provider_event_id"] for chunk in saved_chunks] == ["123456", "654321"]
+    assert saved_chunks[1][0]["has_reliable_team"] is True
+    assert saved_chunks[0][0]["is_reliable_competition"] is True
+
+    # A stream that fails partway still reports the fixtures already stored.
+    def failing_stream(**kwargs):
+        yield [sample_event]
+        raise ConnectionError("stream dropped")
+
+    saved_chunks.clear()
+    betting_manager.betfair.search_market_iter = failing_stream
+    result = betting_manager.fetch_and_store_daily_fixtures(target_date="2025-01-01")
+
+    assert result == {"status": "partial", "count": 1, "date": "2025-01-01", "error": "stream dropped"}
+
+
+def test_ready_slip_is_repriced_within_slippage_tolerance(betting_manager):
+    """Stale slip odds are moved to the current price, and selections that moved too far are dropped."""
+    import os
+    from third_party.betting_platforms.betfair_exchange.ticks import PRICE_LADDER, snap_price, ticks_between
+
+    assert len(PRICE_LADDER) == 350
+    assert snap_price(2.013) == 2.02 and snap_price(3.07) == 3.05
+    assert ticks_between(1.99, 2.02) == 2
+
+    betting_manager.betfair.get_best_prices.return_value = {
+        ("1.1", 1): {"back": 2.46, "lay": 2.5},   # 2 ticks shorter: repriced
+        ("1.2", 2): {"back": 3.5, "lay": 3.6},    # 10 ticks shorter: dropped
+        ("1.3", 3): {"back": 4.1, "lay": 4.2},    # lay drifted 2 ticks: repriced
+        ("1.4", 4): {"back": None, "lay": None},  # suspended: dropped
+    }
+    betting_manager.betfair.place_bets.return_value = {"status": "SUCCESS", "bets": [{"bet_id": "b1"}, {"bet_id": "b2"}]}
+    items = [
+        {"market_id": "1.1", "selection_id": 1, "stake": 5.0, "odds": 2.5},
+        {"market_id": "1.2", "selection_id": 2, "stake": 5.0, "odds": 4.0},
+        {"market_id": "1.3", "selection_id": 3, "stake": 5.0, "odds": 4.0, "side": "LAY"},
+        {"market_id": "1.4", "selection_id": 4, "stake": 5.0, "odds": 2.0},
+    ]
+
+    with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+        betting_manager.prepare_and_place_bets_from_ready_doc("slip_1", {"selections": {"items": items}})
+
+    betting_manager.betfair.get_best_prices.assert_called_once()
+    placed = betting_manager.betfair.place_bets.call_args.args[0]
+    assert [(b["market_id"], b["odds"]) for b in placed] == [("1.1", 2.46), ("1.3", 4.2)]
+    saved = betting_manager.repo.update_bet.call_args_list[0].args[1]["selections"]["items"]
+    assert [item["price_refresh"]["status"] for item in saved] == ["repriced", "dropped", "repriced", "dropped"]
+    assert saved[0]["price_refresh"]["delta"] == -0.04 and saved[0]["price_refresh"]["delta_ticks"] == -2
+    assert saved[0]["odds"] == 2.5
+
+
+def test_ready_slip_is_rejected_when_every_price_moved(betting_manager):
+    import os
+
+    betting_manager.betfair.get_best_prices.return_value = {("1.1", 1): {"back": 1.5, "lay": 1.52}}
+    with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+        betting_manager.prepare_and_place_bets_from_ready_doc(
+            "slip_2", {"selections": [{"market_id": "1.1", "selection_id": 1, "stake": 5.0, "odds": 2.5}]}
+        )
+
+    assert not betting_manager.betfair.place_bets.called
+    assert betting_manager.repo.update_bet.call_args.args == ("slip_2", {"status": "rejected", "error": "Every selection moved outside the slippage tolerance"})
+
+
+def _dict_placement_ledger(entries):
+    """Placement ledger fake backed by `entries`, merging records like the Firestore one."""
+    ledger = MagicMock()
+    ledger.get_entries.side_effect = lambda refs: {ref: entries[ref] for ref in refs if ref in entries}
+    ledger.record.side_effect = lambda ref, data: entries.__setitem__(ref, {**entries.get(ref, {}), **data})
+    return ledger
+
+
+def test_order_monitor_cancels_reprices_and_tops_up_unmatched_orders():
+    """Live orders are read in one batch and handled per policy; fill progress lands on the slip items."""
+    import os
+    from datetime import datetime, timedelta, timezone
+    from core.modules.betting.orders.service import OrderMonitorService
+    from core.modules.betting.placement.service import BetPlacementService
+    from core.modules.settings.manager import SettingsManager
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+    from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+    from third_party.betting_platforms.betfair_exchange.ticks import PRICE_LADDER, tick_index
+
+    simulator = LocalExchangeSimulator(seed_markets(2, competitions=1)).start()
+    try:
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        simulator.attach(client.client)
+        client.login()
+        first, second = [e["options"][0] for e in client.search_market("Soccer", max_results=10)]
+
+        def above_best(market, runner_index, ticks):
+            return PRICE_LADDER[tick_index(market["options"][runner_index]["odds"]) + ticks]
+
+        items = [
+            # Two ticks above the market: within tolerance, re-priced once stale.
+            {"market_id": first["market_id"], "selection_id": first["options"][0]["selection_id"], "stake": 4.0, "odds": above_best(first, 0, 2)},
+            # Far above the market: cancelled.
+            {"market_id": first["market_id"], "selection_id": first["options"][1]["selection_id"], "stake": 4.0, "odds": 100.0},
+            # Lapsed by the exchange before kickoff: topped up.
+            {"market_id": second["market_id"], "selection_id": second["options"][0]["selection_id"], "stake": 4.0, "odds": above_best(second, 0, 1)},
+        ]
+        with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+            placement = client.place_bets(items)
+        simulator.lapse_orders(second["market_id"])
+
+        now = datetime.now(timezone.utc) + timedelta(minutes=11)
+        slip = {
+            "id": "slip_1",
+            "status": "placed",
+            "events": [{"name": "A v B", "time": (now + timedelta(hours=2)).isoformat()}],
+            "selections": {"items": items},
+            "placement_results": placement,
+        }
+        repo = MagicMock()
+        repo.get_placed_bets.return_value = [slip]
+        # Settlement wrote to the slip after the monitor read it; that write must survive.
+        stored = {**slip, "placement_results": {**placement, "bets": placement["bets"] + [{"bet_id": "settled_elsewhere", "order_status": "EXECUTION_COMPLETE"}]}}
+        repo.update_bet_transactionally.side_effect = lambda bet_id, build: build(stored)
+        settings = SettingsManager(repository=MagicMock(get_settings=MagicMock(return_value={})))
+        placement_service = BetPlacementService(
+            betfair_service=client, bet_repo=repo, settings_manager=settings,
+            wallet_service=MagicMock(), placement_ledger=_dict_placement_ledger({}),
+        )
+        monitor = OrderMonitorService(
+            betfair_service=client, bet_repo=repo, settings_manager=settings, placement_service=placement_service,
+        )
+
+        client._book_cache.clear()
+        simulator.calls.clear()
+        with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+            summary = monitor.monitor_orders(now=now)
+
+        assert summary == {"status": "success", "orders": 3, "slips_updated": 1, "replace": 1, "cancel": 1, "top_up": 1}
+        assert simulator.calls["listCurrentOrders"] == 1 and simulator.calls["listMarketBook"] == 1
+        written = repo.update_bet_transactionally.call_args.args[1](stored)
+        fills = [item["fill"] for item in written["selections"]["items"]]
+        assert [f["last_action"] for f in fills] == ["replaced", "cancelled", "topped_up"]
+        assert fills[0]["fill_rate"] == 1.0 and fills[2]["fill_rate"] == 1.0
+        assert fills[1]["size_matched"] == 0 and fills[1]["size_remaining"] == 0
+        assert len(written["placement_results"]["bets"]) == 6
+        assert written["placement_results"]["bets"][-1] == {"bet_id": "settled_elsewhere", "order_status": "EXECUTION_COMPLETE"}
+
+        # Everything is matched or cancelled now, so the next run has nothing to follow up.
+        repo.get_placed_bets.return_value = [{**slip, **written}]
+        assert monitor.monitor_orders(now=now)["status"] == "no_live_orders"
+    finally:
+        simulator.stop()
+
+
+def test_order_monitor_does_not_top_up_twice_when_the_slip_write_fails():
+    """A top-up whose slip write was lost is recovered from the placement ledger on the next run, not placed again."""
+    import os
+    from datetime import datetime, timedelta, timezone
+    from core.modules.betting.orders.service import OrderMonitorService
+    from core.modules.betting.placement.service import BetPlacementService
+    from core.modules.settings.manager import SettingsManager
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+    from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+    from third_party.betting_platforms.betfair_exchange.ticks import PRICE_LADDER, tick_index
+
+    simulator = LocalExchangeSimulator(seed_markets(1, competitions=1)).start()
+    try:
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        simulator.attach(client.client)
+        client.login()
+        market = client.search_market("Soccer", max_results=10)[0]["options"][0]
+        runner = market["options"][0]
+        # One tick above the best back price, so it rests unmatched until the exchange lapses it.
+        odds = PRICE_LADDER[tick_index(runner["odds"]) + 1]
+        items = [{"market_id": market["market_id"], "selection_id": runner["selection_id"], "stake": 4.0, "odds": odds}]
+        with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+            placement = client.place_bets(items)
+        simulator.lapse_orders(market["market_id"])
+
+        now = datetime.now(timezone.utc)
+        slip = {
+            "id": "slip_1",
+            "status": "placed",
+            "events": [{"name": "A v B", "time": (now + timedelta(hours=2)).isoformat()}],
+            "selections": {"items": items},
+            "placement_results": placement,
+        }
+        repo = MagicMock()
+        repo.get_placed_bets.return_value = [slip]
+        repo.update_bet_transactionally.side_effect = RuntimeError("slip write failed")
+        settings = SettingsManager(repository=MagicMock(get_settings=MagicMock(return_value={})))
+        ledger_entries = {}
+        placement_service = BetPlacementService(
+            betfair_service=client, bet_repo=repo, settings_manager=settings,
+            wallet_service=MagicMock(), placement_ledger=_dict_placement_ledger(ledger_entries),
+        )
+        monitor = OrderMonitorService(
+            betfair_service=client, bet_repo=repo, settings_manager=settings, placement_service=placement_service,
+        )
+
+        simulator.calls.clear()
+        with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}), pytest.raises(RuntimeError):
+            monitor.monitor_orders(now=now)
+        assert simulator.calls["placeOrders"] == 1
+        [entry] = ledger_entries.values()
+        assert entry["status"] == "placed"
+
+        # The slip still shows the lapsed order without its top-up; the rerun reuses the ledger entry.
+        repo.update_bet_transactionally.side_effect = lambda bet_id, build: build(slip)
+        client._book_cache.clear()
+        simulator.calls.clear()
+        with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+            summary = monitor.monitor_orders(now=now)
+
+        assert summary["top_up"] == 1 and summary["slips_updated"] == 1
+        assert simulator.calls["placeOrders"] == 0
+        written = repo.update_bet_transactionally.call_args.args[1](slip)
+        lapsed, top_up = written["placement_results"]["bets"]
+        assert lapsed["topped_up_by"] == top_up["bet_id"] == entry["bet_id"]
+        assert len(simulator._orders) == 2
+    finally:
+        simulator.stop()
+
+
+def test_placement_retry_reconciles_against_the_ledger_and_current_orders():
+    """A retried placement reuses placed ledger entries and recovers pending ones from Betfair instead of re-placing."""
+    import os
+    from core.modules.betting.placement.service import BetPlacementService, customer_order_ref
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+    from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+
+    simulator = LocalExchangeSimulator(seed_markets(1, competitions=1)).start()
+    try:
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        simulator.attach(client.client)
+        client.login()
+        market = client.search_market("Soccer", max_results=10)[0]["options"][0]
+        bets = [
+            {"market_id": market["market_id"], "selection_id": runner["selection_id"], "stake": 2.0, "odds": runner["odds"]}
+            for runner in market["options"][:2]
+        ]
+        ledger_entries = {}
+        ledger = MagicMock()
+        ledger.get_entries.side_effect = lambda refs: {ref: ledger_entries[ref] for ref in refs if ref in ledger_entries}
+        ledger.record.side_effect = lambda ref, data: ledger_entries.__setitem__(ref, {**ledger_entries.get(ref, {}), **data})
+        service = BetPlacementService(
+            betfair_service=client, bet_repo=MagicMock(), settings_manager=MagicMock(),
+            wallet_service=MagicMock(), placement_ledger=ledger,
+        )
+
+        # A previous attempt sent the first bet, then died before recording the outcome.
+        refs = [customer_order_ref("slip_1", index, bet) for index, bet in enumerate(bets)]
+        ledger_entries[refs[0]] = {"status": "pending"}
+        with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+            sent = client.place_bets([{**bets[0], "customer_order_ref": refs[0]}])
+            simulator.calls.clear()
+            result = service.place_idempotent("slip_1", bets)
+
+        assert simulator.calls["listCurrentOrders"] == 1 and simulator.calls["placeOrders"] == 1
+        assert result["status"] == "SUCCESS"
+        assert result["bets"][0]["bet_id"] == sent["bets"][0]["bet_id"] and result["bets"][0]["reconciled"] is True
+        assert "reconciled" not in result["bets"][1]
+        assert [ledger_entries[ref]["status"] for ref in refs] == ["placed", "placed"]
+
+        # Once both are in the ledger, a further retry touches neither endpoint.
+        simulator.calls.clear()
+        with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+            again = service.place_idempotent("slip_1", bets)
+        assert not simulator.calls
+        assert [b["bet_id"] for b in again["bets"]] == [b["bet_id"] for b in result["bets"]]
+        assert len(simulator._orders) == 2
+    finally:
+        simulator.stop()
+
+
+def test_ready_slip_retry_skips_repricing_for_orders_already_sent(betting_manager):
+    """On a retried trigger, selections already in the ledger are reconciled even if their price has since moved."""
+    import os
+    from core.modules.betting.placement.service import customer_order_ref
+
+    items = [
+        {"market_id": "1.1", "selection_id": 1, "stake": 5.0, "odds": 2.5},
+        # Same selection and side twice on one slip: each item still gets its own ref.
+        {"market_id": "1.1", "selection_id": 1, "stake": 5.0, "odds": 2.5},
+    ]
+    refs = [customer_order_ref("slip_3", index, item) for index, item in enumerate(items)]
+    assert refs[0] != refs[1]
+
+    placed = {"market_id": "1.1", "selection_id": 1, "status": "SUCCESS", "bet_id": "b1", "customer_order_ref": refs[0]}
+    ledger = betting_manager._placement.ledger
+    ledger.get_entries.return_value = {refs[0]: {"status": "placed", "bet_id": "b1", "result": placed}}
+    betting_manager.betfair.get_best_prices.return_value = {("1.1", 1): {"back": 1.5, "lay": 1.52}}
+
+    with patch.dict(os.environ, {'FUNCTIONS_EMULATOR': 'false'}):
+        betting_manager.prepare_and_place_bets_from_ready_doc("slip_3", {"selections": {"items": items}})
+
+    # Only the unsent item was re-priced, and it is dropped; the sent one is still reported.
+    refreshed = betting_manager.betfair.get_best_prices.call_args.args[0]
+    assert refreshed == [("1.1", 1)]
+    assert "price_refresh" not in items[0] and items[1]["price_refresh"]["status"] == "dropped"
+    assert not betting_manager.betfair.place_bets.called
+    written = betting_manager.repo.update_bet.call_args.args[1]
+    assert written["status"] == "placed"
+    assert [(b["bet_id"], b["reconciled"]) for b in written["placement_results"]["bets"]] == [("b1", True)]
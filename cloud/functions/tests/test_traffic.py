@@ -0,0 +1,93 @@
+"""
+Tests for the record/replay traffic harness.
+"""
+import asyncio
+import json
+import os
+import time
+import pytest
+
+from core import traffic
+
+
+def test_betfair_client_replays_a_captured_session_without_the_exchange(tmp_path):
+    """Calls recorded against the simulator are served back from disk once it is gone."""
+    from third_party.betting_platforms.betfair_exchange.client import BetfairExchange
+    from third_party.betting_platforms.betfair_exchange.simulator import LocalExchangeSimulator, seed_markets
+
+    def run(simulator=None, recorded_client=None):
+        client = BetfairExchange(username="u", password="p", app_key="k", certs_path="/tmp")
+        if simulator:
+            simulator.attach(client.client)
+        else:
+            # Same endpoints as the capture; the simulator that served them is gone.
+            certs = tmp_path / "certs"
+            certs.mkdir()
+            client.client.cert_files = (str(certs / "c.crt"), str(certs / "c.key"))
+            client.client.identity_cert_uri = recorded_client.client.identity_cert_uri
+            client.client.api_uri = recorded_client.client.api_uri
+        client.login()
+        return client, client.search_market("Soccer", ["Sim League 1"], max_results=1000), client.get_balance()
+
+    simulator = LocalExchangeSimulator(seed_markets(200, competitions=2), latency=0.05).start()
+    recorder = traffic.TrafficRecorder(str(tmp_path), "record")
+    traffic.set_recorder(recorder)
+    try:
+        live_client, *recorded = run(simulator)
+    finally:
+        simulator.stop()
+        recorder.close()
+        traffic.set_recorder(None)
+
+    index = [json.loads(line) for line in (tmp_path / "index.jsonl").read_text().splitlines()]
+    assert {entry[1].rsplit("/", 1)[-1] for entry in index} >= {"listMarketCatalogue", "listMarketBook", "getAccountFunds"}
+    assert live_client.client.session_token.encode() not in (tmp_path / "bodies.bin").read_bytes()
+
+    replayer = traffic.TrafficRecorder(str(tmp_path), "replay", latency_scale=0)
+    traffic.set_recorder(replayer)
+    try:
+        started = time.perf_counter()
+        _, *replayed = run(recorded_client=live_client)
+        elapsed = time.perf_counter() - started
+    finally:
+        replayer.close()
+        traffic.set_recorder(None)
+
+    assert replayed == recorded
+    assert elapsed < 0.05 * len(index)
+
+
+def test_async_transport_matches_by_key_then_route_and_scales_latency(tmp_path):
+    httpx = pytest.importorskip("httpx")
+    served = []
+
+    def handler(request):
+        served.append(json.loads(request.content))
+        time.sleep(0.02)
+        return httpx.Response(200, json={"result": len(served), "sessionToken": "secret"})
+
+    async def call(recorder, body, inner=None):
+        async with httpx.AsyncClient(transport=recorder.async_transport(inner)) as client:
+            response = await client.post("https://api.example.com/v1/chat", json=body)
+            return response.json()
+
+    recorder = traffic.TrafficRecorder(str(tmp_path), "record")
+    for prompt in ("a", "b", "a"):
+        asyncio.run(call(recorder, {"prompt": prompt}, httpx.MockTransport(handler)))
+    recorder.close()
+    assert b"secret" not in (tmp_path / "bodies.bin").read_bytes()
+
+    replayer = traffic.TrafficRecorder(str(tmp_path), "replay", latency_scale=0.5)
+    started = time.perf_counter()
+    assert asyncio.run(call(replayer, {"prompt": "a"}))["result"] == 1
+    assert time.perf_counter() - started >= 0.01
+    replayer.latency_scale = 0
+    # Exact matches are served in capture order and the last one repeats.
+    assert asyncio.run(call(replayer, {"prompt": "a"}))["result"] == 3
+    assert asyncio.run(call(replayer, {"prompt": "a"}))["result"] == 3
+    # An unseen request falls back to the next unserved recording of its route.
+    assert asyncio.run(call(replayer, {"prompt": "c"}))["result"] == 2
+    with pytest.raises(traffic.ReplayMiss):
+        asyncio.run(call(replayer, {"prompt": "d"}))
+    replayer.close()
+    assert len(served) == 3
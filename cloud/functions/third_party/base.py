@@ -1,6 +1,8 @@
 import requests
 from collections import namedtuple
 
+from core.traffic import http_session
+
 Response = namedtuple('Response', ['json', 'status_code', 'success'])
 
 class BaseThirdParty:
@@ -11,13 +13,15 @@ class BaseThirdParty:
 
     def __init__(self, api_key: str):
         self.api_key = api_key
+        # A recorded session under TRAFFIC_MODE, else the plain requests module.
+        self.session = http_session() or requests
 
     def _make_request(self, endpoint: str, params: dict, method: str = "GET", data: dict = None, json: dict = None):
         url = f"{self.base_url}/{endpoint}"
 
         method = method.upper()
         
-        request_func = getattr(requests, method.lower(), None)
+        request_func = getattr(self.session, method.lower(), None)
         if not request_func:
             raise ValueError(f"Unsupported HTTP method: {method}")
         
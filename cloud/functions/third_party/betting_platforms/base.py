@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 
@@ -38,3 +39,59 @@ class BaseBettingPlatform(ABC):
             A dictionary containing the results of all bet placements.
         """
         pass
+
+    @abstractmethod
+    def get_event_markets(self, event_id: str, market_type_codes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch the priced markets of one event.
+
+        Args:
+            event_id: The platform's event ID.
+            market_type_codes: Optional list of market type codes to restrict the result to.
+
+        Returns:
+            A list of markets with their selections and odds.
+        """
+        pass
+
+    @abstractmethod
+    def list_cleared_orders(self, bet_ids: Optional[List[str]] = None, settled_date_range: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        """
+        List settled, voided, lapsed and cancelled orders.
+
+        Args:
+            bet_ids: Optional list of bet IDs to filter by.
+            settled_date_range: Optional tuple of (start_datetime, end_datetime).
+
+        Returns:
+            A list of cleared orders with their status and P/L.
+        """
+        pass
+
+    @abstractmethod
+    def get_balance(self) -> Dict[str, Any]:
+        """
+        Get the account wallet balance.
+
+        Returns:
+            A dictionary with the available balance and exposure.
+        """
+        pass
+
+    # Async counterparts. By default they run the blocking method in a worker thread;
+    # platforms with a native async transport override them.
+
+    async def search_market_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.search_market, *args, **kwargs)
+
+    async def get_event_markets_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_event_markets, *args, **kwargs)
+
+    async def place_bets_async(self, bets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.place_bets, bets)
+
+    async def list_cleared_orders_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.list_cleared_orders, *args, **kwargs)
+
+    async def get_balance_async(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.get_balance)
@@ -0,0 +1,368 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import betfairlightweight
+import httpx
+from betfairlightweight.compat import json
+from betfairlightweight.exceptions import APIError, StatusCodeError
+from betfairlightweight.resources import AccountFunds, ClearedOrders, PlaceOrders
+
+from .books import MarketBook, parse_market_books
+from .client import BetfairExchange
+from .constants import (
+    ALL_MARKET_TYPE_CODES, ASYNC_CONNECT_TIMEOUT_SECONDS, ASYNC_MAX_IN_FLIGHT, ASYNC_READ_TIMEOUT_SECONDS,
+    BOOK_FETCH_ATTEMPTS, BOOK_PRICE_DATA, CATALOGUE_FETCH_WORKERS, CATALOGUE_MARKET_PROJECTION,
+    CLEARED_ORDERS_PAGE_SIZE, HTTP_POOL_SIZE, TRANSACTION_METHODS,
+)
+from .packer import is_too_much_data
+from constants import AUTOMATED_BETTING_OPTIONS
+from core import logger, traffic
+
+
+# Error codes Betfair returns in a JSON-RPC error when the session token is dead.
+INVALID_SESSION_CODES = ("INVALID_SESSION_INFORMATION", "NO_SESSION")
+
+
+class AsyncBetfairExchange(BetfairExchange):
+    """
+    BetfairExchange with asyncio-native counterparts of its request-heavy operations.
+
+    The *_async methods talk JSON-RPC to the Betting and Accounts APIs over one pooled
+    httpx HTTP/2 client, so catalogue pages, book chunks, per-market placements and
+    cleared-order pages are all multiplexed on a single connection (at most
+    `max_in_flight` at a time) instead of needing a thread each. Responses are decoded
+    into the same structures the blocking client builds, so results are identical.
+
+    Login, reference-data lookups and the market/order streams stay on the blocking
+    client (and its SessionBroker); the sync methods are inherited unchanged, so either
+    style can be used on one instance. Call `aclose()` when done with the async client.
+    `transport` replaces the network (e.g. httpx.MockTransport in tests).
+    """
+
+    def __init__(self, *args, max_in_flight: int = ASYNC_MAX_IN_FLIGHT, transport: Optional[httpx.AsyncBaseTransport] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_in_flight = max_in_flight
+        self.transport = transport
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+    def _http_client(self) -> httpx.AsyncClient:
+        # httpx clients and semaphores are bound to the loop they are first used on.
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._loop is not loop:
+            limits = httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE)
+            transport = self.transport
+            recorder = traffic.get_recorder()
+            if recorder:
+                transport = recorder.async_transport(transport or httpx.AsyncHTTPTransport(http2=True, limits=limits))
+            self._http = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(ASYNC_READ_TIMEOUT_SECONDS, connect=ASYNC_CONNECT_TIMEOUT_SECONDS),
+                limits=limits,
+                transport=transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._loop = loop
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._loop = None
+
+    async def _ensure_session(self) -> None:
+        if not self.client.session_token:
+            await asyncio.to_thread(self.login)
+
+    def _renew_session(self, stale_token: Optional[str]) -> None:
+        if self.session_broker:
+            self.session_broker.renew(self.client, stale_token)
+        else:
+            self.client.login()
+
+    async def _call(self, method: str, params: dict, api: str = "betting", attempts: Optional[int] = None) -> Any:
+        """Make one JSON-RPC call under the client's retry and circuit-breaker policy."""
+        return await self.resilience.acall(
+            method, lambda: self._send(method, params, api), attempts=attempts,
+            idempotent=method not in TRANSACTION_METHODS,
+        )
+
+    async def _send(self, method: str, params: dict, api: str = "betting", renewed: bool = False) -> Any:
+        """Send one JSON-RPC request, renewing the session once if Betfair rejects the token."""
+        await self._ensure_session()
+        http = self._http_client()
+        url = f"{self.client.api_uri}{api}/json-rpc/v1"
+        service = "SportsAPING" if api == "betting" else "AccountAPING"
+        token = self.client.session_token
+        payload = {
+            "jsonrpc": "2.0",
+            "method": f"{service}/v1.0/{method}",
+            "params": {key: value for key, value in params.items() if value is not None},
+            "id": 1,
+        }
+        headers = {
+            "X-Application": self.client.app_key,
+            "X-Authentication": token,
+            "content-type": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        }
+
+        wait = self.governor.reserve(method, len(params.get("instructions") or ()))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        async with self._semaphore:
+            try:
+                response = await http.post(url, content=json.dumps(payload), headers=headers)
+            except httpx.HTTPError as e:
+                raise APIError(None, method, params, e)
+        if response.status_code != 200:
+            raise StatusCodeError(str(response.status_code))
+        body = json.loads(response.content)
+
+        error = body.get("error") if isinstance(body, dict) else None
+        if error:
+            code = ((error.get("data") or {}).get("APINGException") or {}).get("errorCode") or error.get("message")
+            if code in INVALID_SESSION_CODES and not renewed:
+                await asyncio.to_thread(self._renew_session, token)
+                return await self._send(method, params, api, renewed=True)
+            raise APIError(body, method, params, code)
+        return body.get("result")
+
+    # Books
+
+    async def _list_market_book_chunk_async(self, market_ids: List[str], price_data: List[str] = BOOK_PRICE_DATA) -> List[MarketBook]:
+        raw_books = await self._call("listMarketBook", {
+            "marketIds": market_ids,
+            "priceProjection": betfairlightweight.filters.price_projection(price_data=price_data),
+        }, attempts=BOOK_FETCH_ATTEMPTS)
+        return parse_market_books(raw_books or [])
+
+    async def _list_market_books_packed_async(self, market_ids: List[str]) -> List[MarketBook]:
+        """Async `_list_market_books_packed`: split the chunk in half on TOO_MUCH_DATA."""
+        try:
+            return await self._list_market_book_chunk_async(market_ids)
+        except Exception as e:
+            if not is_too_much_data(e) or len(market_ids) == 1:
+                raise
+        self.book_packer.record_too_much_data(len(market_ids))
+        middle = len(market_ids) // 2
+        first, second = await asyncio.gather(
+            self._list_market_books_packed_async(market_ids[:middle]),
+            self._list_market_books_packed_async(market_ids[middle:]),
+        )
+        return first + second
+
+    async def _fetch_market_books_async(self, market_ids: List[str]) -> Dict[str, Any]:
+        """Async `_fetch_market_books`: cache and stream first, then every packed chunk at once."""
+        now = time.time()
+        with self._book_cache_lock:
+            books_map = {
+                market_id: entry[1] for market_id in market_ids
+                if (entry := self._book_cache.get(market_id)) and now - entry[0] < self.book_cache_ttl
+            }
+        if self.market_stream:
+            books_map.update(self.market_stream.get_market_books(
+                [market_id for market_id in market_ids if market_id not in books_map]
+            ))
+        market_ids = list(dict.fromkeys(market_id for market_id in market_ids if market_id not in books_map))
+        if not market_ids:
+            return books_map
+
+        batch_size = self.book_packer.capacity
+        chunks = [market_ids[i:i + batch_size] for i in range(0, len(market_ids), batch_size)]
+        results = await asyncio.gather(
+            *(self._list_market_books_packed_async(chunk) for chunk in chunks), return_exceptions=True
+        )
+
+        fetched = {}
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                start = index * batch_size
+                logger.error(f"Error fetching market book batch {start}–{start + batch_size}: {result}")
+                continue
+            fetched.update({book.market_id: book for book in result})
+
+        fetched_at = time.time()
+        with self._book_cache_lock:
+            self._book_cache.update({market_id: (fetched_at, book) for market_id, book in fetched.items()})
+        books_map.update(fetched)
+        return books_map
+
+    # Catalogue
+
+    async def _list_market_catalogue_batch_async(self, market_filter: dict) -> list:
+        """Async `_list_market_catalogue_batch`: one catalogue page, split on TOO_MUCH_DATA, [] on failure."""
+        capacity = self.catalogue_packer.capacity
+        id_key = 'eventIds' if market_filter.get('eventIds') else 'competitionIds'
+        batch_ids = market_filter.get(id_key) or []
+        try:
+            batch = await self._call("listMarketCatalogue", {
+                "filter": market_filter,
+                "maxResults": capacity,
+                "marketProjection": CATALOGUE_MARKET_PROJECTION,
+                "sort": "FIRST_TO_START",
+            }) or []
+            if len(batch) >= capacity:
+                logger.warning(f"Market catalogue batch {batch_ids} hit {capacity} results and may be truncated")
+            return batch
+        except Exception as e:
+            if is_too_much_data(e) and capacity > 1:
+                self.catalogue_packer.record_too_much_data(capacity)
+                if len(batch_ids) > 1:
+                    middle = len(batch_ids) // 2
+                    first, second = await asyncio.gather(
+                        self._list_market_catalogue_batch_async({**market_filter, id_key: batch_ids[:middle]}),
+                        self._list_market_catalogue_batch_async({**market_filter, id_key: batch_ids[middle:]}),
+                    )
+                    return first + second
+                return await self._list_market_catalogue_batch_async(market_filter)
+            logger.error(f"Error fetching market catalogue batch {batch_ids}: {e}")
+            return []
+
+    async def search_market_async(self, sport: str, competitions: List[str] = [], market_type_codes: Optional[List[str]] = None, text_query: Optional[str] = None, date: Optional[str] = None, from_time: Optional[str] = None, to_time: Optional[str] = None, max_results: int = 40, all_markets: Optional[bool] = False, wave_size: int = CATALOGUE_FETCH_WORKERS) -> List[Dict[str, Any]]:
+        """
+        Async `search_market`, returning the same events.
+
+        Catalogue pages are requested `wave_size` at a time (as in the blocking client, so
+        at most one wave is fetched past `max_results`), and each wave's books are priced
+        together before the next wave starts. Filters are built on a worker thread, since
+        they rely on the cached reference data and the blocking competition/event counts.
+        """
+        await self._ensure_session()
+        market_filters = await asyncio.to_thread(
+            self._build_catalogue_filters,
+            sport, competitions, market_type_codes, text_query, from_time, to_time, all_markets, date,
+        )
+
+        min_liquidity = AUTOMATED_BETTING_OPTIONS.get("MIN_MATCHED_LIQUIDITY", 100)
+        events: List[Dict[str, Any]] = []
+        market_count = 0
+        skipped = 0
+        for i in range(0, len(market_filters), max(1, wave_size)):
+            wave = market_filters[i:i + wave_size]
+            pages = await asyncio.gather(*(self._list_market_catalogue_batch_async(f) for f in wave))
+
+            kept = []
+            for page in pages:
+                if market_count + len(page) >= max_results:
+                    kept.append(page[:max_results - market_count])
+                    market_count = max_results
+                    break
+                market_count += len(page)
+                if page:
+                    kept.append(page)
+            screened = [self._prescreen_liquidity(page, min_liquidity) for page in kept]
+            kept = [page for page, _ in screened]
+            skipped += sum(dropped for _, dropped in screened)
+
+            books_map = await self._fetch_market_books_async([m.get('marketId') for page in kept for m in page])
+            for page in kept:
+                page_events = self._group_markets_into_events(page, books_map)
+                if date:
+                    page_events = self._filter_events_by_date(page_events, date)
+                events.extend(page_events)
+
+            if market_count >= max_results:
+                break
+
+        logger.info(f"Retrieved {market_count} markets from Betfair")
+        self._record_prescreen(skipped, market_count, min_liquidity)
+        return events
+
+    async def get_event_markets_async(self, event_id: str, market_type_codes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Async `get_event_markets`."""
+        return (await self.get_markets_for_events_async([event_id], market_type_codes)).get(str(event_id), [])
+
+    async def get_markets_for_events_async(self, event_ids: List[str], market_type_codes: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Async `get_markets_for_events`, sharing its cache.
+
+        The packed catalogue filters are built on a worker thread (they need the blocking
+        market counts); catalogue pages and book chunks are then multiplexed.
+        """
+        if market_type_codes is None:
+            market_type_codes = ALL_MARKET_TYPE_CODES
+        event_ids = list(dict.fromkeys(str(event_id) for event_id in event_ids))
+        markets_by_event, missing = self._cached_event_markets(event_ids, market_type_codes)
+        if not missing:
+            return markets_by_event
+
+        try:
+            await self._ensure_session()
+            market_filters = await asyncio.to_thread(self._event_market_filters, missing, market_type_codes)
+            pages = await asyncio.gather(*(self._list_market_catalogue_batch_async(f) for f in market_filters))
+            market_catalogue = [market for page in pages for market in page]
+            books_map = await self._fetch_market_books_async([m.get('marketId') for m in market_catalogue])
+            fetched = self._group_event_markets(market_catalogue, books_map)
+        except Exception as e:
+            logger.error(f"Error fetching markets for events {missing}: {e}", exc_info=True)
+            fetched = {}
+
+        self._store_event_markets(fetched, market_type_codes)
+        markets_by_event.update({event_id: fetched.get(event_id, []) for event_id in missing})
+        return markets_by_event
+
+    # Orders and account
+
+    async def _place_market_orders_async(self, market_id: str, market_bets: List[Dict[str, Any]]) -> Tuple[Any, Optional[Exception], float]:
+        customer_ref = self._customer_ref(market_bets)
+        started = time.perf_counter()
+        try:
+            result = await self._call("placeOrders", {
+                "marketId": market_id,
+                "instructions": self._place_instructions(market_bets),
+                **({"customerRef": customer_ref} if customer_ref else {}),
+            })
+        except Exception as e:
+            logger.error(f"place_orders failed for market {market_id}: {e}")
+            return None, e, round((time.perf_counter() - started) * 1000, 1)
+        elapsed = time.perf_counter() - started
+        return PlaceOrders(elapsed_time=elapsed, **result), None, round(elapsed * 1000, 1)
+
+    async def place_bets_async(self, bets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Async `place_bets`: every market's placeOrders call is in flight at once."""
+        if os.environ.get("FUNCTIONS_EMULATOR") == "true":
+            return self._mock_placements(bets)
+
+        bets_by_market = self._group_bets_by_market(bets)
+        outcomes = await asyncio.gather(*(
+            self._place_market_orders_async(market_id, market_bets)
+            for market_id, market_bets in bets_by_market.items()
+        ))
+        return self._aggregate_placements(bets_by_market, list(outcomes))
+
+    async def _list_cleared_orders_pages_async(self, status: str, bet_ids: Optional[List[str]], settled_date_range: Optional[dict]) -> list:
+        orders = []
+        from_record = 0
+        while True:
+            started = time.perf_counter()
+            result = await self._call("listClearedOrders", {
+                "betStatus": status,
+                "betIds": bet_ids,
+                "settledDateRange": settled_date_range,
+                "fromRecord": from_record,
+                "recordCount": CLEARED_ORDERS_PAGE_SIZE,
+            })
+            response = ClearedOrders(elapsed_time=time.perf_counter() - started, **result) if result else None
+            page = response.orders if response and response.orders else []
+            orders.extend(page)
+            if not page or not response.more_available:
+                return orders
+            from_record += len(page)
+
+    async def list_cleared_orders_async(self, bet_ids: Optional[List[str]] = None, settled_date_range: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        """Async `list_cleared_orders`: every status and bet-ID chunk is paged concurrently."""
+        time_range, queries = self._cleared_order_queries(bet_ids, settled_date_range)
+        results = await asyncio.gather(*(
+            self._list_cleared_orders_pages_async(status, chunk, time_range) for status, chunk in queries
+        ))
+        return self._merge_cleared_orders([(status, orders) for (status, _), orders in zip(queries, results)])
+
+    async def get_balance_async(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = await self._call("getAccountFunds", {}, api="account")
+        return self._balance_from_funds(AccountFunds(elapsed_time=time.perf_counter() - started, **result))
@@ -0,0 +1,85 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class PriceSize:
+    """One ladder level: a price and the stake available (or traded) at it."""
+
+    __slots__ = ("price", "size")
+
+    def __init__(self, price: float, size: float):
+        self.price = price
+        self.size = size
+
+    def __repr__(self) -> str:
+        return f"PriceSize({self.price}, {self.size})"
+
+
+class ExchangePrices:
+    """A runner's exchange ladders, best price first."""
+
+    __slots__ = ("available_to_back", "available_to_lay", "traded_volume")
+
+    def __init__(self, available_to_back: Tuple[PriceSize, ...], available_to_lay: Tuple[PriceSize, ...], traded_volume: Tuple[PriceSize, ...]):
+        self.available_to_back = available_to_back
+        self.available_to_lay = available_to_lay
+        self.traded_volume = traded_volume
+
+
+class RunnerBook:
+    __slots__ = ("selection_id", "status", "last_price_traded", "total_matched", "ex")
+
+    def __init__(self, selection_id: int, status: Optional[str], last_price_traded: Optional[float], total_matched: Optional[float], ex: ExchangePrices):
+        self.selection_id = selection_id
+        self.status = status
+        self.last_price_traded = last_price_traded
+        self.total_matched = total_matched
+        self.ex = ex
+
+
+class MarketBook:
+    """
+    Compact market book built straight from listMarketBook JSON.
+
+    Exposes the attributes the client reads from betfairlightweight's MarketBook
+    (market_id, status, inplay, total_matched, runners[].ex.available_to_back[].price/size),
+    so REST books and books from the market stream cache can be used interchangeably,
+    without building a resource object for every field of every runner.
+    """
+
+    __slots__ = ("market_id", "status", "inplay", "total_matched", "runners")
+
+    def __init__(self, market_id: str, status: Optional[str], inplay: Optional[bool], total_matched: Optional[float], runners: List[RunnerBook]):
+        self.market_id = market_id
+        self.status = status
+        self.inplay = inplay
+        self.total_matched = total_matched
+        self.runners = runners
+
+
+def _ladder(levels: Optional[List[Dict[str, float]]]) -> Tuple[PriceSize, ...]:
+    if not levels:
+        return ()
+    return tuple(PriceSize(level["price"], level["size"]) for level in levels)
+
+
+def parse_market_book(raw: Dict[str, Any]) -> MarketBook:
+    """Build a MarketBook from one decoded listMarketBook entry (lightweight=True output)."""
+    runners = []
+    for runner in raw.get("runners") or ():
+        ex = runner.get("ex") or {}
+        runners.append(RunnerBook(
+            runner["selectionId"],
+            runner.get("status"),
+            runner.get("lastPriceTraded"),
+            runner.get("totalMatched"),
+            ExchangePrices(
+                _ladder(ex.get("availableToBack")),
+                _ladder(ex.get("availableToLay")),
+                _ladder(ex.get("tradedVolume")),
+            ),
+        ))
+    return MarketBook(raw["marketId"], raw.get("status"), raw.get("inplay"), raw.get("totalMatched"), runners)
+
+
+def parse_market_books(raw_books: List[Dict[str, Any]]) -> List[MarketBook]:
+    return [parse_market_book(raw) for raw in raw_books]
@@ -1,41 +1,107 @@
 from collections import defaultdict
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 from constants import AUTOMATED_BETTING_OPTIONS
+import hashlib
 import os
+import sys
+import threading
+import time
 import uuid
 
 import betfairlightweight
 
-from .constants import APP_KEY, ALL_MARKET_TYPE_CODES, CERTS_PATH, PASSWORD, USERNAME
+from .constants import (
+    APP_KEY, ALL_MARKET_TYPE_CODES, BOOK_CACHE_TTL_SECONDS, BOOK_FETCH_ATTEMPTS, BOOK_FETCH_WORKERS, BOOK_PRICE_DATA,
+    CATALOGUE_FETCH_WORKERS, CATALOGUE_MARKET_PROJECTION, CATALOGUE_MAX_RESULTS, CERTS_PATH, CLEARED_ORDER_STATUSES,
+    CLEARED_ORDERS_BET_ID_CHUNK, CLEARED_ORDERS_PAGE_SIZE, CLEARED_ORDERS_WORKERS, CURRENT_ORDERS_BET_ID_CHUNK, CURRENT_ORDERS_PAGE_SIZE,
+    DEFAULT_MARKETS_PER_COMPETITION, DEFAULT_MARKETS_PER_EVENT, EVENT_MARKETS_CACHE_TTL_SECONDS, LADDER_PRICE_DATA, PASSWORD, PLACE_ORDERS_WORKERS,
+    STREAM_CONFLATE_MS, USERNAME,
+)
+from .books import MarketBook, parse_market_books
+from .fills import estimate_fills
+from .packer import RequestPacker, book_weight, catalogue_weight, is_too_much_data
+from .reference_data import ReferenceDataCache
+from .governor import RequestGovernor
+from .resilience import Resilience
+from .session import BrokeredHTTPSession, GovernedHTTPSession, SessionBroker
+from .streaming import MarketStreamCache, OrderStreamCache
 from ..base import BaseBettingPlatform
-from core import logger
+from core import logger, traffic
 
 
 class BetfairExchange(BaseBettingPlatform):
-    def __init__(self, username: Optional[str] = None, password: Optional[str] = None, app_key: Optional[str] = None, certs_path: Optional[str] = None):
+    def __init__(self, username: Optional[str] = None, password: Optional[str] = None, app_key: Optional[str] = None, certs_path: Optional[str] = None, reference_data: Optional[ReferenceDataCache] = None, session_broker: Optional[SessionBroker] = None, market_stream: Optional[MarketStreamCache] = None, order_stream: Optional[OrderStreamCache] = None, governor: Optional[RequestGovernor] = None, resilience: Optional[Resilience] = None):
         super().__init__()
         self.username = username or USERNAME
         self.password = password or PASSWORD
         self.app_key = app_key or APP_KEY
         self.certs_path = certs_path or CERTS_PATH
+        # Pass a shared cache to reuse sport/competition resolutions across instances.
+        self.reference_data = reference_data or ReferenceDataCache()
+        # Pass a shared broker to reuse one login session across instances.
+        self.session_broker = session_broker
+        # Every API call waits on the governor's rate and transaction limits; share one per process.
+        self.governor = governor or RequestGovernor()
+        # Error-classified retries, per-endpoint circuit breakers and counters for every API call.
+        self.resilience = resilience or Resilience()
+        # Streamed order books are read before falling back to list_market_book polling.
+        self.market_stream = market_stream
+        # Opened on first get_order_states call unless one is passed in.
+        self.order_stream = order_stream
+        # Short-lived cache of REST market books: market_id -> (fetched_at, book).
+        self.book_cache_ttl = BOOK_CACHE_TTL_SECONDS
+        self._book_cache: Dict[str, Tuple[float, Any]] = {}
+        self._book_cache_lock = threading.Lock()
+        # Cache of get_markets_for_events: (event_id, market types) -> (fetched_at, markets).
+        self.event_markets_cache_ttl = EVENT_MARKETS_CACHE_TTL_SECONDS
+        self._event_markets_cache: Dict[Tuple[str, Tuple[str, ...]], Tuple[float, list]] = {}
+        self._event_markets_lock = threading.Lock()
+        # Size requests from Betfair's data-weight limit; each shrinks after TOO_MUCH_DATA.
+        self.book_packer = RequestPacker(book_weight(BOOK_PRICE_DATA))
+        self.ladder_packer = RequestPacker(book_weight(LADDER_PRICE_DATA))
+        self.catalogue_packer = RequestPacker(
+            catalogue_weight(CATALOGUE_MARKET_PROJECTION), max_markets=CATALOGUE_MAX_RESULTS
+        )
+        # Markets dropped by the catalogue liquidity pre-screen, summed over every search.
+        self.prescreened_markets = 0
 
         if not all([self.username, self.password, self.app_key, self.certs_path]):
             logger.warning("Betfair credentials not fully set in environment variables.")
 
+        if session_broker:
+            http_session = BrokeredHTTPSession(session_broker, governor=self.governor)
+        else:
+            http_session = GovernedHTTPSession(self.governor)
+        # Under TRAFFIC_MODE every call goes through the record/replay adapter.
+        http_session = traffic.http_session(http_session)
         self.client = betfairlightweight.APIClient(
             username=self.username,
             password=self.password,
             app_key=self.app_key,
             certs=self.certs_path,
+            session=http_session,
         )
+        if session_broker:
+            http_session.api_client = self.client
 
     def login(self):
-        """Log in to Betfair."""
-        self.client.login()
+        """Log in to Betfair, reusing the broker's session token when one is configured."""
+        if self.session_broker:
+            self.session_broker.attach(self.client)
+        else:
+            self.client.login()
+
+    def open_market_stream(self, event_ids: List[str], conflate_ms: int = STREAM_CONFLATE_MS) -> MarketStreamCache:
+        """Stream the markets of `event_ids` so book reads skip list_market_book; call after login."""
+        if self.market_stream is None:
+            self.market_stream = MarketStreamCache(self.client, conflate_ms=conflate_ms)
+        self.market_stream.subscribe(event_ids)
+        return self.market_stream
 
     def _build_runner_options(self, market, book) -> list:
-        """Build a list of runner option dicts from a market catalogue entry (dict) and its book (object)."""
+        """Build a list of runner option dicts from a market catalogue entry (dict) and its book (MarketBook)."""
         runner_odds = {
             r.selection_id: (r.ex.available_to_back[0].price if r.ex.available_to_back else None)
             for r in book.runners
@@ -62,53 +128,173 @@ class BetfairExchange(BaseBettingPlatform):
             
         return options
 
-    def _fetch_markets_with_odds(self, market_catalogue: list, batch_size: int = 40) -> dict:
-        """Fetch market books in batches of `batch_size` to stay within Betfair's TOO_MUCH_DATA limit (max 40 per call)."""
+    def _list_market_book_chunk(self, market_ids: List[str], price_data: List[str] = BOOK_PRICE_DATA) -> list:
+        """
+        Fetch books with `price_data` for one chunk of market IDs, retrying transient failures
+        (TOO_MUCH_DATA is raised at once for the packer to split the chunk).
+
+        Books are requested as raw JSON (lightweight=True, decoded with orjson when it is
+        installed) and parsed into compact MarketBook structures instead of full
+        betfairlightweight resources.
+        """
+        raw_books = self.resilience.call("listMarketBook", lambda: self.client.betting.list_market_book(
+            market_ids=market_ids,
+            price_projection=betfairlightweight.filters.price_projection(
+                price_data=price_data
+            ),
+            lightweight=True,
+        ), attempts=BOOK_FETCH_ATTEMPTS)
+        return parse_market_books(raw_books)
+
+    def _list_market_books_packed(self, market_ids: List[str], price_data: List[str] = BOOK_PRICE_DATA, packer: Optional[RequestPacker] = None) -> list:
+        """Fetch one packed chunk of books, splitting it in half whenever Betfair answers TOO_MUCH_DATA."""
+        packer = packer or self.book_packer
+        try:
+            return self._list_market_book_chunk(market_ids, price_data)
+        except Exception as e:
+            if not is_too_much_data(e) or len(market_ids) == 1:
+                raise
+        packer.record_too_much_data(len(market_ids))
+        middle = len(market_ids) // 2
+        return (
+            self._list_market_books_packed(market_ids[:middle], price_data, packer)
+            + self._list_market_books_packed(market_ids[middle:], price_data, packer)
+        )
+
+    def _fetch_markets_with_odds(self, market_catalogue: list, batch_size: Optional[int] = None, max_workers: int = BOOK_FETCH_WORKERS) -> dict:
+        """Fetch the market books for every market in `market_catalogue`, keyed by market ID."""
         market_ids = [
             (m.get('marketId') if isinstance(m, dict) else m.market_id)
             for m in market_catalogue
         ]
+        return self._fetch_market_books(market_ids, batch_size, max_workers)
+
+    def _fetch_market_books(self, market_ids: List[str], batch_size: Optional[int] = None, max_workers: int = BOOK_FETCH_WORKERS) -> dict:
+        """
+        Fetch market books in chunks sized by `book_packer` to fill Betfair's data-weight limit (or of `batch_size`).
+
+        Chunks are fetched concurrently on up to `max_workers` threads (pass 1 for the
+        sequential behaviour) and merged into one map keyed by market ID. A chunk that
+        still fails after retrying is logged and skipped so the rest of the run survives.
+        Books fetched in the last `book_cache_ttl` seconds and markets held by the market
+        stream cache are not requested again.
+        """
+        now = time.time()
+        with self._book_cache_lock:
+            books_map = {
+                market_id: entry[1] for market_id in market_ids
+                if (entry := self._book_cache.get(market_id)) and now - entry[0] < self.book_cache_ttl
+            }
+        if self.market_stream:
+            books_map.update(self.market_stream.get_market_books(
+                [market_id for market_id in market_ids if market_id not in books_map]
+            ))
+        market_ids = list(dict.fromkeys(market_id for market_id in market_ids if market_id not in books_map))
 
+        if not market_ids:
+            return books_map
+
+        fetched = self._fetch_packed_books(market_ids, BOOK_PRICE_DATA, self.book_packer, batch_size, max_workers)
+        fetched_at = time.time()
+        with self._book_cache_lock:
+            self._book_cache.update({market_id: (fetched_at, book) for market_id, book in fetched.items()})
+        books_map.update(fetched)
+        return books_map
+
+    def _fetch_packed_books(self, market_ids: List[str], price_data: List[str], packer: RequestPacker, batch_size: Optional[int] = None, max_workers: int = BOOK_FETCH_WORKERS) -> Dict[str, MarketBook]:
+        """Fetch `market_ids` in concurrent chunks of `packer.capacity` (or `batch_size`), skipping chunks that fail."""
+        batch_size = batch_size or packer.capacity
+        chunks = [market_ids[i:i + batch_size] for i in range(0, len(market_ids), batch_size)]
+
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+            futures = [executor.submit(self._list_market_books_packed, chunk, price_data, packer) for chunk in chunks]
+            for index, future in enumerate(futures):
+                start = index * batch_size
+                try:
+                    market_books = future.result()
+                    fetched.update({book.market_id: book for book in market_books})
+                except Exception as e:
+                    logger.error(f"Error fetching market book batch {start}–{start + batch_size}: {e}")
+        return fetched
+
+    def get_market_ladders(self, market_ids: List[str], max_workers: int = BOOK_FETCH_WORKERS) -> Dict[str, MarketBook]:
+        """
+        Fetch full-depth books (every ladder level plus traded volume) keyed by market ID.
+
+        These are heavier than best-offer books, so they bypass the book cache and the
+        market stream (which only carries the top levels) and are packed by `ladder_packer`.
+        """
+        market_ids = list(dict.fromkeys(market_ids))
         if not market_ids:
             return {}
+        return self._fetch_packed_books(market_ids, LADDER_PRICE_DATA, self.ladder_packer, max_workers=max_workers)
 
-        books_map = {}
-        for i in range(0, len(market_ids), batch_size):
-            chunk = market_ids[i:i + batch_size]
-            try:
-                market_books = self.client.betting.list_market_book(
-                    market_ids=chunk,
-                    price_projection=betfairlightweight.filters.price_projection(
-                        price_data=['EX_BEST_OFFERS']
-                    )
-                )
-                books_map.update({book.market_id: book for book in market_books})
-            except Exception as e:
-                logger.error(f"Error fetching market book batch {i}–{i + batch_size}: {e}")
+    def estimate_fill_prices(self, market_ids: List[str], stake: float, side: str = 'BACK') -> Dict[Tuple[str, int], Dict[str, Any]]:
+        """
+        Estimate, for every runner of `market_ids`, the average price `stake` would match at
+        and how much would be left unfilled, walking the full ladder rather than the top level.
+        """
+        ladders = self.get_market_ladders(market_ids)
+        return {key: estimate.as_dict() for key, estimate in estimate_fills(ladders.values(), stake, side).items()}
 
-        return books_map
+    @staticmethod
+    def _best_back_size(book, selection_id: int) -> float:
+        if book is None:
+            return 0.0
+        for runner in book.runners:
+            if runner.selection_id == selection_id:
+                if runner.ex.available_to_back:
+                    return runner.ex.available_to_back[0].size
+        return 0.0
+
+    def get_market_liquidities(self, selections: List[Tuple[str, int]]) -> Dict[Tuple[str, int], float]:
+        """
+        Fetch the available liquidity (size) to back for many (market_id, selection_id) pairs at once.
+
+        Books are resolved with one packed set of list_market_book calls (after the
+        book cache and market stream); selections whose market could not be fetched get 0.0.
+        """
+        try:
+            books_map = self._fetch_market_books([market_id for market_id, _ in selections])
+        except Exception as e:
+            logger.error(f"Error fetching liquidity for {len(selections)} selections: {e}")
+            books_map = {}
+        return {
+            (market_id, selection_id): self._best_back_size(books_map.get(market_id), selection_id)
+            for market_id, selection_id in selections
+        }
 
     def get_market_liquidity(self, market_id: str, selection_id: int) -> float:
         """Fetch the available liquidity (size) to back for a specific selection."""
+        return self.get_market_liquidities([(market_id, selection_id)])[(market_id, selection_id)]
+
+    def get_best_prices(self, selections: List[Tuple[str, int]]) -> Dict[Tuple[str, int], Dict[str, Optional[float]]]:
+        """
+        Fetch the best price available to back and to lay for many (market_id, selection_id) pairs at once.
+
+        Books are resolved like `get_market_liquidities`, with one packed set of calls.
+        Both prices are None for runners that are not ACTIVE, markets that are not OPEN
+        and markets that could not be fetched.
+        """
         try:
-            market_books = self.client.betting.list_market_book(
-                market_ids=[market_id],
-                price_projection=betfairlightweight.filters.price_projection(
-                    price_data=['EX_BEST_OFFERS']
-                )
-            )
-            if not market_books:
-                return 0.0
-                
-            book = market_books[0]
-            for runner in book.runners:
-                if runner.selection_id == selection_id:
-                    if runner.ex.available_to_back:
-                        return runner.ex.available_to_back[0].size
-            return 0.0
+            books_map = self._fetch_market_books([market_id for market_id, _ in selections])
         except Exception as e:
-            logger.error(f"Error fetching liquidity for market {market_id}, selection {selection_id}: {e}")
-            return 0.0
+            logger.error(f"Error fetching prices for {len(selections)} selections: {e}")
+            books_map = {}
+
+        prices = {}
+        for market_id, selection_id in selections:
+            book = books_map.get(market_id)
+            runner = next((r for r in book.runners if r.selection_id == selection_id), None) if book else None
+            if runner is None or book.status != 'OPEN' or runner.status != 'ACTIVE':
+                prices[(market_id, selection_id)] = {"back": None, "lay": None}
+                continue
+            prices[(market_id, selection_id)] = {
+                "back": runner.ex.available_to_back[0].price if runner.ex.available_to_back else None,
+                "lay": runner.ex.available_to_lay[0].price if runner.ex.available_to_lay else None,
+            }
+        return prices
 
     def get_balance(self) -> Dict[str, Any]:
         """
@@ -121,8 +307,12 @@ class BetfairExchange(BaseBettingPlatform):
                 - retained_commission: Commission retained
                 - exposure_limit: Exposure limit
         """
-        account_funds = self.client.account.get_account_funds()
-        
+        return self._balance_from_funds(
+            self.resilience.call("getAccountFunds", self.client.account.get_account_funds)
+        )
+
+    @staticmethod
+    def _balance_from_funds(account_funds) -> Dict[str, Any]:
         return {
             "available_balance": account_funds.available_to_bet_balance,
             "exposure": account_funds.exposure,
@@ -132,6 +322,74 @@ class BetfairExchange(BaseBettingPlatform):
             "points_balance": account_funds.points_balance
         }
 
+    def _list_market_catalogue_batch(self, market_filter: dict) -> list:
+        """
+        Fetch one catalogue page for `market_filter`, returning [] on failure.
+
+        On TOO_MUCH_DATA the packer's capacity is halved and the page is re-requested,
+        split in two by its competition / event IDs when it has more than one.
+        """
+        capacity = self.catalogue_packer.capacity
+        id_key = 'eventIds' if market_filter.get('eventIds') else 'competitionIds'
+        batch_ids = market_filter.get(id_key) or []
+        try:
+            batch = self.resilience.call("listMarketCatalogue", lambda: self.client.betting.list_market_catalogue(
+                filter=market_filter,
+                max_results=capacity,
+                market_projection=CATALOGUE_MARKET_PROJECTION,
+                sort='FIRST_TO_START',
+                lightweight=True
+            ))
+            batch = batch or []
+            if len(batch) >= capacity:
+                logger.warning(f"Market catalogue batch {batch_ids} hit {capacity} results and may be truncated")
+            return batch
+        except Exception as e:
+            if is_too_much_data(e) and capacity > 1:
+                self.catalogue_packer.record_too_much_data(capacity)
+                if len(batch_ids) > 1:
+                    middle = len(batch_ids) // 2
+                    return (
+                        self._list_market_catalogue_batch({**market_filter, id_key: batch_ids[:middle]})
+                        + self._list_market_catalogue_batch({**market_filter, id_key: batch_ids[middle:]})
+                    )
+                return self._list_market_catalogue_batch(market_filter)
+            logger.error(f"Error fetching market catalogue batch {batch_ids}: {e}")
+            return []
+
+    def _iter_catalogue_batches(self, market_filters: List[dict], max_results: int, max_workers: int = CATALOGUE_FETCH_WORKERS) -> Iterator[list]:
+        """
+        Yield catalogue pages for `market_filters`, fetched concurrently, in filter order.
+
+        Pages are dispatched in waves of `max_workers` so that no more than one wave is
+        requested beyond the page that reaches `max_results`; that page is truncated and
+        iteration stops. Yield order follows `market_filters`, so concatenating the pages
+        matches the sequential FIRST_TO_START walk.
+        """
+        if not market_filters:
+            return
+
+        fetched = 0
+        max_workers = max(1, min(max_workers, len(market_filters)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for i in range(0, len(market_filters), max_workers):
+                wave = market_filters[i:i + max_workers]
+                for batch in executor.map(self._list_market_catalogue_batch, wave):
+                    if fetched + len(batch) >= max_results:
+                        yield batch[:max_results - fetched]
+                        return
+                    fetched += len(batch)
+                    if batch:
+                        yield batch
+
+    def _fetch_catalogue_batches(self, market_filters: List[dict], max_results: int, max_workers: int = CATALOGUE_FETCH_WORKERS) -> list:
+        """Fetch and merge all catalogue pages for `market_filters` (see `_iter_catalogue_batches`)."""
+        return [
+            market
+            for batch in self._iter_catalogue_batches(market_filters, max_results, max_workers)
+            for market in batch
+        ]
+
     def search_market(self, sport: str, competitions: List[str] = [], market_type_codes: Optional[List[str]] = None, text_query: Optional[str] = None, date: Optional[str] = None, from_time: Optional[str] = None, to_time: Optional[str] = None, max_results: int = 40, all_markets: Optional[bool] = False) -> List[Dict[str, Any]]:
         """
         Search for markets given a sport.
@@ -141,132 +399,199 @@ class BetfairExchange(BaseBettingPlatform):
         Optional from_time / to_time filters events by specific ISO time range.
         Optional max_results limits the number of markets returned.
         """
+        return [
+            event
+            for events in self.search_market_iter(
+                sport, competitions, market_type_codes=market_type_codes, text_query=text_query, date=date,
+                from_time=from_time, to_time=to_time, max_results=max_results, all_markets=all_markets
+            )
+            for event in events
+        ]
+
+    def search_market_iter(self, sport: str, competitions: List[str] = [], market_type_codes: Optional[List[str]] = None, text_query: Optional[str] = None, date: Optional[str] = None, from_time: Optional[str] = None, to_time: Optional[str] = None, max_results: int = 40, all_markets: Optional[bool] = False) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Streaming variant of `search_market`: yields lists of finished events, one per catalogue page.
+
+        Each catalogue page is priced and grouped as soon as it arrives, so callers can
+        persist results while later pages are still being fetched and only one page of
+        catalogue and books is held in memory at a time. Pages are built from disjoint
+        competition / event ID batches, so an event never spans two yielded chunks.
+        Accepts the same arguments as `search_market`.
+        """
+        market_filters = self._build_catalogue_filters(
+            sport, competitions, market_type_codes, text_query, from_time, to_time, all_markets, date=date
+        )
+
+        min_liquidity = AUTOMATED_BETTING_OPTIONS.get("MIN_MATCHED_LIQUIDITY", 100)
+        market_count = 0
+        skipped = 0
+        for market_catalogue in self._iter_catalogue_batches(market_filters, max_results=max_results):
+            market_count += len(market_catalogue)
+            market_catalogue, dropped = self._prescreen_liquidity(market_catalogue, min_liquidity)
+            skipped += dropped
+            books_map = self._fetch_markets_with_odds(market_catalogue)
+            events = self._group_markets_into_events(market_catalogue, books_map)
+            # The catalogue is already limited to `date`; this only trims Betfair's inclusive upper bound.
+            if date:
+                events = self._filter_events_by_date(events, date)
+            if events:
+                yield events
+
+        logger.info(f"Retrieved {market_count} markets from Betfair")
+        self._record_prescreen(skipped, market_count, min_liquidity)
+
+    @staticmethod
+    def _prescreen_liquidity(market_catalogue: list, min_liquidity: float) -> Tuple[list, int]:
+        """
+        Drop catalogue markets whose totalMatched is already below `min_liquidity`, before any book is fetched.
+
+        Markets without a total are kept; the book's own total_matched is still checked
+        when events are grouped. Returns the kept markets and how many were dropped.
+        """
+        if not min_liquidity:
+            return market_catalogue, 0
+        kept = [m for m in market_catalogue if m.get('totalMatched') is None or m['totalMatched'] >= min_liquidity]
+        return kept, len(market_catalogue) - len(kept)
+
+    def _record_prescreen(self, skipped: int, market_count: int, min_liquidity: float) -> None:
+        """Add one search's pre-screened markets to `prescreened_markets` and log them as a single line."""
+        self.prescreened_markets += skipped
+        if skipped:
+            logger.info(f"Liquidity pre-screen skipped {skipped} of {market_count} markets below {min_liquidity} matched")
+
+    def _build_catalogue_filters(self, sport: str, competitions: List[str], market_type_codes: Optional[List[str]], text_query: Optional[str], from_time: Optional[str], to_time: Optional[str], all_markets: Optional[bool], date: Optional[str] = None) -> List[dict]:
+        """Resolve sport and competition names into the paged market filters used by `search_market`."""
+        window = self._market_start_window(date, from_time, to_time)
+        if window is None:
+            logger.info(f"Empty start-time window (date={date}, from={from_time}, to={to_time}); nothing to fetch.")
+            return []
+
         if market_type_codes is None:
             market_type_codes = ALL_MARKET_TYPE_CODES if all_markets else ['MATCH_ODDS']
 
-        event_types = self.client.betting.list_event_types(
-            filter=betfairlightweight.filters.market_filter(text_query=sport)
-        )
-        if not event_types:
+        event_type_id = self.reference_data.resolve_event_type_id(self.client.betting, sport)
+        if not event_type_id:
             logger.info(f"Sport '{sport}' not found.")
             return []
 
-        event_type_id = event_types[0].event_type.id
-        
         competition_ids = []
         if competitions:
             for comp_name in competitions:
-                comps = self.client.betting.list_competitions(
-                    filter=betfairlightweight.filters.market_filter(
-                        text_query=comp_name,
-                        event_type_ids=[event_type_id]
-                    )
+                competition_ids.extend(
+                    self.reference_data.resolve_competition_ids(self.client.betting, event_type_id, comp_name)
                 )
-                if comps:
-                    # First try to find exact match (case-insensitive)
-                    exact_matches = [c for c in comps if c.competition.name.lower() == comp_name.lower()]
-                    
-                    if exact_matches:
-                        # Use exact match
-                        ids = [c.competition.id for c in exact_matches]
-                        competition_ids.extend(ids)
-                        logger.info(f"Found exact match for '{comp_name}': {exact_matches[0].competition.name} (IDs: {ids})")
-                    else:
-                        # Fall back to all matches (log them for user awareness)
-                        ids = [c.competition.id for c in comps]
-                        comp_names = [c.competition.name for c in comps]
-                        competition_ids.extend(ids)
-                        logger.warning(f"No exact match for '{comp_name}'. Using partial matches: {comp_names}")
-                else:
-                    logger.warning(f"Competition '{comp_name}' not found.")
-            
+
             if not competition_ids:
                 logger.warning(f"No competitions found for {competitions}")
                 return []
 
-        # Construct time range filter if provided
+        # Date and time-window requests become a marketStartTime range, so the counts,
+        # catalogue pages and books below never include off-window markets.
         market_start_time = None
-        if from_time or to_time:
+        start, end = window
+        if start or end:
             market_start_time = betfairlightweight.filters.time_range(
-                from_=from_time,
-                to=to_time
+                from_=start.strftime('%Y-%m-%dT%H:%M:%SZ') if start else None,
+                to=end.strftime('%Y-%m-%dT%H:%M:%SZ') if end else None,
             )
 
-        # Betfair's list_market_catalogue hard-limits responses to ~100 results.
-        # Paginate by batching competition IDs to stay inside that limit.
-        CATALOGUE_BATCH_SIZE = 3  # competitions per call (keeps results well under 100)
-        CATALOGUE_MAX_PER_CALL = 100
-
-        market_catalogue: list = []
-
-        def _fetch_catalogue_batch(comp_ids_batch):
-            try:
-                batch = self.client.betting.list_market_catalogue(
-                    filter=betfairlightweight.filters.market_filter(
-                        text_query=text_query,
-                        event_type_ids=[event_type_id],
-                        competition_ids=comp_ids_batch if comp_ids_batch else None,
-                        market_type_codes=market_type_codes,
-                        market_start_time=market_start_time
-                    ),
-                    max_results=CATALOGUE_MAX_PER_CALL,
-                    market_projection=['EVENT', 'RUNNER_METADATA', 'MARKET_START_TIME', 'MARKET_DESCRIPTION', 'COMPETITION'],
-                    sort='FIRST_TO_START',
-                    lightweight=True
-                )
-                return batch or []
-            except Exception as e:
-                logger.error(f"Error fetching market catalogue batch {comp_ids_batch}: {e}")
-                return []
+        filter_kwargs = dict(
+            text_query=text_query,
+            event_type_ids=[event_type_id],
+            market_type_codes=market_type_codes,
+            market_start_time=market_start_time,
+        )
 
-        if competition_ids:
-            for i in range(0, len(competition_ids), CATALOGUE_BATCH_SIZE):
-                batch_ids = competition_ids[i:i + CATALOGUE_BATCH_SIZE]
-                market_catalogue.extend(_fetch_catalogue_batch(batch_ids))
-                if len(market_catalogue) >= max_results:
-                    market_catalogue = market_catalogue[:max_results]
-                    break
-        else:
-            # Use event_ids pagination since listMarketCatalogue is capped at 1000
-            try:
-                all_events = self.client.betting.list_events(
-                    filter=betfairlightweight.filters.market_filter(
-                        text_query=text_query,
-                        event_type_ids=[event_type_id],
-                        market_start_time=market_start_time
-                    )
-                )
-                if all_events:
-                    event_ids = [e.event.id for e in all_events]
-                    logger.info(f"Retrieved {len(event_ids)} events. Fetching catalogues in batches of 20...")
-                    EVENT_BATCH_SIZE = 20
-                    for i in range(0, len(event_ids), EVENT_BATCH_SIZE):
-                        batch_event_ids = event_ids[i:i + EVENT_BATCH_SIZE]
-                        batch_markets = self.client.betting.list_market_catalogue(
-                            filter=betfairlightweight.filters.market_filter(
-                                text_query=text_query,
-                                event_type_ids=[event_type_id],
-                                event_ids=batch_event_ids,
-                                market_type_codes=market_type_codes,
-                                market_start_time=market_start_time
-                            ),
-                            max_results=CATALOGUE_MAX_PER_CALL,
-                            market_projection=['EVENT', 'RUNNER_METADATA', 'MARKET_START_TIME', 'MARKET_DESCRIPTION', 'COMPETITION'],
-                            sort='FIRST_TO_START',
-                            lightweight=True
-                        )
-                        if batch_markets:
-                            market_catalogue.extend(batch_markets)
-                        if len(market_catalogue) >= max_results:
-                            market_catalogue = market_catalogue[:max_results]
-                            break
-            except Exception as e:
-                logger.error(f"Error fetching all events for pagination: {e}")
-
-        logger.info(f"Retrieved {len(market_catalogue)} markets from Betfair")
+        # Betfair caps each catalogue call by data weight, so paginate by packing
+        # competition IDs (or event IDs for all leagues) into separate filters sized
+        # from Betfair's market counts, then fetch the pages concurrently.
+        if not competition_ids:
+            return self._packed_event_filters(filter_kwargs)
 
-        books_map = self._fetch_markets_with_odds(market_catalogue)
+        counts = self._market_counts(
+            lambda: self.resilience.call("listCompetitions", lambda: self.client.betting.list_competitions(
+                filter=betfairlightweight.filters.market_filter(competition_ids=competition_ids, **filter_kwargs)
+            )),
+            lambda result: result.competition.id,
+        )
+        if counts is None:
+            groups = self.catalogue_packer.pack(competition_ids, default_count=DEFAULT_MARKETS_PER_COMPETITION)
+            return [
+                betfairlightweight.filters.market_filter(competition_ids=group, **filter_kwargs)
+                for group in groups
+            ]
 
+        # Competitions without matching markets are skipped; ones too big for a single
+        # call are paged by their events instead.
+        capacity = self.catalogue_packer.capacity
+        fitting = [c for c in dict.fromkeys(competition_ids) if c in counts and (counts[c] or 0) <= capacity]
+        oversized = [c for c in dict.fromkeys(competition_ids) if c in counts and (counts[c] or 0) > capacity]
+        market_filters = [
+            betfairlightweight.filters.market_filter(competition_ids=group, **filter_kwargs)
+            for group in self.catalogue_packer.pack(fitting, counts, default_count=DEFAULT_MARKETS_PER_COMPETITION)
+        ]
+        if oversized:
+            market_filters += self._packed_event_filters({**filter_kwargs, "competition_ids": oversized})
+        return market_filters
+
+    @staticmethod
+    def _market_start_window(date: Optional[str], from_time: Optional[str], to_time: Optional[str]) -> Optional[Tuple[Optional[datetime], Optional[datetime]]]:
+        """
+        The UTC (start, end) marketStartTime range for a search, or None when it is empty.
+
+        `date` (YYYY-MM-DD) is a UTC day, matching Betfair's marketStartTime and the daily
+        fixture dates; from_time / to_time are ISO timestamps (naive ones are read as UTC,
+        others converted) and narrow the day further when both are given.
+        """
+        def parse(value: str) -> datetime:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            return parsed.astimezone(timezone.utc) if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+        start = parse(from_time) if from_time else None
+        end = parse(to_time) if to_time else None
+        if date:
+            day_start = datetime.strptime(date, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+            day_end = day_start + timedelta(days=1) - timedelta(seconds=1)
+            start = max(start, day_start) if start else day_start
+            end = min(end, day_end) if end else day_end
+        if start and end and start > end:
+            return None
+        return start, end
+
+    @staticmethod
+    def _market_counts(list_call, id_of) -> Optional[Dict[str, Optional[int]]]:
+        """Map IDs to market counts from a list_competitions / list_events call; None if the call fails."""
+        try:
+            results = list_call() or []
+        except Exception as e:
+            logger.error(f"Error fetching market counts for packing: {e}")
+            return None
+        counts = {}
+        for result in results:
+            count = getattr(result, 'market_count', None)
+            counts[id_of(result)] = count if isinstance(count, int) else None
+        return counts
+
+    def _packed_event_filters(self, filter_kwargs: dict) -> List[dict]:
+        """Catalogue filters that page through every matching event, packed by market count."""
+        counts = self._market_counts(
+            lambda: self.resilience.call("listEvents", lambda: self.client.betting.list_events(
+                filter=betfairlightweight.filters.market_filter(**filter_kwargs)
+            )),
+            lambda result: result.event.id,
+        )
+        if not counts:
+            return []
+
+        groups = self.catalogue_packer.pack(list(counts), counts, default_count=DEFAULT_MARKETS_PER_EVENT)
+        logger.info(f"Retrieved {len(counts)} events. Fetching catalogues in {len(groups)} packed requests...")
+        return [
+            betfairlightweight.filters.market_filter(event_ids=group, **filter_kwargs)
+            for group in groups
+        ]
+
+    def _group_markets_into_events(self, market_catalogue: list, books_map: dict) -> List[Dict[str, Any]]:
+        """Group priced catalogue markets into event dicts, dropping markets without a book or liquidity."""
         events_grouped = {}
         for market in market_catalogue:
             market_id = market.get('marketId')
@@ -277,7 +602,7 @@ class BetfairExchange(BaseBettingPlatform):
             # Check market liquidity to avoid matches without popular demand
             min_liquidity = AUTOMATED_BETTING_OPTIONS.get("MIN_MATCHED_LIQUIDITY", 100)
             if (book.total_matched or 0) < min_liquidity:
-                logger.info(f"Skipping market {market_id} due to low liquidity ({book.total_matched} < {min_liquidity})")
+                logger.debug(f"Skipping market {market_id} due to low liquidity ({book.total_matched} < {min_liquidity})")
                 continue
 
             event_name = market.get('event', {}).get('name')
@@ -306,28 +631,27 @@ class BetfairExchange(BaseBettingPlatform):
                 "options": market_options,
             })
         
-        events = list(events_grouped.values())
-        
-        # Filter by date if provided (legacy support, though time_range is better)
-        if date:
-            filtered_events = []
-            for event in events:
-                event_time = event.get('time')
-                # event_time from output is string in lightweight mode (ISO format)
-                # Need to handle string parsing if necessary
-                if isinstance(event_time, str):
-                    # Simple prefix check might be robust enough for YYYY-MM-DD
-                    if event_time.startswith(date):
-                        filtered_events.append(event)
-                elif isinstance(event_time, datetime):
-                     if event_time.strftime('%Y-%m-%d') == date:
-                        filtered_events.append(event)
-                else:
-                    logger.error(f"Error filtering event. Invalid event time: {event_time}")
-                    continue
-            return filtered_events
-            
-        return events
+        return list(events_grouped.values())
+
+    @staticmethod
+    def _filter_events_by_date(events: List[Dict[str, Any]], date: str) -> List[Dict[str, Any]]:
+        """Keep only events whose start time falls on `date` (YYYY-MM-DD)."""
+        filtered_events = []
+        for event in events:
+            event_time = event.get('time')
+            # event_time from output is string in lightweight mode (ISO format)
+            # Need to handle string parsing if necessary
+            if isinstance(event_time, str):
+                # Simple prefix check might be robust enough for YYYY-MM-DD
+                if event_time.startswith(date):
+                    filtered_events.append(event)
+            elif isinstance(event_time, datetime):
+                if event_time.strftime('%Y-%m-%d') == date:
+                    filtered_events.append(event)
+            else:
+                logger.error(f"Error filtering event. Invalid event time: {event_time}")
+                continue
+        return filtered_events
 
     def get_event_markets(self, event_id: str, market_type_codes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
@@ -341,50 +665,113 @@ class BetfairExchange(BaseBettingPlatform):
         Returns:
             List of market dictionaries with odds and runner information.
         """
+        return self.get_markets_for_events([event_id], market_type_codes).get(event_id, [])
+
+    def get_markets_for_events(self, event_ids: List[str], market_type_codes: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch the markets of many events at once, keyed by event ID (as `get_event_markets` returns them).
+
+        Events are packed into catalogue calls by their market counts and every market is
+        priced in packed, concurrent book chunks, so N events cost a handful of calls
+        rather than N catalogue calls plus their book calls. Results are cached for
+        `event_markets_cache_ttl` seconds; events without any priced market are not
+        cached and map to an empty list.
+        """
         if market_type_codes is None:
             market_type_codes = ALL_MARKET_TYPE_CODES
-        
+        event_ids = list(dict.fromkeys(str(event_id) for event_id in event_ids))
+        markets_by_event, missing = self._cached_event_markets(event_ids, market_type_codes)
+        if not missing:
+            return markets_by_event
+
         try:
-            market_catalogue = self.client.betting.list_market_catalogue(
-                filter=betfairlightweight.filters.market_filter(
-                    event_ids=[event_id],
-                    market_type_codes=market_type_codes,
-                ),
-                max_results=100,
-                market_projection=['RUNNER_METADATA', 'MARKET_START_TIME', 'MARKET_DESCRIPTION'],
-                lightweight=True
+            fetched = self._fetch_event_markets(missing, market_type_codes)
+        except Exception as e:
+            logger.error(f"Error fetching markets for events {missing}: {e}", exc_info=True)
+            fetched = {}
+
+        self._store_event_markets(fetched, market_type_codes)
+        markets_by_event.update({event_id: fetched.get(event_id, []) for event_id in missing})
+        return markets_by_event
+
+    def _cached_event_markets(self, event_ids: List[str], market_type_codes: List[str]) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+        """Fresh cached market lists for `event_ids`, and the event IDs that still need fetching."""
+        codes_key = tuple(sorted(market_type_codes))
+        now = time.time()
+        with self._event_markets_lock:
+            markets_by_event = {
+                event_id: entry[1] for event_id in event_ids
+                if (entry := self._event_markets_cache.get((event_id, codes_key))) and now - entry[0] < self.event_markets_cache_ttl
+            }
+        return markets_by_event, [event_id for event_id in event_ids if event_id not in markets_by_event]
+
+    def _store_event_markets(self, fetched: Dict[str, List[Dict[str, Any]]], market_type_codes: List[str]) -> None:
+        """Cache fetched market lists, skipping events without any priced market."""
+        codes_key = tuple(sorted(market_type_codes))
+        fetched_at = time.time()
+        with self._event_markets_lock:
+            self._event_markets_cache.update({
+                (event_id, codes_key): (fetched_at, markets) for event_id, markets in fetched.items() if markets
+            })
+
+    def _fetch_event_markets(self, event_ids: List[str], market_type_codes: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Packed catalogue pages and book chunks for `event_ids`, grouped into per-event market lists."""
+        market_filters = self._event_market_filters(event_ids, market_type_codes)
+        market_catalogue = self._fetch_catalogue_batches(market_filters, max_results=sys.maxsize)
+        books_map = self._fetch_markets_with_odds(market_catalogue)
+        return self._group_event_markets(market_catalogue, books_map)
+
+    def _event_market_filters(self, event_ids: List[str], market_type_codes: List[str]) -> List[dict]:
+        """Catalogue filters for `event_ids`, packed into groups by their market counts."""
+        groups = [event_ids]
+        if len(event_ids) > 1:
+            counts = self._market_counts(
+                lambda: self.resilience.call("listEvents", lambda: self.client.betting.list_events(
+                    filter=betfairlightweight.filters.market_filter(event_ids=event_ids, market_type_codes=market_type_codes)
+                )),
+                lambda result: result.event.id,
             )
-            
-            if not market_catalogue:
-                return []
-            
-            books_map = self._fetch_markets_with_odds(market_catalogue)
+            # Events missing from the counts have no market of these types.
+            ids = event_ids if counts is None else [event_id for event_id in event_ids if event_id in counts]
+            groups = self.catalogue_packer.pack(ids, counts, default_count=DEFAULT_MARKETS_PER_EVENT)
+        return [
+            betfairlightweight.filters.market_filter(event_ids=group, market_type_codes=market_type_codes)
+            for group in groups if group
+        ]
 
-            markets = []
-            for market in market_catalogue:
-                market_id = market.get('marketId')
-                book = books_map.get(market_id)
-                if not book:
-                    continue
+    def _group_event_markets(self, market_catalogue: list, books_map: dict) -> Dict[str, List[Dict[str, Any]]]:
+        """Per-event market lists (see `_build_event_markets`) for a catalogue spanning several events."""
+        catalogue_by_event = defaultdict(list)
+        for market in market_catalogue:
+            catalogue_by_event[str((market.get('event') or {}).get('id'))].append(market)
+        return {
+            event_id: self._build_event_markets(markets, books_map)
+            for event_id, markets in catalogue_by_event.items()
+        }
 
-                market_options = self._build_runner_options(market, book)
+    def _build_event_markets(self, market_catalogue: list, books_map: dict) -> List[Dict[str, Any]]:
+        """Build the market dicts returned by `get_event_markets`, skipping markets without a book."""
+        markets = []
+        for market in market_catalogue:
+            market_id = market.get('marketId')
+            book = books_map.get(market_id)
+            if not book:
+                continue
 
-                markets.append({
-                    "name": market.get('description', {}).get('marketType'),
-                    "market_id": market_id,
-                    "options": market_options,
-                })
-            
-            return markets
-            
-        except Exception as e:
-            logger.error(f"Error fetching markets for event {event_id}: {e}", exc_info=True)
-            return []
+            market_options = self._build_runner_options(market, book)
 
-    def place_bets(self, bets: List[Dict[str, Any]]) -> Dict[str, Any]:
+            markets.append({
+                "name": market.get('description', {}).get('marketType'),
+                "market_id": market_id,
+                "options": market_options,
+            })
+        return markets
+
+    def place_bets(self, bets: List[Dict[str, Any]], max_workers: int = PLACE_ORDERS_WORKERS) -> Dict[str, Any]:
         """
         Place multiple bets across potentially different markets.
-        Groups bets by market_id and makes separate API calls for each market.
+        Groups bets by market_id and makes one place_orders call per market, running up to
+        `max_workers` markets in parallel (1 places them one after another).
         
         Args:
             bets: List of bet dictionaries, each containing:
@@ -393,73 +780,106 @@ class BetfairExchange(BaseBettingPlatform):
                 - stake: float
                 - odds: float
                 - side: str (optional, defaults to 'BACK')
+            max_workers: Number of markets placed concurrently.
         
         Returns:
-            Dictionary with overall status and results for each bet.
+            Dictionary with overall status, results for each bet (grouped by market, in
+            the order markets first appear in `bets`) and the place_orders latency per market.
+            A market whose call raised is reported as FAILURE for each of its bets; if
+            every call raised, the first error is re-raised.
         """
-        
+        # Check for local emulator environment
+        if os.environ.get("FUNCTIONS_EMULATOR") == "true":
+            return self._mock_placements(bets)
+
+        bets_by_market = self._group_bets_by_market(bets)
+
+        # Place every market's orders at once so the last market is not priced a few round-trips late
+        market_ids = list(bets_by_market)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(market_ids)))) as executor:
+            futures = [
+                executor.submit(self._place_market_orders, market_id, bets_by_market[market_id])
+                for market_id in market_ids
+            ]
+            outcomes = [future.result() for future in futures]
+
+        return self._aggregate_placements(bets_by_market, outcomes)
+
+    @staticmethod
+    def _group_bets_by_market(bets: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
         # Group bets by market_id (Betfair requires same market for batch)
         bets_by_market = defaultdict(list)
         for bet in bets:
             bets_by_market[bet['market_id']].append(bet)
-        
+        return bets_by_market
+
+    @staticmethod
+    def _mock_placements(bets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        logger.warning("Mocking bet placement in local environment.")
+        all_results = []
+        for bet in bets:
+            all_results.append({
+                "market_id": bet['market_id'],
+                "selection_id": bet['selection_id'],
+                "status": "SUCCESS",
+                "bet_id": f"mock_bet_{uuid.uuid4()}",
+                "average_price_matched": bet['odds'],
+                "size_matched": bet['stake']
+            })
+
+        return {
+            "status": "SUCCESS",
+            "bets": all_results
+        }
+
+    @staticmethod
+    def _aggregate_placements(bets_by_market: Dict[str, List[Dict[str, Any]]], outcomes: List[Tuple[Any, Optional[Exception], float]]) -> Dict[str, Any]:
+        """
+        Merge per-market (place_orders response, error, latency ms) outcomes, in market order,
+        into the place_bets result with its SUCCESS / PARTIAL_FAILURE / FAILURE status.
+        """
+        if not outcomes:
+            # No bets, so nothing was sent
+            return {'status': 'SUCCESS', 'bets': []}
+
         all_results = []
         overall_status = 'SUCCESS'
+        market_ids = list(bets_by_market)
+
+        if all(error is not None for _, error, _ in outcomes):
+            # Nothing reached the exchange, so fail the same way a single-market call would
+            raise outcomes[0][1]
+
+        market_latency_ms = {}
+        for market_id, (place_orders, error, latency_ms) in zip(market_ids, outcomes):
+            market_bets = bets_by_market[market_id]
+            market_latency_ms[market_id] = latency_ms
+
+            if error is not None:
+                overall_status = 'FAILURE'
+                for bet in market_bets:
+                    all_results.append({
+                        'market_id': market_id,
+                        'selection_id': bet['selection_id'],
+                        'status': 'FAILURE',
+                        'error_code': str(error),
+                        **({'customer_order_ref': bet['customer_order_ref']} if bet.get('customer_order_ref') else {}),
+                    })
+                continue
 
-        # Check for local emulator environment
-        if os.environ.get("FUNCTIONS_EMULATOR") == "true":
-            logger.warning("Mocking bet placement in local environment.")
-            for bet in bets:
-                all_results.append({
-                    "market_id": bet['market_id'],
-                    "selection_id": bet['selection_id'],
-                    "status": "SUCCESS",
-                    "bet_id": f"mock_bet_{uuid.uuid4()}",
-                    "average_price_matched": bet['odds'],
-                    "size_matched": bet['stake']
-                })
-            
-            return {
-                "status": "SUCCESS",
-                "bets": all_results
-            }
-        
-        # Process each market's bets
-        for market_id, market_bets in bets_by_market.items():
-            instructions = []
-            
-            for bet in market_bets:
-                limit_order = betfairlightweight.filters.limit_order(
-                    size=bet['stake'],
-                    price=bet['odds'],
-                    persistence_type='LAPSE'
-                )
-                
-                instruction = betfairlightweight.filters.place_instruction(
-                    order_type='LIMIT',
-                    selection_id=bet['selection_id'],
-                    side=bet.get('side', 'BACK'),
-                    limit_order=limit_order
-                )
-                instructions.append(instruction)
-            
-            # Place all bets for this market
-            place_orders = self.client.betting.place_orders(
-                market_id=market_id,
-                instructions=instructions
-            )
-            
             # Process results
             if place_orders.status != 'SUCCESS':
                 overall_status = 'FAILURE'
-            
+
             for i, report in enumerate(place_orders.place_instruction_reports):
                 result = {
                     'market_id': market_id,
                     'selection_id': market_bets[i]['selection_id'],
                     'status': report.status,
                 }
-                
+                if market_bets[i].get('customer_order_ref'):
+                    result['customer_order_ref'] = market_bets[i]['customer_order_ref']
+
                 if report.status == 'SUCCESS':
                     result['bet_id'] = report.bet_id
                     result['average_price_matched'] = report.average_price_matched
@@ -467,68 +887,269 @@ class BetfairExchange(BaseBettingPlatform):
                 else:
                     result['error_code'] = report.error_code
                     overall_status = 'PARTIAL_FAILURE' if overall_status == 'SUCCESS' else 'FAILURE'
-                
+
                 all_results.append(result)
-        
+
+        logger.info(f"Placed orders on {len(market_ids)} markets; latency per market (ms): {market_latency_ms}")
         return {
             'status': overall_status,
-            'bets': all_results
+            'bets': all_results,
+            'market_latency_ms': market_latency_ms,
+        }
+
+    def _place_market_orders(self, market_id: str, market_bets: List[Dict[str, Any]]) -> Tuple[Any, Optional[Exception], float]:
+        """
+        Place one market's bets in a single place_orders call; returns (response, error, latency in ms).
+
+        When every bet carries a customer_order_ref, the call gets a customer_ref derived
+        from them (`_customer_ref`), so Betfair drops an identical re-submission instead
+        of placing it twice.
+        """
+        instructions = self._place_instructions(market_bets)
+        customer_ref = self._customer_ref(market_bets)
+        extra = {'customer_ref': customer_ref} if customer_ref else {}
+        started = time.perf_counter()
+        try:
+            place_orders = self.resilience.call("placeOrders", lambda: self.client.betting.place_orders(
+                market_id=market_id,
+                instructions=instructions,
+                **extra
+            ), idempotent=False)
+        except Exception as e:
+            logger.error(f"place_orders failed for market {market_id}: {e}")
+            return None, e, round((time.perf_counter() - started) * 1000, 1)
+        return place_orders, None, round((time.perf_counter() - started) * 1000, 1)
+
+    @staticmethod
+    def _customer_ref(market_bets: List[Dict[str, Any]]) -> Optional[str]:
+        """placeOrders customerRef (32 hex chars) for one market's bets, or None unless every bet has a customer_order_ref."""
+        order_refs = [bet.get('customer_order_ref') for bet in market_bets]
+        if not all(order_refs):
+            return None
+        return hashlib.sha1("|".join(sorted(order_refs)).encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _place_instructions(market_bets: List[Dict[str, Any]]) -> List[dict]:
+        """LAPSE limit-order instructions for one market's bets."""
+        instructions = []
+        for bet in market_bets:
+            limit_order = betfairlightweight.filters.limit_order(
+                size=bet['stake'],
+                price=bet['odds'],
+                persistence_type='LAPSE'
+            )
+
+            instruction = betfairlightweight.filters.place_instruction(
+                order_type='LIMIT',
+                selection_id=bet['selection_id'],
+                side=bet.get('side', 'BACK'),
+                limit_order=limit_order,
+                customer_order_ref=bet.get('customer_order_ref'),
+            )
+            instructions.append(instruction)
+        return instructions
+
+    def get_order_states(self, bet_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Return streamed order state (status, matched size, average price, market closed) per bet ID.
+
+        The order stream is opened on first use and kept for later calls. Returns {} when
+        the stream is unavailable, so callers should fall back to the REST API.
+        """
+        if self.order_stream is None:
+            self.order_stream = OrderStreamCache(self.client)
+        if not self.order_stream.ready and not self.order_stream.start():
+            return {}
+        return self.order_stream.get_orders(bet_ids)
+
+    def list_current_orders(self, bet_ids: Optional[List[str]] = None, customer_order_refs: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Current state of each order in `bet_ids`, or placed with one of `customer_order_refs`
+        (status, price, matched, remaining, lapsed and cancelled size), keyed by bet ID.
+
+        IDs are queried in concurrent chunks of CURRENT_ORDERS_BET_ID_CHUNK, each paging
+        through from_record. Orders in markets that have settled are no longer current
+        and are missing from the result.
+        """
+        queries = []
+        for field, ids in (("bet_ids", bet_ids), ("customer_order_refs", customer_order_refs)):
+            ids = list(dict.fromkeys(ids or []))
+            queries.extend({field: ids[i:i + CURRENT_ORDERS_BET_ID_CHUNK]} for i in range(0, len(ids), CURRENT_ORDERS_BET_ID_CHUNK))
+        if not queries:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(CLEARED_ORDERS_WORKERS, len(queries)))) as executor:
+            pages = list(executor.map(lambda query: self._list_current_orders_pages(**query), queries))
+
+        return {
+            order["betId"]: {
+                "bet_id": order["betId"],
+                "market_id": order["marketId"],
+                "selection_id": order["selectionId"],
+                "side": order["side"],
+                "status": order["status"],
+                "price": order["priceSize"]["price"],
+                "size": order["priceSize"]["size"],
+                "size_matched": order.get("sizeMatched", 0.0),
+                "size_remaining": order.get("sizeRemaining", 0.0),
+                "size_lapsed": order.get("sizeLapsed", 0.0),
+                "size_cancelled": order.get("sizeCancelled", 0.0),
+                "average_price_matched": order.get("averagePriceMatched", 0.0),
+                "placed_date": order.get("placedDate"),
+                "customer_order_ref": order.get("customerOrderRef"),
+            }
+            for page in pages
+            for order in page
         }
 
+    def _list_current_orders_pages(self, bet_ids: Optional[List[str]] = None, customer_order_refs: Optional[List[str]] = None) -> list:
+        """Fetch every page of current orders for one chunk of bet IDs or order refs, following moreAvailable."""
+        orders = []
+        from_record = 0
+        while True:
+            response = self.resilience.call("listCurrentOrders", lambda: self.client.betting.list_current_orders(
+                bet_ids=bet_ids,
+                customer_order_refs=customer_order_refs,
+                from_record=from_record,
+                record_count=CURRENT_ORDERS_PAGE_SIZE,
+                lightweight=True,
+            ))
+            page = (response or {}).get("currentOrders") or []
+            orders.extend(page)
+            if not page or not response.get("moreAvailable"):
+                return orders
+            from_record += len(page)
+
+    def cancel_orders(self, market_id: str, bet_ids: List[str]) -> Dict[str, float]:
+        """Cancel the unmatched part of `bet_ids` on one market; returns the size cancelled per bet ID that succeeded."""
+        response = self.resilience.call("cancelOrders", lambda: self.client.betting.cancel_orders(
+            market_id=market_id,
+            instructions=[betfairlightweight.filters.cancel_instruction(bet_id=bet_id) for bet_id in bet_ids],
+            lightweight=True,
+        ))
+        cancelled = {}
+        for report in response.get("instructionReports") or []:
+            if report.get("status") == "SUCCESS":
+                cancelled[report["instruction"]["betId"]] = report.get("sizeCancelled") or 0.0
+            else:
+                logger.warning(f"Cancel failed on {market_id}: {report.get('errorCode')} for {report.get('instruction')}")
+        return cancelled
+
+    def replace_orders(self, market_id: str, new_prices: Dict[str, float]) -> Dict[str, Dict[str, Any]]:
+        """
+        Move the unmatched part of each bet in `new_prices` (bet ID -> price) on one market to its new price.
+
+        Betfair cancels the remainder and places it as a new bet. Returns, per replaced bet ID,
+        the new bet's ID, price, size and immediate match; failed replacements are logged and left out.
+        """
+        response = self.resilience.call("replaceOrders", lambda: self.client.betting.replace_orders(
+            market_id=market_id,
+            instructions=[
+                betfairlightweight.filters.replace_instruction(bet_id=bet_id, new_price=price)
+                for bet_id, price in new_prices.items()
+            ],
+            lightweight=True,
+        ), idempotent=False)
+        replaced = {}
+        for report in response.get("instructionReports") or []:
+            cancel = report.get("cancelInstructionReport") or {}
+            place = report.get("placeInstructionReport") or {}
+            if report.get("status") != "SUCCESS" or not place.get("betId"):
+                logger.warning(f"Replace failed on {market_id}: {report.get('errorCode')} for {cancel.get('instruction')}")
+                continue
+            limit_order = (place.get("instruction") or {}).get("limitOrder") or {}
+            replaced[cancel["instruction"]["betId"]] = {
+                "bet_id": place["betId"],
+                "price": limit_order.get("price"),
+                "size": limit_order.get("size"),
+                "size_matched": place.get("sizeMatched") or 0.0,
+                "average_price_matched": place.get("averagePriceMatched") or 0.0,
+                "status": place.get("orderStatus"),
+            }
+        return replaced
+
+    def _list_cleared_orders_pages(self, status: str, bet_ids: Optional[List[str]], settled_date_range: Optional[dict]) -> list:
+        """Fetch every page of cleared orders for one status (and bet-ID chunk), following moreAvailable."""
+        orders = []
+        from_record = 0
+        while True:
+            response = self.resilience.call("listClearedOrders", lambda: self.client.betting.list_cleared_orders(
+                bet_status=status,
+                bet_ids=bet_ids,
+                settled_date_range=settled_date_range,
+                from_record=from_record,
+                record_count=CLEARED_ORDERS_PAGE_SIZE,
+            ))
+            page = response.orders if response and response.orders else []
+            orders.extend(page)
+            if not page or not response.more_available:
+                return orders
+            from_record += len(page)
+
     def list_cleared_orders(self, bet_ids: Optional[List[str]] = None, settled_date_range: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """
         List cleared (settled) orders.
-        
+
+        Every status (SETTLED, VOIDED, LAPSED, CANCELLED) and every chunk of up to
+        CLEARED_ORDERS_BET_ID_CHUNK bet IDs is queried concurrently, each query paging
+        through from_record until Betfair reports no more records. Results are merged in
+        status order and de-duplicated by bet ID.
+
         Args:
             bet_ids: Optional list of bet IDs to filter by.
             settled_date_range: Optional tuple of (start_datetime, end_datetime).
-            
+
         Returns:
             List of cleared orders with status and P/L.
         """
-        # Create filter filter
-        if bet_ids:
-            filter_kwargs = {"bet_ids": bet_ids}
-        else:
-            filter_kwargs = {}
-            
+        time_range, queries = self._cleared_order_queries(bet_ids, settled_date_range)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(CLEARED_ORDERS_WORKERS, len(queries)))) as executor:
+            futures = [
+                executor.submit(self._list_cleared_orders_pages, status, chunk, time_range)
+                for status, chunk in queries
+            ]
+            pages = [(status, future.result()) for (status, _), future in zip(queries, futures)]
+
+        return self._merge_cleared_orders(pages)
+
+    @staticmethod
+    def _cleared_order_queries(bet_ids: Optional[List[str]], settled_date_range: Optional[tuple]) -> Tuple[Optional[dict], List[Tuple[str, Optional[List[str]]]]]:
+        """The settled-date time range and the (status, bet-ID chunk) queries for `list_cleared_orders`."""
+        time_range = None
         if settled_date_range:
             time_range = betfairlightweight.filters.time_range(
                 from_=settled_date_range[0].strftime("%Y-%m-%dT%H:%M:%S.000Z"),
                 to=settled_date_range[1].strftime("%Y-%m-%dT%H:%M:%S.000Z")
             )
-            filter_kwargs["settled_date_range"] = time_range
 
-        # Only create market_filter if we are filtering by bet_ids? 
-        # Actually list_cleared_orders takes specific args like bet_ids directly or in the body.
-        # betfairlightweight API: client.betting.list_cleared_orders(bet_ids=[...], ...)
-        
-        # It seems bet_ids is a direct argument, not inside market_filter for list_cleared_orders
-        
+        bet_id_chunks = (
+            [bet_ids[i:i + CLEARED_ORDERS_BET_ID_CHUNK] for i in range(0, len(bet_ids), CLEARED_ORDERS_BET_ID_CHUNK)]
+            if bet_ids else [None]
+        )
+        return time_range, [(status, chunk) for status in CLEARED_ORDER_STATUSES for chunk in bet_id_chunks]
+
+    @staticmethod
+    def _merge_cleared_orders(pages: List[Tuple[str, list]]) -> List[Dict[str, Any]]:
+        """Flatten (status, cleared orders) pages into result dicts, keeping the first entry per bet ID."""
         results = []
-        statuses_to_check = ["SETTLED", "VOIDED", "LAPSED", "CANCELLED"]
+        seen = set()
+        for status, orders in pages:
+            for order in orders:
+                if order.bet_id in seen:
+                    continue
+                seen.add(order.bet_id)
+                # Treat VOIDED/CANCELLED/LAPSED as LOST for profit calculation, with 0 profit (actually order.profit will be 0)
+                results.append({
+                    "bet_id": order.bet_id,
+                    "market_id": order.market_id,
+                    "selection_id": order.selection_id,
+                    "status": "WON" if order.profit > 0 else (status if status != "SETTLED" else "LOST"),
+                    "profit": order.profit,
+                    "settled_date": order.settled_date,
+                    "side": order.side,
+                    "price_requested": order.price_requested,
+                    "price_matched": order.price_matched,
+                    "size_settled": order.size_settled
+                })
 
-        for status in statuses_to_check:
-            cleared_orders_response = self.client.betting.list_cleared_orders(
-                bet_status=status,
-                bet_ids=bet_ids if bet_ids else None,
-                settled_date_range=filter_kwargs.get("settled_date_range")
-            )
-            
-            if cleared_orders_response and cleared_orders_response.orders:
-                for order in cleared_orders_response.orders:
-                    # Treat VOIDED/CANCELLED/LAPSED as LOST for profit calculation, with 0 profit (actually order.profit will be 0)
-                    results.append({
-                        "bet_id": order.bet_id,
-                        "market_id": order.market_id,
-                        "selection_id": order.selection_id,
-                        "status": "WON" if order.profit > 0 else (status if status != "SETTLED" else "LOST"), 
-                        "profit": order.profit,
-                        "settled_date": order.settled_date,
-                        "side": order.side,
-                        "price_requested": order.price_requested,
-                        "price_matched": order.price_matched,
-                        "size_settled": order.size_settled
-                    })
-                    
         return results
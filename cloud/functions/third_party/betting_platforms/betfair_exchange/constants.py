@@ -12,3 +12,121 @@ ALL_MARKET_TYPE_CODES = [
     'OVER_UNDER_25_CARDS', 'OVER_UNDER_35_CARDS', 'OVER_UNDER_45_CARDS',
     'BOTH_TEAMS_TO_SCORE'
 ]
+
+# Betfair rejects any request whose data weight exceeds MAX_REQUEST_WEIGHT points
+# with TOO_MUCH_DATA. Weight is the sum of the projection weights below, per market.
+MAX_REQUEST_WEIGHT = 200
+MARKET_PROJECTION_WEIGHTS = {'MARKET_DESCRIPTION': 1, 'RUNNER_METADATA': 1}
+PRICE_PROJECTION_WEIGHTS = {
+    'SP_AVAILABLE': 3, 'SP_TRADED': 7, 'EX_BEST_OFFERS': 5, 'EX_ALL_OFFERS': 17, 'EX_TRADED': 17,
+}
+# Projections Betfair weighs as a pair rather than as the sum of both.
+PRICE_PROJECTION_COMBINED_WEIGHTS = [
+    ({'EX_ALL_OFFERS', 'EX_TRADED'}, 32),
+    ({'EX_BEST_OFFERS', 'EX_TRADED'}, 20),
+]
+NO_PRICE_PROJECTION_WEIGHT = 2
+
+# Price data requested for book lookups (40 markets per call at 5 points each).
+BOOK_PRICE_DATA = ['EX_BEST_OFFERS']
+# Price data for full-depth ladder capture used by fill-price estimates (6 markets per call at 32 points each).
+LADDER_PRICE_DATA = ['EX_ALL_OFFERS', 'EX_TRADED']
+# Concurrent list_market_book calls when fetching books for a large catalogue.
+BOOK_FETCH_WORKERS = 8
+# Attempts per book chunk before the chunk is logged and skipped.
+BOOK_FETCH_ATTEMPTS = 3
+
+# The catalogue is paged by packing competition or event IDs into separate calls,
+# using Betfair's market counts to fill each call up to the data-weight limit.
+CATALOGUE_MARKET_PROJECTION = ['EVENT', 'RUNNER_METADATA', 'MARKET_START_TIME', 'MARKET_DESCRIPTION', 'COMPETITION']
+CATALOGUE_MAX_RESULTS = 1000  # listMarketCatalogue's own maxResults cap
+# Market counts assumed when Betfair's counts are unavailable.
+DEFAULT_MARKETS_PER_COMPETITION = 33
+DEFAULT_MARKETS_PER_EVENT = 5
+# Concurrent list_market_catalogue calls while paging.
+CATALOGUE_FETCH_WORKERS = 6
+
+# How long resolved event-type and competition IDs are trusted before re-querying Betfair.
+REFERENCE_DATA_TTL_SECONDS = 24 * 60 * 60
+
+# Betfair sessions on the international exchange expire after 12 hours without a
+# keepAlive. Tokens are refreshed well before that and treated as dead at 8 hours.
+SESSION_TTL_SECONDS = 8 * 60 * 60
+SESSION_KEEP_ALIVE_SECONDS = 2 * 60 * 60
+# Minimum spacing between certificate logins from one instance (Betfair bans
+# accounts that exceed its login rate limit).
+LOGIN_MIN_INTERVAL_SECONDS = 5
+# Pooled HTTP connections per host; sized for the concurrent book/catalogue fetchers.
+HTTP_POOL_SIZE = 16
+
+# Request governor: (requests per second, burst) per API method, shared by every
+# client of an instance. Betfair throttles and can suspend app keys that flood it.
+GOVERNOR_METHOD_RATES = {
+    'listMarketBook': (40, 80),
+    'listMarketCatalogue': (20, 40),
+    'listEvents': (5, 10),
+    'listCompetitions': (5, 10),
+    'listEventTypes': (5, 10),
+    'placeOrders': (10, 20),
+    'listCurrentOrders': (10, 20),
+    'listClearedOrders': (10, 20),
+}
+GOVERNOR_DEFAULT_RATE = (10, 20)
+# Betfair's transaction limit: instructions sent through these methods per clock hour.
+TRANSACTION_METHODS = ('placeOrders', 'replaceOrders')
+TRANSACTIONS_PER_HOUR = 5000
+# Longest a call may wait for room in the hourly transaction budget; beyond it the
+# call fails with TransactionBudgetExhausted instead of sleeping into a later hour.
+TRANSACTION_MAX_WAIT_SECONDS = 60
+# Minimum spacing between syncs of the hourly ledger with the shared snapshot.
+TRANSACTION_SYNC_SECONDS = 10
+
+# Error classes for the resilience layer. Throttle errors are retried with a longer
+# backoff; retryable ones (plus timeouts, connection errors and HTTP 5xx) with the
+# normal one; anything else is fatal. TOO_MUCH_DATA stays fatal: the packers split it.
+THROTTLE_ERROR_CODES = ('TOO_MANY_REQUESTS', 'SERVICE_BUSY', 'EXCEEDED_THROTTLE')
+RETRYABLE_ERROR_CODES = ('TIMEOUT_ERROR', 'UNEXPECTED_ERROR')
+# Attempts per call and full-jitter exponential backoff bounds, in seconds.
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 0.2
+THROTTLE_BACKOFF_SECONDS = 1.0
+RETRY_BACKOFF_MAX_SECONDS = 5.0
+# An endpoint's circuit opens after this many consecutive retryable/throttle failures
+# and lets one trial call through after the reset time.
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30
+
+# Exchange Stream API market subscriptions. Betfair batches price changes into one
+# update per `conflateMs` window; 0 streams every change.
+STREAM_CONFLATE_MS = 500
+STREAM_HEARTBEAT_MS = 5000
+STREAM_LADDER_LEVELS = 3
+STREAM_MARKET_FIELDS = ['EX_BEST_OFFERS', 'EX_MARKET_DEF', 'EX_TRADED_VOL']
+# How long to wait for the order stream's initial image before falling back to polling.
+ORDER_STREAM_IMAGE_TIMEOUT_SECONDS = 10
+# Market books fetched over REST are reused for this long, so bursts of liquidity
+# lookups (e.g. one per agent tool call) share a single list_market_book call.
+BOOK_CACHE_TTL_SECONDS = 5
+# Priced markets fetched per event are reused for this long, so the analysis and
+# placement steps of one run do not fetch the same events again.
+EVENT_MARKETS_CACHE_TTL_SECONDS = 120
+
+# listClearedOrders: statuses that end an order, records per page (Betfair's
+# maximum), bet IDs per query and concurrent queries.
+CLEARED_ORDER_STATUSES = ['SETTLED', 'VOIDED', 'LAPSED', 'CANCELLED']
+CLEARED_ORDERS_PAGE_SIZE = 1000
+CLEARED_ORDERS_BET_ID_CHUNK = 250
+CLEARED_ORDERS_WORKERS = 8
+
+# listCurrentOrders: bet IDs per query (Betfair's maximum) and records per page.
+CURRENT_ORDERS_BET_ID_CHUNK = 250
+CURRENT_ORDERS_PAGE_SIZE = 1000
+
+# Markets whose place_orders calls are sent concurrently when a slip spans several markets.
+PLACE_ORDERS_WORKERS = 8
+
+# AsyncBetfairExchange: requests in flight at once over the shared HTTP/2 connection,
+# and connect/read timeouts matching betfairlightweight's defaults.
+ASYNC_MAX_IN_FLIGHT = 32
+ASYNC_CONNECT_TIMEOUT_SECONDS = 3.05
+ASYNC_READ_TIMEOUT_SECONDS = 16
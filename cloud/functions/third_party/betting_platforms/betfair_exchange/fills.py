@@ -0,0 +1,85 @@
+from array import array
+from typing import Dict, Iterable, Tuple
+
+
+SelectionKey = Tuple[str, int]
+
+
+class FillEstimate:
+    """Expected outcome of sending `stake` into a runner's ladder at its current depth."""
+
+    __slots__ = ("stake", "average_price", "matched", "unfilled")
+
+    def __init__(self, stake: float, average_price, matched: float, unfilled: float):
+        self.stake = stake
+        self.average_price = average_price
+        self.matched = matched
+        self.unfilled = unfilled
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "stake": self.stake,
+            "average_price": self.average_price,
+            "matched": self.matched,
+            "unfilled": self.unfilled,
+        }
+
+
+class LadderMatrix:
+    """
+    Every runner ladder of a set of market books, flattened into parallel arrays.
+
+    `prices` and `sizes` hold all levels back to back (best price first within a
+    runner) and `offsets[i]:offsets[i + 1]` is the slice of runner `keys[i]`, so a
+    fill across every runner of every market walks contiguous memory in one loop.
+    """
+
+    __slots__ = ("keys", "offsets", "prices", "sizes")
+
+    def __init__(self, books: Iterable, side: str = "BACK"):
+        self.keys = []
+        self.offsets = array("l", [0])
+        self.prices = array("d")
+        self.sizes = array("d")
+        for book in books:
+            for runner in book.runners:
+                ladder = runner.ex.available_to_back if side == "BACK" else runner.ex.available_to_lay
+                for level in ladder or ():
+                    self.prices.append(level.price)
+                    self.sizes.append(level.size)
+                self.keys.append((book.market_id, runner.selection_id))
+                self.offsets.append(len(self.prices))
+
+    def fill(self, stake: float) -> Dict[SelectionKey, FillEstimate]:
+        """Walk each ladder until `stake` is matched; average_price is None when nothing matches."""
+        prices, sizes, offsets = self.prices, self.sizes, self.offsets
+        estimates = {}
+        for i, key in enumerate(self.keys):
+            remaining = stake
+            notional = 0.0
+            for level in range(offsets[i], offsets[i + 1]):
+                if remaining <= 0:
+                    break
+                take = sizes[level] if sizes[level] < remaining else remaining
+                notional += take * prices[level]
+                remaining -= take
+            matched = stake - remaining
+            estimates[key] = FillEstimate(
+                stake,
+                round(notional / matched, 4) if matched > 0 else None,
+                round(matched, 2),
+                round(remaining, 2),
+            )
+        return estimates
+
+
+def estimate_fills(books: Iterable, stake: float, side: str = "BACK") -> Dict[SelectionKey, FillEstimate]:
+    """
+    Estimate the volume-weighted average matched price and unfilled remainder of `stake`
+    for every runner of every book, keyed by (market_id, selection_id).
+
+    BACK stakes match against available_to_back, LAY stakes against available_to_lay.
+    Books need full depth (EX_ALL_OFFERS) for a faithful estimate; with best offers only,
+    anything beyond the top three levels is reported as unfilled.
+    """
+    return LadderMatrix(books, side).fill(stake)
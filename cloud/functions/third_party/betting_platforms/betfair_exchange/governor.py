@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from .constants import (
+    GOVERNOR_DEFAULT_RATE, GOVERNOR_METHOD_RATES, TRANSACTION_MAX_WAIT_SECONDS, TRANSACTION_METHODS,
+    TRANSACTION_SYNC_SECONDS, TRANSACTIONS_PER_HOUR,
+)
+from .reference_data import SnapshotStore
+from core import logger
+
+
+HOUR_SECONDS = 3600
+
+
+class TransactionBudgetExhausted(Exception):
+    """Raised instead of waiting longer than the ledger's `max_wait` for transaction room."""
+
+    def __init__(self, count: int, retry_in: float):
+        super().__init__(
+            f"Betfair transaction budget exhausted: no room for {count} instructions "
+            f"for another {retry_in:.0f}s"
+        )
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second, holding at most `burst`.
+
+    `reserve` never refuses: it takes the tokens immediately (the level may go
+    negative) and returns how long the caller must wait before sending, so
+    concurrent callers queue up in arrival order instead of all retrying at once.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+
+class TransactionLedger:
+    """
+    Counts transactions (order instructions) per clock hour against `limit`.
+
+    A reservation that would overflow the current hour is booked into the first hour
+    with room, and the caller waits until that hour starts, unless that is more than
+    `max_wait` seconds away, in which case nothing is booked and
+    TransactionBudgetExhausted is raised. With a `store`, hourly counts are merged with
+    those other instances saved, at most every `sync_seconds` and outside the lock; the
+    store has no transactions, so concurrent instances can each book the last few slots.
+    """
+
+    def __init__(
+        self,
+        limit: int = TRANSACTIONS_PER_HOUR,
+        store: Optional[SnapshotStore] = None,
+        max_wait: float = TRANSACTION_MAX_WAIT_SECONDS,
+        sync_seconds: float = TRANSACTION_SYNC_SECONDS,
+    ):
+        self.limit = limit
+        self.store = store
+        self.max_wait = max_wait
+        self.sync_seconds = sync_seconds
+        self._hours: Dict[int, int] = {}
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def reserve(self, count: int) -> float:
+        count = min(count, self.limit)
+        sync = self._claim_sync()
+        snapshot = self._load_snapshot() if sync else None
+        with self._lock:
+            now = time.time()
+            hour = int(now // HOUR_SECONDS)
+            self._merge_snapshot(hour, snapshot)
+            while self._hours.get(hour, 0) + count > self.limit:
+                hour += 1
+            wait = max(0.0, hour * HOUR_SECONDS - now)
+            if wait > self.max_wait:
+                raise TransactionBudgetExhausted(count, wait)
+            self._hours[hour] = self._hours.get(hour, 0) + count
+            hours = dict(self._hours)
+        if sync:
+            self._save_snapshot(hours)
+        return wait
+
+    def used(self, at: Optional[float] = None) -> int:
+        """Transactions booked in the clock hour containing `at` (default now)."""
+        with self._lock:
+            return self._hours.get(int((at or time.time()) // HOUR_SECONDS), 0)
+
+    def _claim_sync(self) -> bool:
+        """True (and the sync clock restarted) when this call should sync with the store."""
+        if not self.store:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self._synced_at is not None and now - self._synced_at < self.sync_seconds:
+                return False
+            self._synced_at = now
+            return True
+
+    def _load_snapshot(self) -> Optional[dict]:
+        try:
+            return self.store.load() or {}
+        except Exception as e:
+            logger.warning(f"Could not load shared transaction ledger: {e}")
+            return None
+
+    def _merge_snapshot(self, current_hour: int, snapshot: Optional[dict]) -> None:
+        self._hours = {hour: used for hour, used in self._hours.items() if hour >= current_hour}
+        for hour, used in ((snapshot or {}).get("hours") or {}).items():
+            if int(hour) >= current_hour:
+                self._hours[int(hour)] = max(self._hours.get(int(hour), 0), used)
+
+    def _save_snapshot(self, hours: Dict[int, int]) -> None:
+        try:
+            self.store.save({"hours": {str(hour): used for hour, used in hours.items()}})
+        except Exception as e:
+            logger.warning(f"Could not persist shared transaction ledger: {e}")
+
+
+class RequestGovernor:
+    """
+    Keeps Betfair API traffic inside its request-rate and transaction limits.
+
+    Every JSON-RPC call takes a token from its method's bucket (`method_rates`, else
+    `default_rate`), and calls to TRANSACTION_METHODS also book one transaction per
+    instruction in the hourly ledger. Callers are slowed down rather than refused:
+    `reserve` returns the seconds to wait (for asyncio callers) and `acquire` sleeps
+    them. Only an exhausted transaction budget fails a call (TransactionBudgetExhausted).
+    One governor is meant to be shared by every client in the process.
+    """
+
+    def __init__(
+        self,
+        method_rates: Optional[Dict[str, Tuple[float, float]]] = None,
+        default_rate: Tuple[float, float] = GOVERNOR_DEFAULT_RATE,
+        ledger: Optional[TransactionLedger] = None,
+    ):
+        self.method_rates = GOVERNOR_METHOD_RATES if method_rates is None else method_rates
+        self.default_rate = default_rate
+        self.ledger = ledger or TransactionLedger()
+        # Calls that had to wait, and the seconds they waited, per method.
+        self.throttled: Counter = Counter()
+        self.waited_seconds: Counter = Counter()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, method: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(method)
+            if bucket is None:
+                bucket = self._buckets[method] = TokenBucket(*self.method_rates.get(method, self.default_rate))
+            return bucket
+
+    def reserve(self, method: str, instructions: int = 0) -> float:
+        """Book one `method` call (with `instructions` orders) and return the seconds to wait before sending it."""
+        wait = self._bucket(method).reserve()
+        if method in TRANSACTION_METHODS and instructions:
+            wait = max(wait, self.ledger.reserve(instructions))
+        if wait > 0:
+            with self._lock:
+                self.throttled[method] += 1
+                self.waited_seconds[method] += wait
+        return wait
+
+    def acquire(self, method: str, instructions: int = 0) -> None:
+        """Block until a `method` call may be sent."""
+        wait = self.reserve(method, instructions)
+        if wait > 0:
+            if wait >= 1:
+                logger.info(f"Throttling Betfair {method} for {wait:.1f}s")
+            time.sleep(wait)
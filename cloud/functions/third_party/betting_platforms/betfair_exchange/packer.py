@@ -0,0 +1,95 @@
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional
+
+from .constants import (
+    MARKET_PROJECTION_WEIGHTS, MAX_REQUEST_WEIGHT, NO_PRICE_PROJECTION_WEIGHT, PRICE_PROJECTION_COMBINED_WEIGHTS,
+    PRICE_PROJECTION_WEIGHTS,
+)
+from core import logger
+
+
+def catalogue_weight(market_projection: Iterable[str]) -> int:
+    """Data weight of one market in a list_market_catalogue response with `market_projection`."""
+    return sum(MARKET_PROJECTION_WEIGHTS.get(p, 0) for p in market_projection)
+
+
+def book_weight(price_data: Optional[Iterable[str]] = None, best_prices_depth: Optional[int] = None) -> int:
+    """
+    Data weight of one market in a list_market_book response with the given price projection.
+
+    Follows Betfair's published table, including the combined EX_BEST_OFFERS/EX_ALL_OFFERS
+    + EX_TRADED weights; EX_BEST_OFFERS deeper than the default 3 levels scales linearly.
+    """
+    price_data = set(price_data or [])
+    if not price_data:
+        return NO_PRICE_PROJECTION_WEIGHT
+
+    deep_best_offers = "EX_BEST_OFFERS" in price_data and best_prices_depth and best_prices_depth > 3
+    weight = 0
+    for combination, combined_weight in PRICE_PROJECTION_COMBINED_WEIGHTS:
+        if combination <= price_data:
+            weight += combined_weight
+            price_data -= combination
+            break
+    weight += sum(PRICE_PROJECTION_WEIGHTS.get(p, 0) for p in price_data)
+
+    if deep_best_offers:
+        weight += PRICE_PROJECTION_WEIGHTS["EX_BEST_OFFERS"] * (best_prices_depth - 3) // 3
+    return max(weight, 1)
+
+
+def is_too_much_data(error: BaseException) -> bool:
+    return "TOO_MUCH_DATA" in str(error)
+
+
+class RequestPacker:
+    """
+    Packs IDs into requests that fill Betfair's per-request data-weight limit.
+
+    Capacity is the number of markets one request may return: `max_weight` points divided
+    by the weight of one market (capped at `max_markets`). `pack` groups IDs greedily by
+    their market counts, so small competitions or events share a call while a large one
+    gets a call of its own. A TOO_MUCH_DATA error shrinks the capacity to half the rejected
+    request for the rest of the packer's life; weights rarely drift, so it never grows back.
+    """
+
+    def __init__(self, market_weight: int, max_weight: int = MAX_REQUEST_WEIGHT, max_markets: Optional[int] = None):
+        self.market_weight = max(1, market_weight)
+        self.max_weight = max_weight
+        capacity = max_weight // self.market_weight
+        self._capacity = max(1, min(capacity, max_markets) if max_markets else capacity)
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def pack(self, ids: List[Hashable], market_counts: Optional[Dict[Hashable, Optional[int]]] = None, default_count: int = 1) -> List[List[Hashable]]:
+        """Split `ids`, in order, into groups whose summed market counts fit one request (unknown counts use `default_count`)."""
+        market_counts = market_counts or {}
+        capacity = self.capacity
+        groups: List[List[Hashable]] = []
+        group: List[Hashable] = []
+        group_markets = 0
+        for item in ids:
+            count = market_counts.get(item)
+            if count is None:
+                count = default_count
+            if group and group_markets + count > capacity:
+                groups.append(group)
+                group, group_markets = [], 0
+            group.append(item)
+            group_markets += count
+        if group:
+            groups.append(group)
+        return groups
+
+    def record_too_much_data(self, requested_markets: int) -> int:
+        """
+        Shrink the capacity below a request of `requested_markets` that Betfair rejected as
+        TOO_MUCH_DATA; returns the new capacity.
+        """
+        with self._lock:
+            self._capacity = max(1, min(self._capacity, requested_markets // 2))
+            logger.warning(f"Betfair returned TOO_MUCH_DATA; packing at most {self._capacity} markets per request")
+            return self._capacity
@@ -0,0 +1,135 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Protocol
+
+import betfairlightweight
+
+from .constants import REFERENCE_DATA_TTL_SECONDS
+from core import logger
+
+
+class SnapshotStore(Protocol):
+    """Persistence hook for state shared across instances (e.g. a Firestore document)."""
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        ...
+
+    def save(self, data: Dict[str, Any]) -> None:
+        ...
+
+
+class ReferenceDataCache:
+    """
+    Caches sport → event-type ID and competition name → competition ID resolutions.
+
+    Event types and competitions barely change week to week, yet every search_market
+    call used to resolve them with one list_event_types call plus one list_competitions
+    call per competition. Entries live for `ttl_seconds`; when a `store` is supplied the
+    resolved entries are also persisted so new instances can warm up without calling
+    Betfair. Failed lookups are never cached.
+    """
+
+    def __init__(self, ttl_seconds: float = REFERENCE_DATA_TTL_SECONDS, store: Optional[SnapshotStore] = None):
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._lock = threading.Lock()
+        self._event_types: Dict[str, Dict[str, Any]] = {}
+        self._competitions: Dict[str, Dict[str, Any]] = {}
+        self._warmed_up = False
+
+    def warm_up(self) -> None:
+        """Load the persisted snapshot, if any, so the first lookups skip Betfair. Later calls do nothing."""
+        if not self.store or self._warmed_up:
+            return
+        self._warmed_up = True
+        try:
+            snapshot = self.store.load() or {}
+        except Exception as e:
+            logger.warning(f"Could not load Betfair reference data snapshot: {e}")
+            return
+
+        with self._lock:
+            self._event_types.update(snapshot.get("event_types") or {})
+            self._competitions.update(snapshot.get("competitions") or {})
+        logger.info(
+            f"Reference data warmed up: {len(self._event_types)} event types, "
+            f"{len(self._competitions)} competitions"
+        )
+
+    def resolve_event_type_id(self, betting, sport: Optional[str]) -> Optional[str]:
+        """Return the event-type ID for `sport`, calling list_event_types on a cache miss."""
+        key = (sport or "").lower()
+        entry = self._get_fresh(self._event_types, key)
+        if entry:
+            return entry["id"]
+
+        event_types = betting.list_event_types(
+            filter=betfairlightweight.filters.market_filter(text_query=sport)
+        )
+        if not event_types:
+            return None
+
+        event_type_id = event_types[0].event_type.id
+        self._put(self._event_types, key, {"id": event_type_id})
+        return event_type_id
+
+    def resolve_competition_ids(self, betting, event_type_id: str, comp_name: str) -> List[str]:
+        """
+        Return the competition IDs for `comp_name`, calling list_competitions on a cache miss.
+
+        Exact (case-insensitive) name matches win; otherwise every partial match returned
+        by Betfair's text search is used.
+        """
+        key = f"{event_type_id}|{comp_name.lower()}"
+        entry = self._get_fresh(self._competitions, key)
+        if entry:
+            return list(entry["ids"])
+
+        comps = betting.list_competitions(
+            filter=betfairlightweight.filters.market_filter(
+                text_query=comp_name,
+                event_type_ids=[event_type_id]
+            )
+        )
+        if not comps:
+            logger.warning(f"Competition '{comp_name}' not found.")
+            return []
+
+        # First try to find exact match (case-insensitive)
+        exact_matches = [c for c in comps if c.competition.name.lower() == comp_name.lower()]
+
+        if exact_matches:
+            ids = [c.competition.id for c in exact_matches]
+            logger.info(f"Found exact match for '{comp_name}': {exact_matches[0].competition.name} (IDs: {ids})")
+        else:
+            # Fall back to all matches (log them for user awareness)
+            ids = [c.competition.id for c in comps]
+            comp_names = [c.competition.name for c in comps]
+            logger.warning(f"No exact match for '{comp_name}'. Using partial matches: {comp_names}")
+
+        self._put(self._competitions, key, {"ids": ids})
+        return ids
+
+    def _get_fresh(self, entries: Dict[str, Dict[str, Any]], key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = entries.get(key)
+        if entry and time.time() - entry.get("fetched_at", 0) < self.ttl_seconds:
+            return entry
+        return None
+
+    def _put(self, entries: Dict[str, Dict[str, Any]], key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            entries[key] = {**value, "fetched_at": time.time()}
+            snapshot = {
+                "event_types": dict(self._event_types),
+                "competitions": dict(self._competitions),
+            }
+        self._save_snapshot(snapshot)
+
+    def _save_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        if not self.store:
+            return
+        try:
+            self.store.save(snapshot)
+        except Exception as e:
+            logger.warning(f"Could not persist Betfair reference data snapshot: {e}")
@@ -0,0 +1,216 @@
+import asyncio
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Awaitable, Callable, Dict
+
+import httpx
+import requests
+from betfairlightweight.exceptions import APIError, InvalidResponse, StatusCodeError
+
+from .constants import (
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, RETRY_ATTEMPTS, RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_SECONDS,
+    RETRYABLE_ERROR_CODES, THROTTLE_ERROR_CODES, THROTTLE_BACKOFF_SECONDS,
+)
+from .governor import TransactionBudgetExhausted
+from core import logger
+
+
+RETRYABLE = "retryable"
+THROTTLE = "throttle"
+FATAL = "fatal"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Circuit open for Betfair {endpoint}; retry in {retry_in:.0f}s")
+        self.endpoint = endpoint
+
+
+def classify_error(error: BaseException) -> str:
+    """Sort an exchange error into RETRYABLE, THROTTLE or FATAL."""
+    if isinstance(error, (CircuitOpenError, TransactionBudgetExhausted)):
+        return FATAL
+    if isinstance(error, APIError) and isinstance(error.exception, TransactionBudgetExhausted):
+        # Raised by the governed HTTP session before the request was sent.
+        return FATAL
+    if isinstance(error, StatusCodeError):
+        status = int(error.status_code) if str(error.status_code).isdigit() else 0
+        return THROTTLE if status == 429 else RETRYABLE if status >= 500 else FATAL
+    message = str(error)
+    if any(code in message for code in THROTTLE_ERROR_CODES):
+        return THROTTLE
+    if any(code in message for code in RETRYABLE_ERROR_CODES):
+        return RETRYABLE
+    if isinstance(error, APIError) and error.response is None and error.exception is not None:
+        # Raised before Betfair answered: connection errors and timeouts.
+        return RETRYABLE
+    if isinstance(error, (InvalidResponse, requests.ConnectionError, requests.Timeout, httpx.TransportError, TimeoutError)):
+        return RETRYABLE
+    return FATAL
+
+
+class CircuitBreaker:
+    """
+    Fails fast once an endpoint has failed `failure_threshold` times in a row.
+
+    While open, calls are refused for `reset_after` seconds; then one trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_after: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def before_call(self, endpoint: str) -> None:
+        with self._lock:
+            if self.opened_at is None:
+                return
+            waited = time.monotonic() - self.opened_at
+            if waited < self.reset_after or self._trial_in_flight:
+                raise CircuitOpenError(endpoint, max(0.0, self.reset_after - waited))
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self, endpoint: str) -> None:
+        with self._lock:
+            self.failures += 1
+            reopen = self._trial_in_flight
+            self._trial_in_flight = False
+            if reopen or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                logger.warning(f"Circuit opened for Betfair {endpoint} after {self.failures} consecutive failures")
+
+
+class Resilience:
+    """
+    Runs exchange calls with error-classified retries and a circuit breaker per endpoint.
+
+    Retryable and throttle errors are retried up to `attempts` times with full-jitter
+    exponential backoff (throttle errors start from a longer base) and count towards
+    the endpoint's breaker; fatal errors are raised at once and leave the breaker
+    alone. Calls that are not idempotent (order placement) are only retried on
+    throttle errors, which Betfair returns before acting on the request. Calls, errors
+    per class, retries, fast failures and latency are counted per endpoint (`stats`).
+    Share one instance per process so breakers see every caller.
+    """
+
+    def __init__(self, attempts: int = RETRY_ATTEMPTS, backoff: float = RETRY_BACKOFF_SECONDS, throttle_backoff: float = THROTTLE_BACKOFF_SECONDS, max_backoff: float = RETRY_BACKOFF_MAX_SECONDS, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_after: float = CIRCUIT_RESET_SECONDS):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.throttle_backoff = throttle_backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._counters: Dict[str, Counter] = defaultdict(Counter)
+        self._latency_max_ms: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_after)
+            return self._breakers[endpoint]
+
+    def call(self, endpoint: str, fn: Callable[[], Any], attempts: int = None, idempotent: bool = True) -> Any:
+        """Call `fn()` for `endpoint` under the retry and breaker policy."""
+        attempts = attempts or self.attempts
+        for attempt in range(1, attempts + 1):
+            self._before_call(endpoint)
+            started = time.perf_counter()
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self._after_failure(endpoint, e, attempt, attempts, idempotent, started)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+            else:
+                self._after_success(endpoint, started)
+                return result
+
+    async def acall(self, endpoint: str, fn: Callable[[], Awaitable[Any]], attempts: int = None, idempotent: bool = True) -> Any:
+        """Async `call`: awaits `fn()` and sleeps between attempts without blocking the loop."""
+        attempts = attempts or self.attempts
+        for attempt in range(1, attempts + 1):
+            self._before_call(endpoint)
+            started = time.perf_counter()
+            try:
+                result = await fn()
+            except Exception as e:
+                delay = self._after_failure(endpoint, e, attempt, attempts, idempotent, started)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            else:
+                self._after_success(endpoint, started)
+                return result
+
+    def _before_call(self, endpoint: str) -> None:
+        try:
+            self.breaker(endpoint).before_call(endpoint)
+        except CircuitOpenError:
+            self._count(endpoint, "short_circuited")
+            raise
+        self._count(endpoint, "calls")
+
+    def _after_success(self, endpoint: str, started: float) -> None:
+        self._record_latency(endpoint, started)
+        self.breaker(endpoint).record_success()
+
+    def _after_failure(self, endpoint: str, error: Exception, attempt: int, attempts: int, idempotent: bool, started: float):
+        """Count the failure and return the backoff before the next attempt, or None to raise."""
+        self._record_latency(endpoint, started)
+        error_class = classify_error(error)
+        self._count(endpoint, f"errors_{error_class}")
+        if error_class == FATAL:
+            return None
+        self.breaker(endpoint).record_failure(endpoint)
+        if attempt >= attempts or (not idempotent and error_class != THROTTLE):
+            return None
+        base = self.throttle_backoff if error_class == THROTTLE else self.backoff
+        delay = random.uniform(0, min(self.max_backoff, base * 2 ** (attempt - 1)))
+        self._count(endpoint, "retries")
+        logger.warning(f"Betfair {endpoint} {error_class} error (attempt {attempt}/{attempts}); retrying in {delay:.2f}s")
+        return delay
+
+    def _count(self, endpoint: str, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self._counters[endpoint][key] += amount
+
+    def _record_latency(self, endpoint: str, started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._counters[endpoint]["latency_ms_total"] += elapsed_ms
+            self._latency_max_ms[endpoint] = max(self._latency_max_ms[endpoint], elapsed_ms)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint counters: calls, errors_<class>, retries, short_circuited, latency and circuit state."""
+        with self._lock:
+            endpoints = {endpoint: dict(counter) for endpoint, counter in self._counters.items()}
+            latency_max = dict(self._latency_max_ms)
+        for endpoint, counters in endpoints.items():
+            total = counters.pop("latency_ms_total", 0.0)
+            counters["latency_ms_avg"] = round(total / counters["calls"], 1) if counters.get("calls") else None
+            counters["latency_ms_max"] = round(latency_max.get(endpoint, 0.0), 1)
+            counters["circuit"] = self.breaker(endpoint).state
+        return endpoints
@@ -0,0 +1,199 @@
+import json
+import threading
+import time
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .constants import (
+    HTTP_POOL_SIZE, LOGIN_MIN_INTERVAL_SECONDS, SESSION_KEEP_ALIVE_SECONDS, SESSION_TTL_SECONDS,
+)
+from .governor import RequestGovernor
+from .reference_data import SnapshotStore
+from core import logger
+
+
+# Error codes Betfair returns when the X-Authentication token is missing or dead.
+INVALID_SESSION_ERRORS = (b"INVALID_SESSION_INFORMATION", b"NO_SESSION")
+
+
+class SessionBroker:
+    """
+    Hands out one Betfair session token to every client in the process.
+
+    A certificate login is slow and rate limited, so instead of logging in per client
+    the broker reuses the current token, refreshes it with keepAlive once it is older
+    than `keep_alive_after` seconds, and only logs in when there is no usable token.
+    With a `store`, tokens are persisted so newly started instances can reuse a session
+    opened elsewhere. Logins are spaced at least `min_login_interval` seconds apart;
+    callers wait rather than fail when they hit that throttle.
+    """
+
+    def __init__(
+        self,
+        store: Optional[SnapshotStore] = None,
+        session_ttl: float = SESSION_TTL_SECONDS,
+        keep_alive_after: float = SESSION_KEEP_ALIVE_SECONDS,
+        min_login_interval: float = LOGIN_MIN_INTERVAL_SECONDS,
+    ):
+        self.store = store
+        self.session_ttl = session_ttl
+        self.keep_alive_after = keep_alive_after
+        self.min_login_interval = min_login_interval
+        self._lock = threading.RLock()
+        self._token: Optional[str] = None
+        self._refreshed_at = 0.0
+        self._last_login_at = 0.0
+
+    def attach(self, api_client) -> None:
+        """Give `api_client` a live session token, logging in only when none can be reused."""
+        with self._lock:
+            if self._token is None:
+                self._load_snapshot()
+
+            age = time.time() - self._refreshed_at
+            if self._token and age < self.session_ttl:
+                self._apply(api_client)
+                if age >= self.keep_alive_after:
+                    self._keep_alive(api_client)
+            else:
+                self._login(api_client)
+
+    def renew(self, api_client, stale_token: Optional[str]) -> None:
+        """
+        Replace a token Betfair rejected as INVALID_SESSION.
+
+        If another thread already renewed it, the newer token is reused instead of
+        logging in a second time.
+        """
+        with self._lock:
+            if self._token and self._token != stale_token:
+                self._apply(api_client)
+                return
+            logger.warning("Betfair session rejected as invalid; logging in again")
+            self._token = None
+            self._login(api_client)
+
+    def _apply(self, api_client) -> None:
+        api_client.session_token = self._token
+        api_client._login_time = self._refreshed_at
+
+    def _keep_alive(self, api_client) -> None:
+        try:
+            api_client.keep_alive()
+        except Exception as e:
+            logger.warning(f"Betfair keepAlive failed ({e}); logging in again")
+            self._login(api_client)
+            return
+        self._record(api_client.session_token)
+        logger.info("Betfair session refreshed with keepAlive")
+
+    def _login(self, api_client) -> None:
+        wait = self._last_login_at + self.min_login_interval - time.time()
+        if wait > 0:
+            logger.info(f"Throttling Betfair login for {wait:.1f}s")
+            time.sleep(wait)
+
+        self._last_login_at = time.time()
+        api_client.login()
+        self._record(api_client.session_token)
+        logger.info("Betfair session opened with certificate login")
+
+    def _record(self, token: Optional[str]) -> None:
+        self._token = token
+        self._refreshed_at = time.time()
+        if not self.store:
+            return
+        try:
+            self.store.save({
+                "session_token": self._token,
+                "refreshed_at": self._refreshed_at,
+                "last_login_at": self._last_login_at,
+            })
+        except Exception as e:
+            logger.warning(f"Could not persist Betfair session: {e}")
+
+    def _load_snapshot(self) -> None:
+        if not self.store:
+            return
+        try:
+            snapshot = self.store.load() or {}
+        except Exception as e:
+            logger.warning(f"Could not load persisted Betfair session: {e}")
+            return
+        self._token = snapshot.get("session_token")
+        self._refreshed_at = snapshot.get("refreshed_at", 0.0)
+        self._last_login_at = max(self._last_login_at, snapshot.get("last_login_at", 0.0))
+
+
+def json_rpc_call(data) -> Tuple[Optional[str], int]:
+    """The short method name and instruction count of a JSON-RPC request body, or (None, 0)."""
+    try:
+        request = json.loads(data)
+    except (TypeError, ValueError):
+        return None, 0
+    if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+        return None, 0
+    instructions = (request.get("params") or {}).get("instructions") or ()
+    return request["method"].rsplit("/", 1)[-1], len(instructions)
+
+
+class GovernedHTTPSession(requests.Session):
+    """
+    Pooled HTTP session that passes every Betfair JSON-RPC call through a RequestGovernor.
+
+    betfairlightweight posts each API call as a JSON-RPC body, so the method and its
+    instruction count are read from the body and the post waits for the governor's
+    go-ahead; identity calls (login, keepAlive) are not governed. Keeping connections
+    pooled also saves a TLS handshake on every API call.
+    """
+
+    def __init__(self, governor: Optional[RequestGovernor] = None, pool_size: int = HTTP_POOL_SIZE):
+        super().__init__()
+        self.governor = governor
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        if self.governor and data:
+            method, instructions = json_rpc_call(data)
+            if method:
+                self.governor.acquire(method, instructions)
+        return super().post(url, data=data, json=json, **kwargs)
+
+
+class BrokeredHTTPSession(GovernedHTTPSession):
+    """
+    Governed, pooled HTTP session that transparently renews the Betfair session token.
+
+    betfairlightweight builds request headers before posting, so when Betfair answers
+    with INVALID_SESSION the request is retried once with the token from the broker.
+    """
+
+    def __init__(self, broker: SessionBroker, pool_size: int = HTTP_POOL_SIZE, governor: Optional[RequestGovernor] = None):
+        super().__init__(governor, pool_size)
+        self.broker = broker
+        self.api_client = None
+
+    def post(self, url, data=None, json=None, **kwargs):
+        response = super().post(url, data=data, json=json, **kwargs)
+        headers = kwargs.get("headers") or {}
+        stale_token = headers.get("X-Authentication")
+        if (
+            self.api_client is None
+            or not stale_token
+            or not url.startswith(self.api_client.api_uri)
+            or not self._is_invalid_session(response)
+        ):
+            return response
+
+        self.broker.renew(self.api_client, stale_token)
+        kwargs["headers"] = {**headers, "X-Authentication": self.api_client.session_token}
+        return super().post(url, data=data, json=json, **kwargs)
+
+    @staticmethod
+    def _is_invalid_session(response) -> bool:
+        content = response.content or b""
+        return any(code in content for code in INVALID_SESSION_ERRORS)
@@ -0,0 +1,676 @@
+import itertools
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from .constants import MAX_REQUEST_WEIGHT
+from .packer import book_weight, catalogue_weight
+from core import logger
+
+
+RUNNER_NAMES = {"MATCH_ODDS": ["Home", "Draw", "Away"], "DOUBLE_CHANCE": ["Home or Draw", "Draw or Away", "Home or Away"]}
+DEFAULT_RUNNER_NAMES = ["Yes", "No"]
+BETFAIR_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.000Z"
+
+
+def seed_markets(
+    count: int,
+    seed: int = 0,
+    competitions: int = 20,
+    market_types: Tuple[str, ...] = ("MATCH_ODDS",),
+    start: Optional[datetime] = None,
+    days: int = 3,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Generate `count` synthetic soccer markets, deterministic for a given `seed`.
+
+    Each event carries one market per entry in `market_types`, events are spread
+    round-robin over `competitions` and kick off on the hour across `days` days from
+    `start`. Runners get three levels a side around a random fair price.
+    """
+    rng = random.Random(seed)
+    start = (start or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+    markets: Dict[str, Dict[str, Any]] = {}
+    for index in range(count):
+        event_index, type_index = divmod(index, len(market_types))
+        market_type = market_types[type_index]
+        competition_index = event_index % competitions
+        kickoff = start + timedelta(hours=(event_index * 7) % (days * 24) + 1)
+        runners = {}
+        for r, name in enumerate(RUNNER_NAMES.get(market_type, DEFAULT_RUNNER_NAMES)):
+            best_back = round(rng.uniform(1.3, 8.0), 2)
+            runners[10000 + r] = {
+                "name": name,
+                "back": [(round(best_back - 0.02 * level, 2), round(rng.uniform(5, 800), 2)) for level in range(3)],
+                "lay": [(round(best_back + 0.02 * (level + 1), 2), round(rng.uniform(5, 800), 2)) for level in range(3)],
+            }
+        markets[f"1.{100000000 + index}"] = {
+            "event_id": str(30000000 + event_index),
+            "event_name": f"Team {2 * event_index} v Team {2 * event_index + 1}",
+            "competition_id": str(1000 + competition_index),
+            "competition_name": f"Sim League {competition_index}",
+            "market_type": market_type,
+            "start_time": kickoff.strftime(BETFAIR_TIME_FORMAT),
+            "total_matched": round(rng.uniform(0, 50000), 2),
+            "runners": runners,
+        }
+    return markets
+
+
+class LocalExchangeSimulator:
+    """
+    HTTP stand-in for the Betfair identity, Betting and Accounts APIs, for offline
+    end-to-end runs and load tests of BetfairExchange.
+
+    `attach(api_client)` points a betfairlightweight APIClient at the server, after which
+    login/keepAlive, list_event_types, list_competitions, list_events,
+    list_market_catalogue, list_market_book, place_orders, list_current_orders,
+    cancel_orders, replace_orders, list_cleared_orders and get_account_funds behave
+    like the real endpoints against the seeded `markets`
+    (see `seed_markets`, fixed once the simulator is built), including Betfair's
+    JSON-RPC error shape:
+
+    - Requests without a live session token fail with INVALID_SESSION_INFORMATION;
+      `expire_sessions()` invalidates every issued token.
+    - Catalogue and book requests over `max_weight` data-weight points fail with
+      TOO_MUCH_DATA, using the same weight table as the client's RequestPacker.
+    - Each call sleeps `latency` seconds plus up to `jitter`, fails with a random code
+      from `error_codes` with probability `error_rate`, and `inject_error` queues
+      failures for a specific method.
+    - place_orders matches limit orders against the ladders (consuming liquidity) and
+      keeps the unmatched remainder live; cancel_orders and replace_orders act on it,
+      `lapse_orders` lapses it as the exchange would at a suspension, and
+      `settle_market` turns a market's orders into cleared orders with P/L.
+
+    `calls` counts requests per method so tests and benchmarks can check call volume.
+    """
+
+    def __init__(
+        self,
+        markets: Optional[Dict[str, Dict[str, Any]]] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_codes: Tuple[str, ...] = ("TOO_MANY_REQUESTS",),
+        max_weight: int = MAX_REQUEST_WEIGHT,
+        balance: float = 1000.0,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.markets = markets if markets is not None else seed_markets(100, seed=seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_codes = error_codes
+        self.max_weight = max_weight
+        self.balance = balance
+        self.exposure = 0.0
+        self.calls: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sessions = set()
+        self._injected: Dict[str, List[str]] = defaultdict(list)
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._cleared: List[Dict[str, Any]] = []
+        self._bet_ids = itertools.count(300000000000)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._certs_dir: Optional[tempfile.TemporaryDirectory] = None
+        # Markets by event and competition, so filtered lookups stay cheap at 10k+ markets.
+        self._by_event: Dict[str, List[str]] = defaultdict(list)
+        self._by_competition: Dict[str, List[str]] = defaultdict(list)
+        for market_id, market in self.markets.items():
+            self._by_event[market["event_id"]].append(market_id)
+            self._by_competition[market["competition_id"]].append(market_id)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalExchangeSimulator":
+        threading.Thread(target=self._server.serve_forever, name="local-exchange-simulator", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._certs_dir:
+            self._certs_dir.cleanup()
+
+    def attach(self, api_client) -> None:
+        """Point a betfairlightweight APIClient at this server (login included)."""
+        api_client.identity_uri = f"{self.url}/api/"
+        api_client.identity_cert_uri = f"{self.url}/api/"
+        api_client.api_uri = f"{self.url}/exchange/"
+        if self._certs_dir is None:
+            # The login request insists on certificate files; the simulator never reads them.
+            self._certs_dir = tempfile.TemporaryDirectory()
+            for name in ("simulator.crt", "simulator.key"):
+                open(os.path.join(self._certs_dir.name, name), "w").close()
+        api_client.cert_files = (
+            os.path.join(self._certs_dir.name, "simulator.crt"),
+            os.path.join(self._certs_dir.name, "simulator.key"),
+        )
+
+    def inject_error(self, method: str, error_code: str, times: int = 1) -> None:
+        """Fail the next `times` calls of `method` (e.g. 'listMarketBook') with `error_code`."""
+        with self._lock:
+            self._injected[method].extend([error_code] * times)
+
+    def expire_sessions(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+    def settle_market(self, market_id: str, winner: int) -> None:
+        """Settle every order on `market_id`: matched stakes win or lose, unmatched ones lapse."""
+        settled_date = datetime.now(timezone.utc).strftime(BETFAIR_TIME_FORMAT)
+        with self._lock:
+            for bet_id in [b for b, o in self._orders.items() if o["marketId"] == market_id]:
+                order = self._orders.pop(bet_id)
+                matched = order["sizeMatched"]
+                if order["side"] == "BACK":
+                    self.exposure += matched + self._remaining(order)
+                    # The unmatched part of a BACK stake lapses and is returned.
+                    self.balance += self._remaining(order)
+                if matched > 0:
+                    won = (order["selectionId"] == winner) == (order["side"] == "BACK")
+                    if order["side"] == "BACK":
+                        profit = matched * (order["averagePriceMatched"] - 1) if won else -matched
+                    else:
+                        profit = matched if won else -matched * (order["averagePriceMatched"] - 1)
+                    status, outcome = "SETTLED", "WON" if won else "LOST"
+                    self.balance += matched + profit if order["side"] == "BACK" else profit
+                else:
+                    status, outcome, profit = "LAPSED", "LOST", 0.0
+                self._cleared.append({
+                    "betStatus": status,
+                    "betId": bet_id,
+                    "marketId": market_id,
+                    "selectionId": order["selectionId"],
+                    "handicap": 0.0,
+                    "side": order["side"],
+                    "betOutcome": outcome,
+                    "priceRequested": order["priceRequested"],
+                    "priceMatched": order["averagePriceMatched"],
+                    "sizeSettled": matched,
+                    "profit": round(profit, 2),
+                    "settledDate": settled_date,
+                    "placedDate": order["placedDate"],
+                    "orderType": "LIMIT",
+                    "persistenceType": "LAPSE",
+                    "betCount": 1,
+                })
+
+    def lapse_orders(self, market_id: str) -> None:
+        """Lapse the unmatched part of every order on `market_id`, as a market suspension would."""
+        with self._lock:
+            for order in self._orders.values():
+                if order["marketId"] == market_id and self._remaining(order) > 0:
+                    self._release(order, "sizeLapsed", self._remaining(order))
+
+    # Request handling
+
+    def _handler_class(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status, payload = simulator._dispatch(self.path, self.headers, body)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _dispatch(self, path: str, headers, body: bytes) -> Tuple[int, Any]:
+        if path.startswith("/api/"):
+            return 200, self._identity(path[len("/api/"):], headers, body)
+
+        request = json.loads(body or b"{}")
+        method = request.get("method", "").split("/")[-1]
+        params = request.get("params") or {}
+        with self._lock:
+            self.calls[method] += 1
+        self._delay()
+
+        if headers.get("X-Authentication") not in self._sessions:
+            return 200, self._error(request, "INVALID_SESSION_INFORMATION")
+        injected = self._next_injected_error(method)
+        if injected:
+            return 200, self._error(request, injected)
+
+        handler = getattr(self, f"_{method}", None)
+        if handler is None:
+            return 200, self._error(request, "INVALID_INPUT_DATA", f"{method} is not simulated")
+        try:
+            return 200, {"jsonrpc": "2.0", "result": handler(params), "id": request.get("id")}
+        except SimulatedAPIError as e:
+            return 200, self._error(request, e.error_code, str(e))
+
+    def _identity(self, operation: str, headers, body: bytes) -> Dict[str, Any]:
+        with self._lock:
+            self.calls[operation] += 1
+        self._delay()
+        if operation == "certlogin":
+            form = parse_qs(body.decode("utf-8"))
+            if not form.get("username") or not form.get("password"):
+                return {"loginStatus": "INVALID_USERNAME_OR_PASSWORD"}
+            token = uuid.uuid4().hex
+            with self._lock:
+                self._sessions.add(token)
+            return {"sessionToken": token, "loginStatus": "SUCCESS"}
+
+        token = headers.get("X-Authentication")
+        with self._lock:
+            live = token in self._sessions
+            if operation == "logout":
+                self._sessions.discard(token)
+        if not live:
+            return {"token": "", "product": headers.get("X-Application"), "status": "FAIL", "error": "NO_SESSION"}
+        return {"token": token, "product": headers.get("X-Application"), "status": "SUCCESS", "error": ""}
+
+    def _delay(self) -> None:
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _next_injected_error(self, method: str) -> Optional[str]:
+        with self._lock:
+            if self._injected[method]:
+                return self._injected[method].pop(0)
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return self._rng.choice(self.error_codes)
+        return None
+
+    @staticmethod
+    def _error(request: Dict[str, Any], error_code: str, details: str = "") -> Dict[str, Any]:
+        return {
+            "jsonrpc": "2.0",
+            "error": {
+                "code": -32099,
+                "message": "ANGX-0001",
+                "data": {
+                    "APINGException": {"requestUUID": str(uuid.uuid4()), "errorCode": error_code, "errorDetails": details},
+                    "exceptionname": "APINGException",
+                },
+            },
+            "id": request.get("id"),
+        }
+
+    # Betting API
+
+    def _matching_markets(self, market_filter: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        event_type_ids = market_filter.get("eventTypeIds")
+        competition_ids = set(market_filter.get("competitionIds") or [])
+        event_ids = set(market_filter.get("eventIds") or [])
+        market_ids = set(market_filter.get("marketIds") or [])
+        market_types = set(market_filter.get("marketTypeCodes") or [])
+        text_query = (market_filter.get("textQuery") or "").lower()
+        start_range = market_filter.get("marketStartTime") or {}
+        start_from, start_to = start_range.get("from"), start_range.get("to")
+
+        if market_ids:
+            candidates = [m for m in market_ids if m in self.markets]
+        elif event_ids:
+            candidates = [m for event_id in event_ids for m in self._by_event.get(event_id, [])]
+        elif competition_ids:
+            candidates = [m for comp_id in competition_ids for m in self._by_competition.get(comp_id, [])]
+        else:
+            candidates = list(self.markets)
+
+        matches = []
+        for market_id in candidates:
+            market = self.markets[market_id]
+            if event_type_ids and "1" not in event_type_ids:
+                continue
+            if competition_ids and market["competition_id"] not in competition_ids:
+                continue
+            if event_ids and market["event_id"] not in event_ids:
+                continue
+            if market_ids and market_id not in market_ids:
+                continue
+            if market_types and market["market_type"] not in market_types:
+                continue
+            if text_query and text_query not in market["event_name"].lower():
+                continue
+            if start_from and _parse_time(market["start_time"]) < _parse_time(start_from):
+                continue
+            if start_to and _parse_time(market["start_time"]) > _parse_time(start_to):
+                continue
+            matches.append((market_id, market))
+        return matches
+
+    def _listEventTypes(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        market_filter = params.get("filter") or {}
+        text_query = (market_filter.get("textQuery") or "").lower()
+        if text_query and text_query not in "soccer":
+            return []
+        count = len(self._matching_markets({**market_filter, "textQuery": None}))
+        return [{"eventType": {"id": "1", "name": "Soccer"}, "marketCount": count}]
+
+    def _listCompetitions(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        market_filter = params.get("filter") or {}
+        text_query = (market_filter.get("textQuery") or "").lower()
+        counts: Counter = Counter()
+        names = {}
+        for _, market in self._matching_markets({**market_filter, "textQuery": None}):
+            if text_query and text_query not in market["competition_name"].lower():
+                continue
+            counts[market["competition_id"]] += 1
+            names[market["competition_id"]] = market["competition_name"]
+        return [
+            {"competition": {"id": comp_id, "name": names[comp_id]}, "marketCount": count, "competitionRegion": "GBR"}
+            for comp_id, count in counts.items()
+        ]
+
+    def _listEvents(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        counts: Counter = Counter()
+        events = {}
+        for _, market in self._matching_markets(params.get("filter") or {}):
+            counts[market["event_id"]] += 1
+            events[market["event_id"]] = market
+        return [
+            {
+                "event": {
+                    "id": event_id, "name": market["event_name"], "countryCode": "GB",
+                    "timezone": "GMT", "openDate": market["start_time"],
+                },
+                "marketCount": counts[event_id],
+            }
+            for event_id, market in events.items()
+        ]
+
+    def _listMarketCatalogue(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        projection = params.get("marketProjection") or []
+        max_results = params.get("maxResults") or 0
+        if not 0 < max_results <= 1000:
+            raise SimulatedAPIError("INVALID_INPUT_DATA", "maxResults must be between 1 and 1000")
+
+        matches = self._matching_markets(params.get("filter") or {})
+        if params.get("sort") == "FIRST_TO_START":
+            matches.sort(key=lambda item: item[1]["start_time"])
+        matches = matches[:max_results]
+        self._check_weight(len(matches) * catalogue_weight(projection))
+
+        catalogue = []
+        for market_id, market in matches:
+            entry = {
+                "marketId": market_id,
+                "marketName": market["market_type"].replace("_", " ").title(),
+                "totalMatched": market["total_matched"],
+            }
+            if "MARKET_START_TIME" in projection:
+                entry["marketStartTime"] = market["start_time"]
+            if "EVENT" in projection:
+                entry["event"] = {
+                    "id": market["event_id"], "name": market["event_name"], "countryCode": "GB",
+                    "timezone": "GMT", "openDate": market["start_time"],
+                }
+            if "COMPETITION" in projection:
+                entry["competition"] = {"id": market["competition_id"], "name": market["competition_name"]}
+            if "MARKET_DESCRIPTION" in projection:
+                entry["description"] = {
+                    "marketType": market["market_type"], "bettingType": "ODDS", "turnInPlayEnabled": True,
+                    "marketTime": market["start_time"], "suspendTime": market["start_time"],
+                }
+            if "RUNNER_METADATA" in projection or "RUNNER_DESCRIPTION" in projection:
+                entry["runners"] = [
+                    {"selectionId": selection_id, "runnerName": runner["name"], "handicap": 0.0, "sortPriority": i + 1}
+                    for i, (selection_id, runner) in enumerate(market["runners"].items())
+                ]
+            catalogue.append(entry)
+        return catalogue
+
+    def _listMarketBook(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        market_ids = params.get("marketIds") or []
+        price_projection = params.get("priceProjection") or {}
+        price_data = price_projection.get("priceData") or []
+        depth = (price_projection.get("exBestOffersOverrides") or {}).get("bestPricesDepth")
+        self._check_weight(len(market_ids) * book_weight(price_data, depth))
+
+        with_prices = bool({"EX_BEST_OFFERS", "EX_ALL_OFFERS"} & set(price_data))
+        books = []
+        with self._lock:
+            for market_id in market_ids:
+                market = self.markets.get(market_id)
+                if market is None:
+                    continue
+                runners = []
+                for selection_id, runner in market["runners"].items():
+                    ex = {"availableToBack": [], "availableToLay": [], "tradedVolume": []}
+                    if with_prices:
+                        ex["availableToBack"] = [{"price": p, "size": s} for p, s in runner["back"] if s > 0]
+                        ex["availableToLay"] = [{"price": p, "size": s} for p, s in runner["lay"] if s > 0]
+                    runners.append({
+                        "selectionId": selection_id, "handicap": 0.0, "status": "ACTIVE",
+                        "lastPriceTraded": runner["back"][0][0] if runner["back"] else None, "ex": ex,
+                    })
+                books.append({
+                    "marketId": market_id, "isMarketDataDelayed": False, "status": "OPEN", "betDelay": 0,
+                    "bspReconciled": False, "complete": True, "inplay": False, "numberOfWinners": 1,
+                    "numberOfRunners": len(runners), "numberOfActiveRunners": len(runners),
+                    "totalMatched": market["total_matched"], "crossMatching": True,
+                    "runnersVoidable": False, "version": 1, "runners": runners,
+                })
+        return books
+
+    def _placeOrders(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        market_id = params.get("marketId")
+        instructions = params.get("instructions") or []
+        market = self.markets.get(market_id)
+        if market is None:
+            return {
+                "status": "FAILURE", "errorCode": "MARKET_NOT_OPEN_FOR_BETTING", "marketId": market_id,
+                "instructionReports": [
+                    {"status": "FAILURE", "errorCode": "ERROR_IN_ORDER", "instruction": i} for i in instructions
+                ],
+            }
+
+        reports = []
+        placed_date = datetime.now(timezone.utc).strftime(BETFAIR_TIME_FORMAT)
+        with self._lock:
+            for instruction in instructions:
+                runner = market["runners"].get(instruction.get("selectionId"))
+                size = (instruction.get("limitOrder") or {}).get("size", 0)
+                side = instruction.get("side", "BACK")
+                if runner is None:
+                    reports.append({"status": "FAILURE", "errorCode": "INVALID_RUNNER", "instruction": instruction})
+                    continue
+                if side == "BACK" and size > self.balance:
+                    reports.append({"status": "FAILURE", "errorCode": "INSUFFICIENT_FUNDS", "instruction": instruction})
+                    continue
+
+                reports.append(self._place(market_id, runner, instruction, placed_date))
+
+        failed = any(report["status"] != "SUCCESS" for report in reports)
+        result = {"status": "FAILURE" if failed else "SUCCESS", "marketId": market_id, "instructionReports": reports}
+        if failed:
+            result["errorCode"] = "BET_ACTION_ERROR"
+        return result
+
+    def _place(self, market_id: str, runner: Dict[str, Any], instruction: Dict[str, Any], placed_date: str) -> Dict[str, Any]:
+        """Match one limit order and book its remainder as a live order; returns its instruction report."""
+        limit_order = instruction.get("limitOrder") or {}
+        size, price = limit_order.get("size", 0), limit_order.get("price", 0)
+        side = instruction.get("side", "BACK")
+        matched, average_price = self._match(runner, side, price, size)
+        bet_id = str(next(self._bet_ids))
+        self._orders[bet_id] = {
+            "marketId": market_id, "selectionId": instruction["selectionId"], "side": side,
+            "priceRequested": price, "sizeRequested": size, "sizeMatched": matched, "averagePriceMatched": average_price,
+            "sizeCancelled": 0.0, "sizeLapsed": 0.0, "placedDate": placed_date,
+            "customerOrderRef": instruction.get("customerOrderRef"),
+        }
+        if side == "BACK":
+            self.balance -= size
+            self.exposure -= size
+        return {
+            "status": "SUCCESS", "instruction": instruction, "betId": bet_id, "placedDate": placed_date,
+            "averagePriceMatched": average_price, "sizeMatched": matched,
+            "orderStatus": "EXECUTION_COMPLETE" if matched >= size else "EXECUTABLE",
+        }
+
+    @staticmethod
+    def _remaining(order: Dict[str, Any]) -> float:
+        return round(order["sizeRequested"] - order["sizeMatched"] - order["sizeCancelled"] - order["sizeLapsed"], 2)
+
+    def _release(self, order: Dict[str, Any], field: str, size: float) -> None:
+        """Take `size` off an order's unmatched remainder as cancelled or lapsed, returning a BACK stake."""
+        order[field] = round(order[field] + size, 2)
+        if order["side"] == "BACK":
+            self.balance += size
+            self.exposure += size
+
+    def _listCurrentOrders(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        bet_ids = set(params.get("betIds") or [])
+        market_ids = set(params.get("marketIds") or [])
+        order_refs = set(params.get("customerOrderRefs") or [])
+        from_record = params.get("fromRecord") or 0
+        record_count = min(params.get("recordCount") or 1000, 1000)
+        with self._lock:
+            matching = [
+                {
+                    "betId": bet_id, "marketId": order["marketId"], "selectionId": order["selectionId"],
+                    "handicap": 0.0, "priceSize": {"price": order["priceRequested"], "size": order["sizeRequested"]},
+                    "bspLiability": 0.0, "side": order["side"],
+                    "status": "EXECUTABLE" if self._remaining(order) > 0 else "EXECUTION_COMPLETE",
+                    "persistenceType": "LAPSE", "orderType": "LIMIT", "placedDate": order["placedDate"],
+                    "averagePriceMatched": order["averagePriceMatched"], "sizeMatched": order["sizeMatched"],
+                    "sizeRemaining": self._remaining(order), "sizeLapsed": order["sizeLapsed"],
+                    "sizeCancelled": order["sizeCancelled"], "sizeVoided": 0.0,
+                    **({"customerOrderRef": order["customerOrderRef"]} if order.get("customerOrderRef") else {}),
+                }
+                for bet_id, order in self._orders.items()
+                if (not bet_ids or bet_id in bet_ids) and (not market_ids or order["marketId"] in market_ids)
+                and (not order_refs or order.get("customerOrderRef") in order_refs)
+            ]
+        page = matching[from_record:from_record + record_count]
+        return {"currentOrders": page, "moreAvailable": from_record + len(page) < len(matching)}
+
+    def _cancelOrders(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        market_id = params.get("marketId")
+        cancelled_date = datetime.now(timezone.utc).strftime(BETFAIR_TIME_FORMAT)
+        reports = []
+        with self._lock:
+            for instruction in params.get("instructions") or []:
+                order = self._orders.get(instruction.get("betId"))
+                if order is None or order["marketId"] != market_id or self._remaining(order) <= 0:
+                    reports.append({"status": "FAILURE", "errorCode": "BET_TAKEN_OR_LAPSED", "instruction": instruction})
+                    continue
+                size = min(instruction.get("sizeReduction") or self._remaining(order), self._remaining(order))
+                self._release(order, "sizeCancelled", size)
+                reports.append({"status": "SUCCESS", "instruction": instruction, "sizeCancelled": size, "cancelledDate": cancelled_date})
+        failed = any(report["status"] != "SUCCESS" for report in reports)
+        result = {"status": "FAILURE" if failed else "SUCCESS", "marketId": market_id, "instructionReports": reports}
+        if failed:
+            result["errorCode"] = "BET_ACTION_ERROR"
+        return result
+
+    def _replaceOrders(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        market_id = params.get("marketId")
+        market = self.markets.get(market_id)
+        placed_date = datetime.now(timezone.utc).strftime(BETFAIR_TIME_FORMAT)
+        reports = []
+        with self._lock:
+            for instruction in params.get("instructions") or []:
+                cancel_instruction = {"betId": instruction.get("betId")}
+                order = self._orders.get(instruction.get("betId"))
+                if market is None or order is None or order["marketId"] != market_id or self._remaining(order) <= 0:
+                    reports.append({
+                        "status": "FAILURE", "errorCode": "CANCELLED_NOT_PLACED",
+                        "cancelInstructionReport": {"status": "FAILURE", "errorCode": "BET_TAKEN_OR_LAPSED", "instruction": cancel_instruction},
+                        "placeInstructionReport": {"status": "FAILURE", "errorCode": "ERROR_IN_ORDER", "instruction": {}},
+                    })
+                    continue
+                size = self._remaining(order)
+                self._release(order, "sizeCancelled", size)
+                place_instruction = {
+                    "orderType": "LIMIT", "selectionId": order["selectionId"], "side": order["side"],
+                    "limitOrder": {"size": size, "price": instruction.get("newPrice"), "persistenceType": "LAPSE"},
+                }
+                reports.append({
+                    "status": "SUCCESS",
+                    "cancelInstructionReport": {"status": "SUCCESS", "instruction": cancel_instruction, "sizeCancelled": size, "cancelledDate": placed_date},
+                    "placeInstructionReport": self._place(market_id, market["runners"][order["selectionId"]], place_instruction, placed_date),
+                })
+        failed = any(report["status"] != "SUCCESS" for report in reports)
+        result = {"status": "FAILURE" if failed else "SUCCESS", "marketId": market_id, "instructionReports": reports}
+        if failed:
+            result["errorCode"] = "BET_ACTION_ERROR"
+        return result
+
+    @staticmethod
+    def _match(runner: Dict[str, Any], side: str, price: float, size: float) -> Tuple[float, float]:
+        """Match a limit order against the opposing ladder, consuming its liquidity."""
+        ladder = runner["back"] if side == "BACK" else runner["lay"]
+        remaining, notional = size, 0.0
+        for level, (level_price, level_size) in enumerate(ladder):
+            crosses = level_price >= price if side == "BACK" else level_price <= price
+            if remaining <= 0 or not crosses:
+                break
+            take = min(level_size, remaining)
+            notional += take * level_price
+            remaining -= take
+            ladder[level] = (level_price, round(level_size - take, 2))
+        matched = round(size - remaining, 2)
+        return matched, (round(notional / matched, 2) if matched else 0.0)
+
+    def _listClearedOrders(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        bet_status = params.get("betStatus")
+        bet_ids = set(params.get("betIds") or [])
+        from_record = params.get("fromRecord") or 0
+        record_count = min(params.get("recordCount") or 1000, 1000)
+        with self._lock:
+            matching = [
+                {k: v for k, v in order.items() if k != "betStatus"}
+                for order in self._cleared
+                if order["betStatus"] == bet_status and (not bet_ids or order["betId"] in bet_ids)
+            ]
+        page = matching[from_record:from_record + record_count]
+        return {"clearedOrders": page, "moreAvailable": from_record + len(page) < len(matching)}
+
+    # Accounts API
+
+    def _getAccountFunds(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "availableToBetBalance": round(self.balance, 2), "exposure": round(self.exposure, 2),
+                "retainedCommission": 0.0, "exposureLimit": -10000.0, "discountRate": 0.0,
+                "pointsBalance": 0, "wallet": "UK",
+            }
+
+    def _check_weight(self, weight: int) -> None:
+        if weight > self.max_weight:
+            logger.info(f"Simulator rejected a request of {weight} points as TOO_MUCH_DATA")
+            raise SimulatedAPIError("TOO_MUCH_DATA", f"{weight} points exceeds {self.max_weight}")
+
+
+class SimulatedAPIError(Exception):
+    def __init__(self, error_code: str, details: str = ""):
+        super().__init__(details)
+        self.error_code = error_code
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
@@ -0,0 +1,228 @@
+import json
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from betfairlightweight.streaming import BetfairStream
+
+from core import logger
+
+
+PriceLadder = List[Tuple[float, float]]
+
+
+class LocalStreamServer:
+    """
+    Plain-TCP stand-in for stream-api.betfair.com, for offline tests and local runs.
+
+    Speaks enough of the Exchange Stream protocol for MarketStreamCache: the connection
+    greeting, authentication, heartbeat and marketSubscription (filtered by event IDs,
+    market IDs and market types), answering each subscription with a SUB_IMAGE of the
+    seeded markets. `push_prices` then sends best-offer deltas to every connection
+    subscribed to that market. An orderSubscription is answered by replaying
+    `order_messages`, a recording of ocm messages (SUB_IMAGE first), with their IDs
+    rewritten to the new subscription. Subscription requests are kept in
+    `subscriptions` so tests can check what was asked for (e.g. conflateMs).
+
+    `markets` maps market ID to {"event_id", "market_type", "runners"}, where runners
+    maps selection ID to {"back": [(price, size), ...], "lay": [...]}, best price first.
+    """
+
+    CRLF = b"\r\n"
+
+    def __init__(
+        self,
+        markets: Optional[Dict[str, Dict[str, Any]]] = None,
+        order_messages: Optional[List[Dict[str, Any]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.markets = markets or {}
+        self.order_messages = order_messages or []
+        self.subscriptions: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._clients: Dict[socket.socket, Dict[str, Any]] = {}
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._running = False
+        self._clk = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.getsockname()
+
+    def start(self) -> "LocalStreamServer":
+        self._server.listen()
+        self._running = True
+        threading.Thread(target=self._accept_loop, name="local-stream-server", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        with self._lock:
+            clients = list(self._clients)
+            self._clients.clear()
+        for conn in clients:
+            self._close(conn)
+        self._close(self._server)
+
+    def create_stream(self, listener, timeout: float = 64) -> "LocalBetfairStream":
+        """Stream factory for MarketStreamCache/OrderStreamCache that connects to this server."""
+        return LocalBetfairStream(self.address, listener, timeout=timeout)
+
+    def push_prices(self, market_id: str, selection_id: int, back: Optional[PriceLadder] = None, lay: Optional[PriceLadder] = None) -> None:
+        """Replace a runner's best offers and stream the change to subscribers of the market."""
+        runner = self.markets[market_id]["runners"].setdefault(selection_id, {})
+        change: Dict[str, Any] = {"id": selection_id}
+        if back is not None:
+            change["batb"] = self._levels(back, len(runner.get("back", [])))
+            runner["back"] = list(back)
+        if lay is not None:
+            change["batl"] = self._levels(lay, len(runner.get("lay", [])))
+            runner["lay"] = list(lay)
+
+        with self._lock:
+            targets = [
+                (conn, state["id"]) for conn, state in self._clients.items()
+                if market_id in state["market_ids"]
+            ]
+        for conn, unique_id in targets:
+            self._send(conn, self._market_change(unique_id, "UPDATE", [{"id": market_id, "rc": [change]}]))
+
+    def _accept_loop(self) -> None:
+        while self._running:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._clients[conn] = {"id": None, "market_ids": set()}
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket) -> None:
+        self._send(conn, {"op": "connection", "connectionId": f"local-{id(conn)}"})
+        buffer = b""
+        while self._running:
+            try:
+                data = conn.recv(4096)
+            except OSError:
+                break
+            if not data:
+                break
+            buffer += data
+            while self.CRLF in buffer:
+                line, buffer = buffer.split(self.CRLF, 1)
+                if line:
+                    self._on_request(conn, json.loads(line))
+        with self._lock:
+            self._clients.pop(conn, None)
+        self._close(conn)
+
+    def _on_request(self, conn: socket.socket, request: Dict[str, Any]) -> None:
+        op = request.get("op")
+        self._send(conn, {
+            "op": "status", "id": request.get("id"), "statusCode": "SUCCESS",
+            "connectionClosed": False, "connectionsAvailable": 10,
+        })
+        if op == "orderSubscription":
+            self.subscriptions.append(request)
+            for message in self.order_messages:
+                self._send(conn, {**message, "id": request["id"]})
+            return
+        if op != "marketSubscription":
+            return
+
+        self.subscriptions.append(request)
+        market_ids = self._match(request.get("marketFilter") or {})
+        with self._lock:
+            if conn in self._clients:
+                self._clients[conn] = {"id": request["id"], "market_ids": set(market_ids)}
+        images = [self._market_image(market_id) for market_id in market_ids]
+        self._send(conn, self._market_change(request["id"], "SUB_IMAGE", images))
+
+    def _match(self, market_filter: Dict[str, Any]) -> List[str]:
+        event_ids = market_filter.get("eventIds")
+        market_ids = market_filter.get("marketIds")
+        market_types = market_filter.get("marketTypes")
+        return [
+            market_id for market_id, market in self.markets.items()
+            if (not event_ids or str(market["event_id"]) in event_ids)
+            and (not market_ids or market_id in market_ids)
+            and (not market_types or market["market_type"] in market_types)
+        ]
+
+    def _market_image(self, market_id: str) -> Dict[str, Any]:
+        market = self.markets[market_id]
+        runners = market["runners"]
+        return {
+            "id": market_id,
+            "img": True,
+            "marketDefinition": {
+                "betDelay": 0, "bettingType": "ODDS", "bspMarket": False, "bspReconciled": False,
+                "complete": True, "crossMatching": True, "discountAllowed": True,
+                "eventId": str(market["event_id"]), "eventTypeId": "1", "inPlay": False,
+                "marketBaseRate": 5.0, "marketTime": "2030-01-01T15:00:00.000Z",
+                "marketType": market["market_type"], "numberOfActiveRunners": len(runners),
+                "numberOfWinners": 1, "persistenceEnabled": True, "regulators": ["MR_INT"],
+                "runnersVoidable": False, "status": "OPEN", "timezone": "UTC",
+                "turnInPlayEnabled": True, "version": 1,
+                "runners": [
+                    {"id": selection_id, "sortPriority": i + 1, "status": "ACTIVE"}
+                    for i, selection_id in enumerate(runners)
+                ],
+            },
+            "rc": [
+                {
+                    "id": selection_id,
+                    "batb": self._levels(prices.get("back", []), 0),
+                    "batl": self._levels(prices.get("lay", []), 0),
+                }
+                for selection_id, prices in runners.items()
+            ],
+        }
+
+    def _market_change(self, unique_id: Optional[int], change_type: str, markets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self._clk += 1
+        return {
+            "op": "mcm", "id": unique_id, "ct": change_type, "clk": str(self._clk),
+            "initialClk": "0", "pt": int(time.time() * 1000), "mc": markets,
+        }
+
+    @staticmethod
+    def _levels(ladder: PriceLadder, previous_depth: int) -> List[List[float]]:
+        """Stream ladder levels as [level, price, size], zeroing levels that no longer exist."""
+        levels = [[i, price, size] for i, (price, size) in enumerate(ladder)]
+        levels += [[i, 0, 0] for i in range(len(ladder), previous_depth)]
+        return levels
+
+    def _send(self, conn: socket.socket, message: Dict[str, Any]) -> None:
+        try:
+            conn.sendall(json.dumps(message).encode("utf-8") + self.CRLF)
+        except OSError as e:
+            if self._running:
+                logger.warning(f"Local stream server could not send: {e}")
+
+    @staticmethod
+    def _close(sock: socket.socket) -> None:
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+
+class LocalBetfairStream(BetfairStream):
+    """BetfairStream that connects to a LocalStreamServer over plain TCP instead of TLS."""
+
+    def __init__(self, address: Tuple[str, int], listener, timeout: float = 64, buffer_size: int = 1024):
+        super().__init__(
+            unique_id=0, listener=listener, app_key="local", session_token="local",
+            timeout=timeout, buffer_size=buffer_size, host=None,
+        )
+        self.address = address
+
+    def _create_socket(self) -> socket.socket:
+        s = socket.create_connection(self.address, timeout=self.timeout)
+        s.settimeout(self.timeout)
+        return s
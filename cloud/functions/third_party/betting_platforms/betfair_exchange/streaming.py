@@ -0,0 +1,281 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+import betfairlightweight
+from betfairlightweight.streaming import StreamListener
+
+from .constants import (
+    ALL_MARKET_TYPE_CODES, ORDER_STREAM_IMAGE_TIMEOUT_SECONDS, STREAM_CONFLATE_MS, STREAM_HEARTBEAT_MS,
+    STREAM_LADDER_LEVELS, STREAM_MARKET_FIELDS,
+)
+from core import logger
+
+
+def _read_stream(stream) -> None:
+    """Run a BetfairStream's blocking read loop, logging why it stopped."""
+    try:
+        stream.start()
+    except Exception as e:
+        if stream.running:
+            stream.stop()
+        logger.error(f"Betfair stream stopped: {e}")
+
+
+class MarketStreamCache:
+    """
+    In-memory order books for the markets of subscribed fixtures, fed by the Exchange Stream API.
+
+    Subscribing to a fixture (Betfair event ID) streams its markets' best offers into a
+    local cache, so reading a price is a dictionary lookup instead of a list_market_book
+    call. Betfair replaces the whole market subscription on every request, so each
+    subscribe/unsubscribe re-sends the current fixture set and the cache is rebuilt from
+    the fresh image. Reads return nothing while the stream is down or a market has not
+    been imaged yet; callers fall back to polling for those markets.
+
+    `conflate_ms` sets how often Betfair flushes batched price changes (0 = every change).
+    `stream_factory` builds the BetfairStream from a listener; it defaults to the API
+    client's streaming endpoint and can point at a local stand-in server for tests.
+    """
+
+    def __init__(
+        self,
+        api_client,
+        conflate_ms: int = STREAM_CONFLATE_MS,
+        market_types: Optional[List[str]] = None,
+        stream_factory: Optional[Callable[[StreamListener], Any]] = None,
+    ):
+        self.api_client = api_client
+        self.conflate_ms = conflate_ms
+        self.market_types = market_types or ALL_MARKET_TYPE_CODES
+        self._stream_factory = stream_factory or (
+            lambda listener: api_client.streaming.create_stream(listener=listener)
+        )
+        self._lock = threading.Lock()
+        self._event_ids: Set[str] = set()
+        self._listener: Optional[StreamListener] = None
+        self._stream = None
+
+    @property
+    def running(self) -> bool:
+        return self._stream is not None and self._stream.running
+
+    @property
+    def event_ids(self) -> Set[str]:
+        with self._lock:
+            return set(self._event_ids)
+
+    def subscribe(self, event_ids: Iterable[str]) -> None:
+        """Start streaming the markets of the given fixtures."""
+        with self._lock:
+            new_ids = {str(e) for e in event_ids} - self._event_ids
+            if not new_ids and self.running:
+                return
+            self._event_ids |= new_ids
+            self._resubscribe()
+
+    def unsubscribe(self, event_ids: Iterable[str]) -> None:
+        """Stop streaming the markets of the given fixtures."""
+        with self._lock:
+            removed = self._event_ids & {str(e) for e in event_ids}
+            if not removed:
+                return
+            self._event_ids -= removed
+            self._resubscribe()
+
+    def stop(self) -> None:
+        """Close the stream and drop every subscription."""
+        with self._lock:
+            self._event_ids.clear()
+            self._close()
+
+    def get_market_books(self, market_ids: List[str]) -> Dict[str, Any]:
+        """Return cached MarketBook objects keyed by market ID, skipping markets not in the cache."""
+        listener = self._listener
+        if not market_ids or listener is None or not self.running:
+            return {}
+        return {book.market_id: book for book in listener.snap(market_ids)}
+
+    def get_market_book(self, market_id: str):
+        return self.get_market_books([market_id]).get(market_id)
+
+    def _resubscribe(self) -> None:
+        if not self._event_ids:
+            self._close()
+            return
+
+        opened = not self.running
+        if opened:
+            self._open()
+
+        try:
+            self._stream.subscribe_to_markets(
+                market_filter=betfairlightweight.filters.streaming_market_filter(
+                    event_ids=sorted(self._event_ids),
+                    market_types=self.market_types,
+                ),
+                market_data_filter=betfairlightweight.filters.streaming_market_data_filter(
+                    fields=STREAM_MARKET_FIELDS,
+                    ladder_levels=STREAM_LADDER_LEVELS,
+                ),
+                conflate_ms=self.conflate_ms,
+                heartbeat_ms=STREAM_HEARTBEAT_MS,
+            )
+        except Exception as e:
+            # Keep the fixture set so the next subscribe call reconnects; reads fall back to polling.
+            logger.error(f"Market stream subscription failed: {e}")
+            self._close()
+            return
+
+        logger.info(
+            f"Market stream subscribed to {len(self._event_ids)} fixtures "
+            f"(conflate {self.conflate_ms}ms)"
+        )
+        if opened:
+            threading.Thread(
+                target=_read_stream, args=(self._stream,), name="betfair-market-stream", daemon=True
+            ).start()
+
+    def _open(self) -> None:
+        self._listener = StreamListener(max_latency=None)
+        self._stream = self._stream_factory(self._listener)
+
+    def _close(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            logger.info("Market stream closed")
+        self._stream = None
+        self._listener = None
+
+
+# Order statuses as abbreviated on the stream.
+STREAM_ORDER_STATUSES = {"E": "EXECUTABLE", "EC": "EXECUTION_COMPLETE"}
+
+
+class _ClosedMarkets:
+    """
+    Listener output queue that keeps only the IDs of markets whose update closed them.
+
+    A snapshot only carries the latest delta per market, so closures are collected as
+    each update is processed rather than read back from `snap()`.
+    """
+
+    def __init__(self):
+        self.market_ids: Set[str] = set()
+
+    def put(self, resources: List[Any]) -> None:
+        for resource in resources:
+            update = resource.streaming_update or {}
+            if update.get("closed"):
+                self.market_ids.add(update.get("id"))
+
+
+class OrderStreamCache:
+    """
+    Local view of the account's orders, fed by the Exchange Stream API order subscription.
+
+    After `start()` the initial image holds every current order, and later changes
+    (matches, lapses, cancellations, markets closing) arrive as deltas. `get_orders`
+    returns the cached state per bet ID, so callers can tell which bets may have settled
+    without calling list_current_orders or list_cleared_orders. Bets absent from the
+    cache (e.g. markets settled long ago) must still be looked up over the REST API.
+    """
+
+    def __init__(
+        self,
+        api_client,
+        conflate_ms: Optional[int] = None,
+        stream_factory: Optional[Callable[[StreamListener], Any]] = None,
+    ):
+        self.api_client = api_client
+        self.conflate_ms = conflate_ms
+        self._stream_factory = stream_factory or (
+            lambda listener: api_client.streaming.create_stream(listener=listener)
+        )
+        self._lock = threading.Lock()
+        self._listener: Optional[StreamListener] = None
+        self._stream = None
+        self._closed_markets = _ClosedMarkets()
+
+    @property
+    def running(self) -> bool:
+        return self._stream is not None and self._stream.running
+
+    @property
+    def ready(self) -> bool:
+        """True once the stream is up and its initial image has been applied."""
+        listener = self._listener
+        return self.running and listener is not None and listener.initial_clk is not None
+
+    def start(self, timeout: float = ORDER_STREAM_IMAGE_TIMEOUT_SECONDS) -> bool:
+        """Subscribe to order changes and wait up to `timeout` seconds for the initial image."""
+        with self._lock:
+            if not self.running:
+                self._closed_markets = _ClosedMarkets()
+                self._listener = StreamListener(output_queue=self._closed_markets, max_latency=None)
+                self._stream = self._stream_factory(self._listener)
+                try:
+                    self._stream.subscribe_to_orders(
+                        order_filter=betfairlightweight.filters.streaming_order_filter(),
+                        conflate_ms=self.conflate_ms,
+                        heartbeat_ms=STREAM_HEARTBEAT_MS,
+                    )
+                except Exception as e:
+                    logger.error(f"Order stream subscription failed: {e}")
+                    self._stream = None
+                    self._listener = None
+                    return False
+                threading.Thread(
+                    target=_read_stream, args=(self._stream,),
+                    name="betfair-order-stream", daemon=True,
+                ).start()
+
+        deadline = time.time() + timeout
+        while not self.ready:
+            if not self.running or time.time() >= deadline:
+                logger.warning("Order stream image not received; falling back to polling")
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._stream is not None:
+                self._stream.stop()
+                logger.info("Order stream closed")
+            self._stream = None
+            self._listener = None
+
+    def get_orders(self, bet_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the cached state of each known bet, keyed by bet ID.
+
+        Each state has market/selection IDs, status (EXECUTABLE or EXECUTION_COMPLETE),
+        matched, remaining, lapsed, cancelled and voided sizes, the average matched price
+        and whether the market has closed.
+        """
+        listener = self._listener
+        if not self.ready:
+            return {}
+
+        wanted = {str(bet_id) for bet_id in bet_ids}
+        orders: Dict[str, Dict[str, Any]] = {}
+        # snap() copies the cache into CurrentOrders resources, one per market.
+        for market_orders in listener.snap():
+            for order in market_orders.orders:
+                if order.bet_id not in wanted:
+                    continue
+                orders[order.bet_id] = {
+                    "bet_id": order.bet_id,
+                    "market_id": order.market_id,
+                    "selection_id": order.selection_id,
+                    "status": STREAM_ORDER_STATUSES.get(order.status, order.status),
+                    "size_matched": order.size_matched or 0.0,
+                    "size_remaining": order.size_remaining or 0.0,
+                    "size_lapsed": order.size_lapsed or 0.0,
+                    "size_cancelled": order.size_cancelled or 0.0,
+                    "size_voided": order.size_voided or 0.0,
+                    "average_price_matched": order.average_price_matched,
+                    "market_closed": order.market_id in self._closed_markets.market_ids,
+                }
+        return orders
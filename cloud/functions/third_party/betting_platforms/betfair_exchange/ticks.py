@@ -0,0 +1,60 @@
+from bisect import bisect_left
+from typing import Tuple
+
+
+# Betfair's price ladder: (from price, to price, increment) bands between 1.01 and 1000.
+PRICE_BANDS = (
+    (1.01, 2.0, 0.01),
+    (2.0, 3.0, 0.02),
+    (3.0, 4.0, 0.05),
+    (4.0, 6.0, 0.1),
+    (6.0, 10.0, 0.2),
+    (10.0, 20.0, 0.5),
+    (20.0, 30.0, 1.0),
+    (30.0, 50.0, 2.0),
+    (50.0, 100.0, 5.0),
+    (100.0, 1000.0, 10.0),
+)
+
+
+def _build_ladder() -> Tuple[float, ...]:
+    ladder = []
+    for low, high, increment in PRICE_BANDS:
+        steps = round((high - low) / increment)
+        ladder.extend(round(low + step * increment, 2) for step in range(steps))
+    ladder.append(PRICE_BANDS[-1][1])
+    return tuple(ladder)
+
+
+# Every valid Betfair price, ascending.
+PRICE_LADDER = _build_ladder()
+
+
+def tick_index(price: float) -> int:
+    """Position of the valid price nearest to `price` on the ladder (clamped to 1.01–1000)."""
+    position = bisect_left(PRICE_LADDER, price)
+    if position == 0:
+        return 0
+    if position == len(PRICE_LADDER):
+        return len(PRICE_LADDER) - 1
+    below, above = PRICE_LADDER[position - 1], PRICE_LADDER[position]
+    return position - 1 if price - below < above - price else position
+
+
+def snap_price(price: float, rounding: str = "nearest") -> float:
+    """
+    Round `price` to a valid Betfair price: the nearest one, or with `rounding` "down"
+    or "up" the closest one on that side (use "down" for a back and "up" for a lay so
+    the order still crosses an off-ladder quote).
+    """
+    index = tick_index(price)
+    if rounding == "down" and PRICE_LADDER[index] > price and index > 0:
+        index -= 1
+    elif rounding == "up" and PRICE_LADDER[index] < price and index < len(PRICE_LADDER) - 1:
+        index += 1
+    return PRICE_LADDER[index]
+
+
+def ticks_between(from_price: float, to_price: float) -> int:
+    """Ladder ticks from `from_price` up to `to_price` (negative when `to_price` is lower)."""
+    return tick_index(to_price) - tick_index(from_price)